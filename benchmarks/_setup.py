@@ -0,0 +1,50 @@
+# ベンチマーク共通: 一時 SQLite（または SQLITE_PATH）で Django をセットアップする
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path=None, migrate=True):
+    sys.path.insert(0, str(ROOT))
+    if db_path is None:
+        db_path = Path(tempfile.mkdtemp(prefix="ee-bench-")) / "bench.sqlite3"
+    os.environ["SQLITE_PATH"] = str(db_path)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "engineer_english.settings")
+    os.environ.setdefault("DJANGO_ALLOWED_HOSTS", "testserver,localhost")
+
+    import django
+
+    django.setup()
+    if migrate:
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+    return Path(db_path)
+
+
+def timed(fn, repeat=20):
+    # fn を repeat 回実行し、各回の所要時間(ms)のリストを返す
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
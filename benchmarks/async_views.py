@@ -0,0 +1,178 @@
+# 読み取りの多いエンドポイントを、同期ビュー（ASYNC_READ_VIEWS=False）と async ビュー
+# （core.async_views）で比べる。
+#
+#   python -m benchmarks.async_views --clients 200 --requests 2000
+#   python -m benchmarks.async_views --db /tmp/bench.sqlite3   # manage.py bench で作った DB を使う
+#
+# 一時 DB に manage.py bench と同じ合成データ（既定は小さめ）を作り、モードごとに別プロセスで
+# ASGI アプリに直接 --clients 並列（閉ループ）でリクエストを送って、エンドポイントごとの
+# スループット・p50/p99 と、計測中のスレッド数の最大値・新しく開いた DB 接続の数を JSON で出力する。
+# Django の ASGI ハンドラはリクエストごとに専用スレッドを作る（同期ミドルウェアもそこで動く）ので、
+# スレッド数は両モードでほぼ同じになる。差が出るのはスレッドに渡す回数と、そのスレッドで開く DB 接続。
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from ._setup import ROOT, setup_django
+
+ENDPOINTS = ("scene-list", "scene-detail", "lesson-bundle", "progress-my-progress")
+MODES = {"sync": "False", "async": "True"}
+
+
+def child_env(db_path, mode):
+    env = dict(os.environ)
+    env.pop("SQLITE_CATALOG_PATH", None)
+    env.update(
+        {
+            "PYTHONPATH": str(ROOT),
+            "SQLITE_PATH": str(db_path),
+            "DJANGO_SETTINGS_MODULE": "engineer_english.settings",
+            "DJANGO_ALLOWED_HOSTS": "testserver,localhost",
+            "ASYNC_READ_VIEWS": MODES[mode],
+        }
+    )
+    return env
+
+
+def prepare(args):
+    setup_django(db_path=args.db)
+
+    from core.management.commands.bench import Command
+
+    command = Command()
+    command.rng = random.Random(args.seed)
+    command.generate(
+        {
+            "scenes": args.scenes,
+            "lessons_per_scene": 10,
+            "phrases": args.scenes * 50,
+            "dialogues": args.scenes * 20,
+            "users": args.users,
+            "progress": args.progress,
+        }
+    )
+
+
+class Sampler:
+    # 計測中のスレッド数の最大値（1ms ごと）と、開いた DB 接続の数
+    def __init__(self):
+        from django.db.backends.signals import connection_created
+
+        self.peak_threads = 0
+        self.connections = 0
+        self.running = True
+        connection_created.connect(self.opened, weak=False)
+        threading.Thread(target=self.sample, daemon=True).start()
+
+    def opened(self, **kwargs):
+        self.connections += 1
+
+    def sample(self):
+        while self.running:
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            time.sleep(0.001)
+
+    def reset(self):
+        self.peak_threads = threading.active_count()
+        self.connections = 0
+
+
+def worker(args):
+    setup_django(db_path=args.db, migrate=False)
+
+    from django.contrib.sessions.models import Session
+
+    from core.management.commands.bench import Command
+
+    command = Command()
+    command.rng = random.Random(args.seed)
+    fixtures = command.load_fixtures(args.clients)
+    endpoints = command.endpoints()
+    sampler = Sampler()
+
+    async def run():
+        results = {}
+        for name in args.endpoints.split(","):
+            sampler.reset()
+            result = await command.run(
+                {name: endpoints[name]}, fixtures, args.requests, args.warmup
+            )
+            results[name] = {
+                **result[name],
+                "peak_threads": sampler.peak_threads,
+                "db_connections_opened": sampler.connections,
+            }
+        return results
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        sampler.running = False
+        sessions = [client["session"] for client in fixtures["clients"]]
+        Session.objects.filter(session_key__in=sessions).delete()
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--db", help="Existing database with bench data (default: generate)")
+    parser.add_argument("--scenes", type=int, default=100)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--progress", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", choices=["prepare", *MODES])
+    args = parser.parse_args()
+
+    if args.child == "prepare":
+        return prepare(args)
+    if args.child:
+        return worker(args)
+
+    if args.db is None:
+        args.db = Path(tempfile.mkdtemp(prefix="ee-async-")) / "bench.sqlite3"
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.async_views", "--child", "prepare",
+             "--db", str(args.db), "--scenes", str(args.scenes), "--users", str(args.users),
+             "--progress", str(args.progress), "--seed", str(args.seed)],
+            cwd=ROOT, env=child_env(args.db, "sync"), check=True,
+        )
+    report = {"clients": args.clients, "requests": args.requests, "modes": {}}
+    for mode in MODES:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.async_views", "--child", mode,
+             "--db", str(args.db), "--clients", str(args.clients),
+             "--requests", str(args.requests), "--warmup", str(args.warmup),
+             "--endpoints", args.endpoints, "--seed", str(args.seed)],
+            cwd=ROOT, env=child_env(args.db, mode), stdout=subprocess.PIPE, text=True,
+        )
+        if proc.returncode != 0:
+            raise SystemExit(f"{mode} process failed")
+        report["modes"][mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # async / sync の比（スループットは大きいほど、p50・p99 は小さいほど async が良い）
+    sync, async_ = report["modes"]["sync"], report["modes"]["async"]
+    report["async_vs_sync"] = {
+        name: {
+            "throughput": round(async_[name]["throughput_rps"] / sync[name]["throughput_rps"], 2),
+            "p50": round(async_[name]["p50_ms"] / sync[name]["p50_ms"], 2),
+            "p99": round(async_[name]["p99_ms"] / sync[name]["p99_ms"], 2),
+        }
+        for name in sync
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
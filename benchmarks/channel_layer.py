@@ -0,0 +1,191 @@
+# チャネルレイヤーのスループットと group_send の遅延を、ワーカープロセス数を変えて計測する。
+#
+#   CHANNEL_LAYER_BACKEND=redis REDIS_URL=redis://127.0.0.1:6379/0 \
+#       python -m benchmarks.channel_layer --workers 1,4,16 --consumers 50 --messages 2000
+#
+# 各ワーカープロセスが --consumers 個のチャネルを作って同じグループに参加し（uvicorn の
+# ワーカーごとの WebSocket 接続に相当）、親プロセスが --rate 通/秒でグループに送信する。
+# 送信1回あたりの group_send の所要時間、配信の遅延（送信から受信まで）、配信数/秒、
+# 取りこぼし（容量超過などで届かなかった数）をワーカー数ごとに JSON で出力する。
+# memory（InMemoryChannelLayer）はプロセスをまたげないため、送信側と同じプロセスの1ワーカーだけを測る。
+import argparse
+import asyncio
+import json
+import multiprocessing
+import queue
+import time
+import uuid
+
+from ._setup import percentile, setup_django
+
+GROUP_PREFIX = "bench"
+IDLE_SECONDS = 5
+
+
+async def consume(layer, group, consumers, ready):
+    # consumers 個のチャネルで受信し、受信数と遅延(ms)のリストを返す
+    channels = [await layer.new_channel() for _ in range(consumers)]
+    for channel in channels:
+        await layer.group_add(group, channel)
+    ready()
+    latencies = []
+
+    async def receive(channel):
+        # bench.stop を受け取るか、IDLE_SECONDS 何も届かなければ終わる
+        while True:
+            try:
+                message = await asyncio.wait_for(layer.receive(channel), IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                return
+            if message["type"] == "bench.stop":
+                return
+            latencies.append((time.time() - message["sent"]) * 1000)
+
+    await asyncio.gather(*(receive(channel) for channel in channels))
+    for channel in channels:
+        await layer.group_discard(group, channel)
+    return {"received": len(latencies), "latencies": latencies}
+
+
+def worker(group, consumers, ready, results):
+    setup_django(migrate=False)
+
+    from channels.layers import get_channel_layer
+
+    result = asyncio.run(consume(get_channel_layer(), group, consumers, ready.release))
+    results.put(result)
+
+
+async def publish(layer, group, messages, rate):
+    # rate 通/秒で送信し、group_send 1回ごとの所要時間(ms)を返す
+    durations = []
+    interval = 1 / rate if rate else 0
+    started = time.perf_counter()
+    for seq in range(messages):
+        if interval:
+            delay = started + seq * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        sent = time.perf_counter()
+        await layer.group_send(group, {"type": "bench.message", "seq": seq, "sent": time.time()})
+        durations.append((time.perf_counter() - sent) * 1000)
+    return durations, time.perf_counter() - started
+
+
+def summary(samples):
+    if not samples:
+        return None
+    return {
+        "median_ms": round(percentile(samples, 50), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+
+def report(workers, consumers, messages, durations, publish_seconds, elapsed, results):
+    latencies = [value for result in results for value in result["latencies"]]
+    expected = workers * consumers * messages
+    received = sum(result["received"] for result in results)
+    return {
+        "workers": workers,
+        "consumers": workers * consumers,
+        "messages": messages,
+        "publish_per_second": round(messages / publish_seconds, 1),
+        "group_send": summary(durations),
+        "deliveries_per_second": round(received / elapsed, 1),
+        "delivery_latency": summary(latencies),
+        "delivered": received,
+        "dropped": expected - received,
+    }
+
+
+async def run_in_process(consumers, messages, rate):
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+    group = f"{GROUP_PREFIX}-{uuid.uuid4().hex}"
+    ready = asyncio.Event()
+    task = asyncio.create_task(consume(layer, group, consumers, ready.set))
+    await ready.wait()
+    started = time.perf_counter()
+    durations, publish_seconds = await publish(layer, group, messages, rate)
+    await layer.group_send(group, {"type": "bench.stop"})
+    result = await task
+    return report(
+        1, consumers, messages, durations, publish_seconds, time.perf_counter() - started, [result]
+    )
+
+
+def check_workers(processes):
+    # ワーカーが落ちた（Redis に接続できない等）ら待ち続けずに止める
+    failed = [process.exitcode for process in processes if process.exitcode]
+    if failed:
+        for process in processes:
+            process.terminate()
+        raise RuntimeError(f"worker exited with code {failed[0]}")
+
+
+def wait_ready(ready, processes):
+    while not ready.acquire(timeout=1):
+        check_workers(processes)
+
+
+def wait_result(results, processes):
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            check_workers(processes)
+
+
+async def run_processes(workers, consumers, messages, rate):
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+    group = f"{GROUP_PREFIX}-{uuid.uuid4().hex}"
+    context = multiprocessing.get_context("spawn")
+    ready = context.Semaphore(0)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(group, consumers, ready, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in range(workers):
+        await asyncio.to_thread(wait_ready, ready, processes)
+    started = time.perf_counter()
+    durations, publish_seconds = await publish(layer, group, messages, rate)
+    await layer.group_send(group, {"type": "bench.stop"})
+    collected = [await asyncio.to_thread(wait_result, results, processes) for _ in range(workers)]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    return report(workers, consumers, messages, durations, publish_seconds, elapsed, collected)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,4,16")
+    parser.add_argument("--consumers", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=500, help="0 で上限なし")
+    args = parser.parse_args()
+
+    setup_django(migrate=False)
+
+    from django.conf import settings
+
+    backend = settings.CHANNEL_LAYERS["default"]["BACKEND"]
+    results = {"backend": backend, "runs": []}
+    if backend.endswith("InMemoryChannelLayer"):
+        results["runs"].append(asyncio.run(run_in_process(args.consumers, args.messages, args.rate)))
+    else:
+        for workers in [int(value) for value in args.workers.split(",")]:
+            results["runs"].append(
+                asyncio.run(run_processes(workers, args.consumers, args.messages, args.rate))
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# complete_lesson の書き込みを、以前の読み取り→更新（legacy）と1文の upsert で比較する。
+#
+#   python -m benchmarks.complete_lesson --processes 8 --users 2 --lessons 3 --duration 10
+#
+# 少数の (user, lesson) に複数プロセスから同時に送信して競合させ、秒間リクエスト数・p99・
+# エラー件数と、DB に残ったスコアが送信した最大値と一致しない組（更新の取りこぼし）を数える。
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from ._setup import ROOT, percentile
+
+
+def child_env(db_path):
+    env = dict(os.environ)
+    env.pop("SQLITE_CATALOG_PATH", None)
+    env.update(
+        {
+            "PYTHONPATH": str(ROOT),
+            "SQLITE_PATH": str(db_path),
+            "DJANGO_SETTINGS_MODULE": "engineer_english.settings",
+            "DJANGO_ALLOWED_HOSTS": "testserver,localhost",
+        }
+    )
+    return env
+
+
+def prepare(users):
+    from ._setup import setup_django
+
+    setup_django(db_path=os.environ["SQLITE_PATH"])
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    call_command("seed_six_scenes", verbosity=0)
+    User.objects.bulk_create([User(username=f"bench-{i}") for i in range(users)])
+
+
+def legacy_complete(user, lesson_id, score, time_spent):
+    # 変更前の complete_lesson と同じ流れ（get → get_or_create → max → save）
+    from core.models import Lesson, UserProgress
+
+    lesson = Lesson.objects.get(id=lesson_id)
+    progress, created = UserProgress.objects.get_or_create(
+        user=user, lesson=lesson, defaults={"score": score, "time_spent": time_spent}
+    )
+    if not created:
+        progress.score = max(progress.score, score)
+        progress.time_spent = time_spent
+        progress.save()
+
+
+def worker(mode, index, users, lessons, start_at, duration):
+    import django
+
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, close_old_connections
+
+    from core.models import Lesson
+    from core.progress import upsert_progress
+
+    user_list = list(User.objects.filter(username__startswith="bench-").order_by("id")[:users])
+    lesson_ids = list(Lesson.objects.order_by("id").values_list("id", flat=True)[:lessons])
+    rng = random.Random(index)
+    sent = defaultdict(int)
+    latencies = []
+    errors = 0
+
+    time.sleep(max(0, start_at - time.time()))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        user = rng.choice(user_list)
+        lesson_id = rng.choice(lesson_ids)
+        score = rng.randint(0, 100)
+        started = time.perf_counter()
+        try:
+            if mode == "legacy":
+                legacy_complete(user, lesson_id, score, 30)
+            else:
+                upsert_progress(user.pk, lesson_id, score, 30)
+        except OperationalError:
+            errors += 1
+            continue
+        except Exception:
+            # legacy では get_or_create の競合で IntegrityError になることがある
+            errors += 1
+            close_old_connections()
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        key = f"{user.pk}:{lesson_id}"
+        sent[key] = max(sent[key], score)
+    print(json.dumps({"latencies": latencies, "errors": errors, "sent": sent}))
+
+
+def final_scores():
+    import django
+
+    django.setup()
+
+    from core.models import UserProgress
+
+    rows = UserProgress.objects.values_list("user_id", "lesson_id", "score")
+    print(json.dumps({f"{u}:{l}": s for u, l, s in rows}))
+
+
+def run_mode(mode, args, workdir):
+    db_path = workdir / f"{mode}.sqlite3"
+    env = child_env(db_path)
+    module = [sys.executable, "-m", "benchmarks.complete_lesson"]
+    subprocess.run([*module, "--child", "prepare", "--users", str(args.users)], cwd=ROOT, env=env, check=True)
+    start_at = time.time() + args.startup_grace
+    procs = [
+        subprocess.Popen(
+            [*module, "--child", mode, "--index", str(i), "--users", str(args.users),
+             "--lessons", str(args.lessons), "--start-at", str(start_at),
+             "--duration", str(args.duration)],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+        )
+        for i in range(args.processes)
+    ]
+    latencies = []
+    errors = 0
+    expected = defaultdict(int)
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode != 0:
+            raise SystemExit(f"{mode} worker failed")
+        result = json.loads(out.strip().splitlines()[-1])
+        latencies.extend(result["latencies"])
+        errors += result["errors"]
+        for key, score in result["sent"].items():
+            expected[key] = max(expected[key], score)
+    stored = json.loads(
+        subprocess.run(
+            [*module, "--child", "final"], cwd=ROOT, env=env, check=True,
+            capture_output=True, text=True,
+        ).stdout.strip().splitlines()[-1]
+    )
+    return {
+        "mode": mode,
+        "requests_per_s": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "errors": errors,
+        "lost_updates": sum(1 for key, score in expected.items() if stored.get(key) != score),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--lessons", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--startup-grace", type=float, default=5.0)
+    parser.add_argument("--child", choices=["prepare", "legacy", "upsert", "final"])
+    parser.add_argument("--index", type=int)
+    parser.add_argument("--start-at", type=float)
+    args = parser.parse_args()
+
+    if args.child == "prepare":
+        return prepare(args.users)
+    if args.child == "final":
+        return final_scores()
+    if args.child:
+        return worker(args.child, args.index, args.users, args.lessons, args.start_at, args.duration)
+
+    workdir = Path(tempfile.mkdtemp(prefix="ee-complete-"))
+    print(json.dumps([run_mode(mode, args, workdir) for mode in ("legacy", "upsert")], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# lambda.py の import（= コールドスタートの初期化）にかかる時間を -X importtime で計測する。
+#
+#   python -m benchmarks.importtime            # 通常構成と DJANGO_LEAN_STARTUP=True を比較
+#   python -m benchmarks.importtime --top 30
+#
+# 各構成を別プロセスで --repeat 回起動し、プロセス全体の時間・合計 import 時間・
+# トップレベルパッケージ別の内訳を JSON で出力する。
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from ._setup import ROOT
+
+SNIPPET = "import importlib; importlib.import_module('lambda')"
+
+
+def run_once(env):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    total_us = 0
+    by_package = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = (
+            part.strip() for part in line[len("import time:") :].split("|")
+        )
+        self_us = int(self_us)
+        total_us += self_us
+        parts = name.split(".")
+        # django.contrib.admin のようにアプリ単位で集計する
+        depth = 3 if parts[:2] == ["django", "contrib"] else 1
+        by_package[".".join(parts[:depth])] += self_us
+    return wall_ms, total_us, by_package
+
+
+def measure(label, extra_env, repeat, top):
+    env = dict(os.environ)
+    env.update(
+        {
+            "PYTHONPATH": str(ROOT),
+            "STARTUP_COPY_SEED_DB": "0",
+            "SQLITE_PATH": os.path.join(tempfile.mkdtemp(prefix="ee-import-"), "db.sqlite3"),
+            "DJANGO_SETTINGS_MODULE": "engineer_english.settings",
+        }
+    )
+    env.update(extra_env)
+    walls = []
+    totals = []
+    packages = defaultdict(list)
+    for _ in range(repeat):
+        wall_ms, total_us, by_package = run_once(env)
+        walls.append(wall_ms)
+        totals.append(total_us / 1000)
+        for name, us in by_package.items():
+            packages[name].append(us / 1000)
+    ranked = sorted(
+        ((name, statistics.median(values)) for name, values in packages.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return {
+        "mode": label,
+        "process_wall_ms_median": round(statistics.median(walls), 1),
+        "import_ms_median": round(statistics.median(totals), 1),
+        "import_ms_min": round(min(totals), 1),
+        "top_packages_ms": {name: round(ms, 1) for name, ms in ranked[:top]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    results = [
+        measure("default", {"DJANGO_LEAN_STARTUP": "False"}, args.repeat, args.top),
+        measure("lean", {"DJANGO_LEAN_STARTUP": "True"}, args.repeat, args.top),
+    ]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
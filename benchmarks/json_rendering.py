@@ -0,0 +1,121 @@
+# /api/scenes/ の1リクエストあたりの CPU 時間を、DRF 標準の JSONRenderer（serializer.data を描画）と
+# ORJSONRenderer + エンコード済みの断片（core.fragments）で比べる。
+#
+#   python -m benchmarks.json_rendering --scenes 100 --repeat 20
+#   python -m benchmarks.json_rendering --db /tmp/bench.sqlite3   # manage.py bench で作った DB を使う
+#
+# キャッシュ済み（同じコンテンツバージョン）と、毎回組み立て直す場合（コンテンツバージョンを上げる。
+# 断片はプロセス内に残るので、1件を編集した直後と同じ）、断片も空の場合（起動直後）を
+# time.process_time で測り、中央値・p99 と標準の描画に対する倍率を JSON で出力する。
+import argparse
+import json
+import random
+import statistics
+import time
+
+from ._setup import percentile, setup_django
+
+
+def cpu_timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        samples.append((time.process_time() - started) * 1000)
+    return samples
+
+
+def summarize_cpu(samples):
+    return {
+        "median_cpu_ms": round(statistics.median(samples), 3),
+        "p99_cpu_ms": round(percentile(samples, 99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", help="Existing database with bench data (default: generate)")
+    parser.add_argument("--scenes", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django(db_path=args.db, migrate=args.db is None)
+
+    from django.test import Client
+    from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+    from core.cache import bump_content_version
+    from core.fragments import STORES
+    from core.views import SceneViewSet
+
+    if args.db is None:
+        from core.management.commands.bench import Command
+
+        command = Command()
+        command.rng = random.Random(0)
+        command.generate(
+            {
+                "scenes": args.scenes,
+                "lessons_per_scene": 10,
+                "phrases": args.scenes * 50,
+                "dialogues": args.scenes * 20,
+                "users": 1,
+                "progress": 0,
+            }
+        )
+
+    client = Client()
+    path = "/api/scenes/"
+    renderers = {
+        "drf": [JSONRenderer, BrowsableAPIRenderer],
+        "orjson": SceneViewSet.renderer_classes,
+    }
+
+    def use(name):
+        SceneViewSet.renderer_classes = renderers[name]
+
+    def get():
+        response = client.get(path)
+        assert response.status_code == 200
+        return response.content
+
+    def rebuilt():
+        bump_content_version()
+        get()
+
+    def cold():
+        bump_content_version()
+        for store in STORES.values():
+            store.clear()
+        get()
+
+    bodies = {}
+    for name in renderers:
+        use(name)
+        bump_content_version()
+        bodies[name] = get()
+    assert bodies["drf"] == bodies["orjson"], "response bodies differ"
+
+    report = {"scenes": args.scenes if args.db is None else None, "bytes": len(bodies["drf"])}
+    medians = {}
+    for label, fn, names in (
+        ("cached", get, ("drf", "orjson")),
+        ("rebuilt", rebuilt, ("drf", "orjson")),
+        ("rebuilt_empty_fragments", cold, ("orjson",)),
+    ):
+        report[label] = {}
+        for name in names:
+            use(name)
+            get()
+            samples = cpu_timed(fn, args.repeat)
+            medians[label, name] = statistics.median(samples)
+            report[label][name] = summarize_cpu(samples)
+        # 起動直後の組み立ては、標準の描画で組み立て直す場合と比べる
+        drf = medians[label if "drf" in names else "rebuilt", "drf"]
+        report[label]["speedup"] = round(drf / medians[label, "orjson"], 2)
+    use("orjson")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# リクエスト計測（core.metrics.MetricsMiddleware）の有無で各エンドポイントの所要時間を比べる。
+#
+#   python -m benchmarks.metrics --repeat 500
+#
+# seed_six_scenes のデータに対し、ミドルウェアあり/なしの2つのテストクライアントで
+# 同じリクエストを交互に --repeat 回ずつ送り、中央値・p99 と中央値の増分（%）を JSON で出力する。
+# 増分は数十 µs なので実行環境の揺らぎに埋もれやすい。計測そのもののコスト（何もしないビューを
+# 包んだミドルウェアの1リクエスト分と、SQL 1件あたりのラッパー）も別に測って出力する。
+import argparse
+import json
+import statistics
+import time
+
+from ._setup import setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.test import Client
+
+    from core.models import Lesson, Scene
+
+    call_command("seed_six_scenes", verbosity=0)
+    user = User.objects.create_user("bench")
+    scene = Scene.objects.first()
+    lesson = Lesson.objects.first()
+    paths = [
+        "/api/scenes/",
+        f"/api/scenes/{scene.id}/",
+        f"/api/lessons/{lesson.id}/",
+        f"/api/lessons/{lesson.id}/bundle/",
+        "/api/phrases/?page_size=50",
+        "/api/search/?q=review",
+        "/api/progress/my_progress/",
+    ]
+
+    # ミドルウェアは Client の最初のリクエストで読み込まれる
+    enabled = Client()
+    enabled.force_login(user)
+    enabled.get(paths[0])
+    middleware = settings.MIDDLEWARE
+    settings.MIDDLEWARE = [name for name in middleware if name != "core.metrics.MetricsMiddleware"]
+    disabled = Client()
+    disabled.force_login(user)
+    disabled.get(paths[0])
+    settings.MIDDLEWARE = middleware
+
+    results = []
+    for path in paths:
+        samples = {"enabled": [], "disabled": []}
+        for client in (enabled, disabled):
+            # キャッシュを温める
+            assert client.get(path).status_code == 200, path
+        order = [("enabled", enabled), ("disabled", disabled)]
+        for _ in range(args.repeat):
+            # 交互に（先に送る側も入れ替えて）送り、時間変動と順序の影響を揃える
+            order.reverse()
+            for name, client in order:
+                started = time.perf_counter()
+                client.get(path)
+                samples[name].append((time.perf_counter() - started) * 1000)
+        on = statistics.median(samples["enabled"])
+        off = statistics.median(samples["disabled"])
+        results.append(
+            {
+                "path": path,
+                "enabled": summarize(samples["enabled"]),
+                "disabled": summarize(samples["disabled"]),
+                "overhead_percent": round((on - off) / off * 100, 2),
+            }
+        )
+    print(json.dumps({"endpoints": results, "self_cost": self_cost(args.repeat * 20)}, indent=2))
+
+
+def self_cost(repeat):
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.urls import resolve
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.response import Response
+
+    from core.metrics import MetricsMiddleware, RequestMetrics, _current
+
+    request = RequestFactory().get("/api/scenes/")
+    request.resolver_match = resolve("/api/scenes/")
+
+    def view(request):
+        response = Response({"results": []})
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = "application/json"
+        response.renderer_context = {}
+        return response
+
+    def bare(request):
+        return view(request).render()
+
+    def wrapped(request):
+        response = middleware.process_template_response(request, view(request))
+        return response.render()
+
+    middleware = MetricsMiddleware(wrapped)
+    request_us = (
+        statistics.median(timed(lambda: middleware(request), repeat))
+        - statistics.median(timed(lambda: bare(request), repeat))
+    ) * 1000
+
+    with connection.cursor() as cursor:
+        baseline = statistics.median(timed(lambda: cursor.execute("SELECT 1"), repeat))
+        token = _current.set(RequestMetrics())
+        try:
+            measured = statistics.median(timed(lambda: cursor.execute("SELECT 1"), repeat))
+        finally:
+            _current.reset(token)
+    return {
+        "per_request_us": round(request_us, 2),
+        "per_query_us": round((measured - baseline) * 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# my_progress のページングをオフセット方式とキーセット（カーソル）方式で比較する。
+#
+#   python -m benchmarks.pagination --rows 100000 --page-size 50
+#
+# 1ユーザーに --rows 件の UserProgress を作り、各深さのページ取得時間を測る。
+import argparse
+import json
+from datetime import timedelta
+
+from ._setup import setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from rest_framework.pagination import LimitOffsetPagination
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from core.models import Lesson, Scene, UserProgress
+    from core.pagination import KeysetPagination
+
+    user = User.objects.create(username="bench")
+    scene = Scene.objects.create(title="bench")
+    Lesson.objects.bulk_create(
+        [Lesson(scene=scene, title=f"L{i}") for i in range(args.rows)], batch_size=5000
+    )
+    lesson_ids = list(Lesson.objects.values_list("id", flat=True))
+    UserProgress.objects.bulk_create(
+        [UserProgress(user=user, lesson_id=lid, score=lid % 100) for lid in lesson_ids],
+        batch_size=5000,
+    )
+    # 完了日時をばらけさせる（auto_now_add は bulk_create で上書きされるため後から更新）
+    now = timezone.now()
+    rows = list(UserProgress.objects.only("id"))
+    for row in rows:
+        row.completed_at = now - timedelta(seconds=row.id)
+    UserProgress.objects.bulk_update(rows, ["completed_at"], batch_size=5000)
+
+    factory = APIRequestFactory()
+    queryset = UserProgress.objects.filter(user=user)
+    ordering = ("-completed_at", "-id")
+    results = []
+    for depth in (0, 1_000, 10_000, 50_000, args.rows - args.page_size):
+        if depth >= args.rows:
+            continue
+
+        def offset_page():
+            request = Request(
+                factory.get("/", {"limit": args.page_size, "offset": depth})
+            )
+            paginator = LimitOffsetPagination()
+            paginator.paginate_queryset(queryset.order_by(*ordering), request)
+
+        # 深さ depth の直前の行からカーソルを作る（クライアントが next を辿った状態）
+        cursor = None
+        if depth:
+            anchor = queryset.order_by(*ordering)[depth - 1]
+            cursor = KeysetPagination().encode_cursor([anchor.completed_at, anchor.id])
+
+        class View:
+            keyset_ordering = ordering
+
+        def keyset_page():
+            params = {"page_size": args.page_size}
+            if cursor:
+                params["cursor"] = cursor
+            request = Request(factory.get("/", params))
+            KeysetPagination().paginate_queryset(queryset, request, View())
+
+        results.append(
+            {
+                "depth": depth,
+                "offset": summarize(timed(offset_page, args.repeat)),
+                "keyset": summarize(timed(keyset_page, args.repeat)),
+            }
+        )
+
+    print(json.dumps({"rows": args.rows, "page_size": args.page_size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# progress_report の所要時間とピークメモリを、大量の UserProgress で計測する。
+#
+#   python -m benchmarks.progress_report --rows 10000000 --users 200000
+#
+# 一時 SQLite に (user, lesson) が重複しない進捗を --rows 件作り、各レポートを
+# 別プロセスで実行して経過時間・最大 RSS・出力行数を JSON で出力する。
+import argparse
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ._setup import ROOT
+
+
+def child_env(db_path):
+    env = dict(os.environ)
+    env.pop("SQLITE_CATALOG_PATH", None)
+    env.update(
+        {
+            "PYTHONPATH": str(ROOT),
+            "SQLITE_PATH": str(db_path),
+            "DJANGO_SETTINGS_MODULE": "engineer_english.settings",
+        }
+    )
+    return env
+
+
+def generate(db_path, rows, users, scenes, lessons_per_scene):
+    # Django を経由せず sqlite3 で直接投入する（投入時間を計測対象から外すため）
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    now = "2026-01-01 00:00:00"
+    conn.executemany(
+        "INSERT INTO core_scene (title, updated_at) VALUES (?, ?)",
+        [(f"scene-{i}", now) for i in range(scenes)],
+    )
+    scene_ids = [row[0] for row in conn.execute("SELECT id FROM core_scene ORDER BY id")]
+    conn.executemany(
+        "INSERT INTO core_lesson (scene_id, title, description, updated_at) VALUES (?, ?, '', ?)",
+        [(sid, f"lesson-{j}", now) for sid in scene_ids for j in range(lessons_per_scene)],
+    )
+    by_scene = {}
+    for lesson_id, scene_id in conn.execute("SELECT id, scene_id FROM core_lesson ORDER BY id"):
+        by_scene.setdefault(scene_id, []).append(lesson_id)
+    scene_lessons = list(by_scene.values())
+    conn.executemany(
+        "INSERT INTO auth_user (password, is_superuser, username, first_name, last_name, email, "
+        "is_staff, is_active, date_joined) VALUES ('', 0, ?, '', '', '', 0, 1, ?)",
+        ((f"u{i}", now) for i in range(users)),
+    )
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM auth_user ORDER BY id")]
+    per_user = max(1, rows // len(user_ids))
+    rng = random.Random(0)
+
+    def progress():
+        produced = 0
+        for user_id in user_ids:
+            # シーンごとに先頭から途中まで完了する（先頭のレッスンほど完了が多いファネル）
+            for lessons in rng.sample(scene_lessons, rng.randint(1, len(scene_lessons))):
+                count = min(len(lessons), 1 + int(rng.expovariate(1 / max(1, per_user // 4))))
+                for lesson_id in lessons[:count]:
+                    yield (user_id, lesson_id, now, rng.randint(0, 100), rng.randint(10, 1800), now)
+                    produced += 1
+                    if produced >= rows:
+                        return
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO core_userprogress (user_id, lesson_id, completed_at, score, "
+        "time_spent, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+        progress(),
+    )
+    conn.commit()
+    total = conn.execute("SELECT COUNT(*) FROM core_userprogress").fetchone()[0]
+    conn.close()
+    return total
+
+
+def run_report(report, db_path):
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "manage.py", "progress_report", report, "--output", "csv"],
+        cwd=ROOT,
+        env=child_env(db_path),
+        stdout=subprocess.PIPE,
+    )
+    lines = sum(1 for _ in proc.stdout)
+    _pid, status, usage = os.wait4(proc.pid, 0)
+    if status != 0:
+        raise SystemExit(f"progress_report {report} failed")
+    return {
+        "report": report,
+        "seconds": round(time.perf_counter() - started, 2),
+        "max_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "rows": lines - 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--scenes", type=int, default=20)
+    parser.add_argument("--lessons-per-scene", type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp(prefix="ee-report-")) / "report.sqlite3"
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--noinput", "-v", "0"],
+        cwd=ROOT, env=child_env(db_path), check=True,
+    )
+    started = time.perf_counter()
+    total = generate(db_path, args.rows, args.users, args.scenes, args.lessons_per_scene)
+    results = {
+        "progress_rows": total,
+        "generate_seconds": round(time.perf_counter() - started, 1),
+        "reports": [run_report(report, db_path) for report in ("lessons", "scenes", "funnel")],
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
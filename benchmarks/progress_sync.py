@@ -0,0 +1,72 @@
+# POST /api/progress/sync/ の所要時間を計測する（目標: 500件で 100ms 未満, SQLite）。
+#
+#   python -m benchmarks.progress_sync --records 500 --repeat 20
+#
+# 毎回新しい冪等キーで --records 件を送る場合（fresh）と、同じリクエストを再送する場合
+# （replay: すべて適用済み）の中央値/p99 を JSON で出力する。
+import argparse
+import json
+import random
+
+from ._setup import setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--lessons", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from core.models import Lesson, Scene
+
+    scene = Scene.objects.create(title="bench")
+    Lesson.objects.bulk_create(
+        [Lesson(scene=scene, title=f"L{i}", description="") for i in range(args.lessons)]
+    )
+    lesson_ids = list(Lesson.objects.values_list("id", flat=True))
+    client = Client()
+    client.force_login(User.objects.create(username="bench"))
+    rng = random.Random(0)
+    batch = iter(range(10**9))
+
+    def payload():
+        n = next(batch)
+        return {
+            "records": [
+                {
+                    "idempotency_key": f"{n}-{i}",
+                    "lesson_id": rng.choice(lesson_ids),
+                    "score": rng.randint(0, 100),
+                    "time_spent": rng.randint(10, 600),
+                    "client_ts": f"2026-01-{1 + i % 28:02d}T09:00:00Z",
+                }
+                for i in range(args.records)
+            ]
+        }
+
+    def post(body):
+        response = client.post("/api/progress/sync/", body, content_type="application/json")
+        assert response.status_code == 200, response.status_code
+
+    # 初回リクエストの初期化コストを除く
+    post(payload())
+    bodies = [payload() for _ in range(args.repeat)]
+    pending = iter(bodies)
+    fresh = timed(lambda: post(next(pending)), args.repeat)
+    replay = timed(lambda: post(bodies[0]), args.repeat)
+    print(
+        json.dumps(
+            {"records": args.records, "fresh": summarize(fresh), "replay": summarize(replay)},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
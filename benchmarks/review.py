@@ -0,0 +1,101 @@
+# review/answer と review/next の所要時間を計測する（SQLite）。
+#
+#   python -m benchmarks.review --cards 1000 --users 200 --repeat 10
+#
+# --users 人がそれぞれ --cards 枚のカードを持つデッキを作り、1人のデッキ全体への回答を
+# 1リクエスト（1パスの計算 + 1回の upsert）で送る場合と、カードごとに ORM で save する
+# 場合、期限切れカードの取得（review/next）の中央値/p99 を JSON で出力する。
+import argparse
+import json
+import random
+from datetime import timedelta
+
+from ._setup import setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from django.test import Client
+    from django.utils import timezone
+
+    from core.models import Lesson, Phrase, PhraseReviewState, Scene
+    from core.review import _apply
+
+    scene = Scene.objects.create(title="bench")
+    lesson = Lesson.objects.create(scene=scene, title="bench")
+    Phrase.objects.bulk_create(
+        [
+            Phrase(scene=scene, lesson=lesson, text_en=f"en {i}", text_ja=f"ja {i}")
+            for i in range(args.cards)
+        ]
+    )
+    phrase_ids = list(Phrase.objects.values_list("id", flat=True))
+    users = User.objects.bulk_create(
+        [User(username=f"bench{i}") for i in range(args.users)]
+    )
+    now = timezone.now()
+    rng = random.Random(0)
+    # 他のユーザーのカードも入れて (user, due_at) 索引の効果が出るようにする
+    PhraseReviewState.objects.bulk_create(
+        [
+            PhraseReviewState(
+                user=user,
+                phrase_id=phrase_id,
+                interval=rng.randint(1, 30),
+                repetitions=rng.randint(1, 5),
+                due_at=now + timedelta(days=rng.randint(-10, 30)),
+                last_reviewed_at=now - timedelta(days=1),
+            )
+            for user in users
+            for phrase_id in phrase_ids
+        ],
+        batch_size=2000,
+    )
+    user = users[0]
+    client = Client()
+    client.force_login(user)
+
+    def answers():
+        return [{"phrase_id": pid, "grade": rng.randint(0, 5)} for pid in phrase_ids]
+
+    def post():
+        response = client.post(
+            "/api/review/answer/", {"answers": answers()}, content_type="application/json"
+        )
+        assert response.status_code == 200, response.status_code
+
+    def per_card_save():
+        # 比較用: カードごとに読み込み・計算・save する
+        with transaction.atomic():
+            for answer in answers():
+                state = PhraseReviewState.objects.get(user=user, phrase_id=answer["phrase_id"])
+                _apply(state, answer["grade"], timezone.now())
+                state.save()
+
+    def get_next():
+        response = client.get("/api/review/next/", {"limit": 20})
+        assert response.status_code == 200, response.status_code
+
+    # 初回リクエストの初期化コストを除く
+    post()
+    results = {
+        "cards_per_user": args.cards,
+        "state_rows": PhraseReviewState.objects.count(),
+        "answer_batch": summarize(timed(post, args.repeat)),
+        "answer_per_card_save": summarize(timed(per_card_save, max(1, args.repeat // 5))),
+        "next": summarize(timed(get_next, args.repeat * 5)),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# ロールプレイの WebSocket（ws/roleplay/<scene_id>/）に同時接続を張り続けて計測する。
+#
+#   python -m benchmarks.roleplay --connections 1000 --messages 3
+#
+# 1プロセス内で ASGI アプリケーション（engineer_english.asgi）に --connections 本の
+# WebSocket を同時に接続し、全接続を開いたまま各接続から --messages 通を送って、
+# 最初のトークンまでの時間・返信完了までの時間（中央値/p99）と最大 RSS を JSON で出力する。
+# ネットワーク（uvicorn の TCP 処理）は含まず、consumer と生成器のコストだけを測る。
+# --timeout は計測全体のタイムアウト（秒）。
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+from ._setup import percentile, setup_django
+
+
+class Socket:
+    # asgiref の ApplicationCommunicator で WebSocket の接続を模擬する
+    def __init__(self, application, path):
+        from asgiref.testing import ApplicationCommunicator
+
+        scope = {
+            "type": "websocket",
+            "path": path,
+            "headers": [],
+            "subprotocols": [],
+            "query_string": b"",
+        }
+        self.communicator = ApplicationCommunicator(application, scope)
+
+    async def connect(self):
+        await self.communicator.send_input({"type": "websocket.connect"})
+        message = await self.communicator.output_queue.get()
+        return message["type"] == "websocket.accept"
+
+    async def send(self, data):
+        await self.communicator.send_input({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive(self):
+        # receive_output(timeout) はメッセージごとにタイマーを作り計測側の負荷が大きいため、
+        # キューから直接受け取る（タイムアウトは計測全体にかける）
+        message = await self.communicator.output_queue.get()
+        return json.loads(message["text"])
+
+    async def close(self):
+        await self.communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await self.communicator.wait(5)
+
+
+async def reply(socket):
+    # start から done までを受け取り、(最初のトークンまで, 完了まで) の秒数を返す
+    started = time.perf_counter()
+    first = None
+    while True:
+        event = await socket.receive()
+        if event["type"] == "token" and first is None:
+            first = time.perf_counter() - started
+        if event["type"] == "done":
+            return first, time.perf_counter() - started
+        if event["type"] == "error":
+            raise RuntimeError(event)
+
+
+async def client(application, path, messages, opened, release, stats):
+    socket = Socket(application, path)
+    if not await socket.connect():
+        raise RuntimeError("connection rejected")
+    await reply(socket)
+    opened.release()
+    # 全接続が開くまで待ってから送信を始める
+    await release.wait()
+    for index in range(messages):
+        await socket.send({"type": "message", "content": f"message {index}"})
+        first, total = await reply(socket)
+        stats["first_token"].append(first * 1000)
+        stats["reply"].append(total * 1000)
+    return socket
+
+
+async def run(connections, messages):
+    from engineer_english.asgi import application
+
+    from core.models import Scene
+
+    scene = await Scene.objects.afirst()
+    path = f"/ws/roleplay/{scene.id}/"
+    opened = asyncio.Semaphore(0)
+    release = asyncio.Event()
+    stats = {"first_token": [], "reply": []}
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(client(application, path, messages, opened, release, stats))
+        for _ in range(connections)
+    ]
+    for _ in range(connections):
+        await opened.acquire()
+    connect_seconds = time.perf_counter() - started
+    rss_open = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    started = time.perf_counter()
+    release.set()
+    sockets = await asyncio.gather(*tasks)
+    message_seconds = time.perf_counter() - started
+    await asyncio.gather(*(socket.close() for socket in sockets))
+
+    def summary(samples):
+        return {
+            "median_ms": round(percentile(samples, 50), 1),
+            "p99_ms": round(percentile(samples, 99), 1),
+        }
+
+    return {
+        "connections": connections,
+        "connect_seconds": round(connect_seconds, 2),
+        "max_rss_mb_all_open": round(rss_open, 1),
+        "messages": len(stats["reply"]),
+        "messages_per_second": round(len(stats["reply"]) / message_seconds, 1),
+        "first_token": summary(stats["first_token"]),
+        "reply": summary(stats["reply"]),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=3)
+    parser.add_argument("--token-interval-ms", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+
+    from core.models import Dialogue, Scene
+
+    settings.ROLEPLAY_TOKEN_INTERVAL_MS = args.token_interval_ms
+    scene = Scene.objects.create(title="bench")
+    Dialogue.objects.bulk_create(
+        [
+            Dialogue(
+                scene=scene,
+                speaker="PM" if i % 2 == 0 else "Dev",
+                line_en=f"Line {i}: could you walk me through the release plan for this sprint?",
+                line_ja=f"{i}: 今スプリントのリリース計画を説明してもらえますか？",
+                order=i,
+            )
+            for i in range(10)
+        ]
+    )
+    result = asyncio.run(asyncio.wait_for(run(args.connections, args.messages), args.timeout))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# /api/search/ の検索処理の所要時間を計測する（目標: 100万行で 20ms 未満, SQLite）。
+#
+#   python -m benchmarks.search --rows 1000000 --repeat 50
+#
+# 一時 SQLite にフレーズ・対話を合わせて --rows 件投入して索引を作り、
+# まれな語・ヒットの多い語（英語・日本語・複数語）で FTS5 検索（search_objects）と
+# 索引なしの部分一致（icontains）の中央値/p99 を JSON で出力する。
+import argparse
+import json
+import random
+import sqlite3
+import time
+
+from ._setup import setup_django, summarize, timed
+
+EN_WORDS = (
+    "deploy release review latency budget incident schedule requirement database cache "
+    "rollback feature migration estimate stakeholder meeting design test coverage issue"
+).split()
+JA_WORDS = (
+    "デプロイ リリース レビュー 遅延 予算 障害 日程 要件 データベース キャッシュ "
+    "切り戻し 機能 移行 見積もり 関係者 会議 設計 テスト 網羅 課題"
+).split()
+# 一部の行（RARE_RATE）にだけ現れる語。bm25 で順位付けされる経路を計測する
+RARE_WORDS = ("kubernetes", "監視基盤")
+RARE_RATE = 0.0005
+QUERIES = ("kubernetes", "監視基盤", "rollback", "レビュー", "database cache", "データベース 移行", "requirement", "qzxv")
+
+
+def generate(db_path, rows):
+    # Django を経由せず sqlite3 で直接投入する（投入時間を計測対象から外すため）
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous = OFF")
+    now = "2026-01-01 00:00:00"
+    scenes = 100
+    conn.executemany(
+        "INSERT INTO core_scene (title, updated_at) VALUES (?, ?)",
+        [(f"scene-{i}", now) for i in range(scenes)],
+    )
+    scene_ids = [row[0] for row in conn.execute("SELECT id FROM core_scene ORDER BY id")]
+    rng = random.Random(0)
+
+    def sentence():
+        en = [rng.choice(EN_WORDS) for _ in range(rng.randint(4, 10))]
+        ja = [rng.choice(JA_WORDS) for _ in range(rng.randint(3, 6))]
+        if rng.random() < RARE_RATE:
+            en.append(RARE_WORDS[0])
+            ja.append(RARE_WORDS[1])
+        return " ".join(en), "、".join(ja) + "。"
+        return en, ja
+
+    conn.executemany(
+        "INSERT INTO core_phrase (scene_id, text_en, text_ja, note, updated_at) "
+        "VALUES (?, ?, ?, '', ?)",
+        ((rng.choice(scene_ids), *sentence(), now) for _ in range(rows // 2)),
+    )
+    conn.executemany(
+        "INSERT INTO core_dialogue (scene_id, speaker, line_en, line_ja, \"order\", updated_at) "
+        "VALUES (?, 'A', ?, ?, ?, ?)",
+        ((rng.choice(scene_ids), *sentence(), i, now) for i in range(rows - rows // 2)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--scan-repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from django.db import connection, transaction
+
+    from core.search import _fallback_hits, reindex, search_objects
+
+    connection.close()
+    generate(db_path, args.rows)
+    started = time.perf_counter()
+    with transaction.atomic():
+        reindex()
+    index_seconds = round(time.perf_counter() - started, 1)
+
+    results = {"rows": args.rows, "index_seconds": index_seconds, "queries": {}}
+    for q in QUERIES:
+        # 初回のページ読み込みを除く
+        hits = search_objects(q)
+        results["queries"][q] = {
+            "hits": len(hits),
+            "fts": summarize(timed(lambda: search_objects(q), args.repeat)),
+            "icontains": summarize(
+                timed(lambda: _fallback_hits(q.split(), 20), args.scan_repeat)
+            ),
+        }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# SQLite の接続設定（PRAGMA・永続接続）ごとに、同時書き込み + 読み取りのスループットを比較する。
+#
+#   python -m benchmarks.sqlite_concurrency --writers 4 --readers 8 --duration 10
+#
+# 同じ DB に対して writer プロセス（complete_lesson を POST）と reader プロセス
+# （my_progress と bundle を GET）を同時に走らせ、プロファイルごとに
+# 秒間リクエスト数・p50/p99・"database is locked" の件数・書き込み SQL の所要時間
+# （ロック待ちを含む）を JSON で出力する。
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ._setup import ROOT, percentile
+
+PROFILES = {
+    # 以前の構成: rollback journal, synchronous=FULL, リクエストごとに接続, DEFERRED
+    "baseline": {"SQLITE_TUNING": "False", "DB_CONN_MAX_AGE": "0", "SQLITE_TRANSACTION_MODE": ""},
+    # 既定: WAL, synchronous=NORMAL, busy_timeout, temp_store, mmap, 永続接続, IMMEDIATE
+    "tuned": {},
+    "tuned_deferred": {"SQLITE_TRANSACTION_MODE": ""},
+}
+
+
+def child_env(db_path, **extra):
+    env = dict(os.environ)
+    for name in ("SQLITE_TUNING", "DB_CONN_MAX_AGE", "SQLITE_TRANSACTION_MODE", "SQLITE_CATALOG_PATH"):
+        env.pop(name, None)
+    env.update(
+        {
+            "PYTHONPATH": str(ROOT),
+            "SQLITE_PATH": str(db_path),
+            "DJANGO_SETTINGS_MODULE": "engineer_english.settings",
+            "DJANGO_ALLOWED_HOSTS": "testserver,localhost",
+            "CATALOG_CACHE_BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        }
+    )
+    env.update(extra)
+    return env
+
+
+def prepare(users):
+    from ._setup import setup_django
+
+    setup_django(db_path=os.environ["SQLITE_PATH"])
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    call_command("seed_six_scenes", verbosity=0)
+    User.objects.bulk_create([User(username=f"bench-{i}") for i in range(users)])
+
+
+def worker(role, index, start_at, duration):
+    import django
+
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+
+    from core.models import Lesson
+
+    write_sql = []
+
+    def track_writes(execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() == "SELECT":
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            write_sql.append((time.perf_counter() - started) * 1000)
+
+    lesson_ids = list(Lesson.objects.values_list("id", flat=True))
+    client = Client()
+    client.force_login(User.objects.get(username=f"bench-{index}"))
+    rng = random.Random(index)
+
+    def request():
+        lesson_id = rng.choice(lesson_ids)
+        if role == "writer":
+            return client.post(
+                "/api/progress/complete_lesson/",
+                {"lesson_id": lesson_id, "score": rng.randint(0, 100), "time_spent": 30},
+                content_type="application/json",
+            )
+        if rng.random() < 0.5:
+            return client.get("/api/progress/my_progress/")
+        return client.get(f"/api/lessons/{lesson_id}/bundle/")
+
+    latencies = []
+    locked = 0
+    time.sleep(max(0, start_at - time.time()))
+    deadline = time.perf_counter() + duration
+    with connection.execute_wrapper(track_writes):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = request()
+                ok = response.status_code < 500
+            except Exception as exc:
+                if "locked" not in str(exc):
+                    raise
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                locked += 1
+    print(json.dumps({"latencies": latencies, "locked": locked, "write_sql_ms": sum(write_sql)}))
+
+
+def run_profile(label, extra, args, workdir):
+    db_path = workdir / f"{label}.sqlite3"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.sqlite_concurrency", "--child", "prepare",
+         "--users", str(args.writers + args.readers)],
+        cwd=ROOT, env=child_env(db_path, **extra), check=True,
+    )
+    # 全プロセスの Django 起動を待ってから同時に開始する
+    start_at = time.time() + args.startup_grace
+    roles = ["writer"] * args.writers + ["reader"] * args.readers
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.sqlite_concurrency", "--child", role,
+             "--index", str(i), "--start-at", str(start_at), "--duration", str(args.duration)],
+            cwd=ROOT, env=child_env(db_path, **extra), stdout=subprocess.PIPE, text=True,
+        )
+        for i, role in enumerate(roles)
+    ]
+    results = {"writer": [], "reader": []}
+    for role, proc in zip(roles, procs):
+        out, _ = proc.communicate()
+        if proc.returncode != 0:
+            raise SystemExit(f"{role} process failed")
+        results[role].append(json.loads(out.strip().splitlines()[-1]))
+
+    report = {"profile": label}
+    for role, items in results.items():
+        latencies = [ms for item in items for ms in item["latencies"]]
+        report[role] = {
+            "processes": len(items),
+            "requests_per_s": round(len(latencies) / args.duration, 1),
+            "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+            "locked_errors": sum(item["locked"] for item in items),
+            "write_sql_ms": round(sum(item["write_sql_ms"] for item in items), 1),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--startup-grace", type=float, default=5.0)
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--child", choices=["prepare", "writer", "reader"])
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--index", type=int)
+    parser.add_argument("--start-at", type=float)
+    args = parser.parse_args()
+
+    if args.child == "prepare":
+        return prepare(args.users)
+    if args.child:
+        return worker(args.child, args.index, args.start_at, args.duration)
+
+    workdir = Path(tempfile.mkdtemp(prefix="ee-concurrency-"))
+    reports = [run_profile(name, PROFILES[name], args, workdir) for name in args.profiles]
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# Lambda の読み取り構成を比較する: seed_db を /tmp へコピーして読む（copy）か、
+# イメージ内の seed_db を mode=ro&immutable=1 で直接読む（readonly, SQLITE_CATALOG_PATH）か。
+#
+#   python -m benchmarks.sqlite_readonly --scenes 200 --runs 5 --repeat 200
+#
+# seed_db（six_scenes + 合成シーン）と書き込み用 state DB を作り、各構成を別プロセスで起動して
+# コールドスタート（コピー + django.setup + 初回リクエスト）とシーン詳細・bundle の
+# 中央値/p99 を計測する。カタログキャッシュは無効化して DB の読み取りだけを測る。
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ._setup import ROOT, summarize, timed
+
+
+def child_env(**extra):
+    env = dict(os.environ)
+    env.update(
+        {
+            "PYTHONPATH": str(ROOT),
+            "DJANGO_SETTINGS_MODULE": "engineer_english.settings",
+            "DJANGO_ALLOWED_HOSTS": "testserver,localhost",
+            "CATALOG_CACHE_BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        }
+    )
+    env.pop("SQLITE_CATALOG_PATH", None)
+    env.update(extra)
+    return env
+
+
+def run_child(args, env):
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.sqlite_readonly", *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1]) if proc.stdout.strip() else None
+
+
+def build_seed(scenes, lessons, phrases):
+    from ._setup import setup_django
+
+    setup_django(db_path=os.environ["SQLITE_PATH"])
+
+    from django.core.management import call_command
+
+    from core.models import Dialogue, Lesson, Phrase, Scene
+
+    call_command("seed_six_scenes", verbosity=0)
+    created = Scene.objects.bulk_create([Scene(title=f"bench-{i}") for i in range(scenes)])
+    Lesson.objects.bulk_create(
+        [Lesson(scene=s, title=f"L{j}", description="") for s in created for j in range(lessons)],
+        batch_size=2000,
+    )
+    rows = []
+    dialogues = []
+    for lesson in Lesson.objects.filter(scene__in=created):
+        for k in range(phrases):
+            rows.append(
+                Phrase(scene_id=lesson.scene_id, lesson=lesson, text_en=f"p{lesson.id}-{k}", text_ja="訳")
+            )
+            dialogues.append(
+                Dialogue(
+                    scene_id=lesson.scene_id,
+                    lesson=lesson,
+                    speaker="A",
+                    line_en=f"d{lesson.id}-{k}",
+                    line_ja="訳",
+                    order=k,
+                )
+            )
+    Phrase.objects.bulk_create(rows, batch_size=5000)
+    Dialogue.objects.bulk_create(dialogues, batch_size=5000)
+    print(json.dumps({"lesson_ids": list(Lesson.objects.values_list("id", flat=True))}))
+
+
+def build_state():
+    from ._setup import setup_django
+
+    setup_django(db_path=os.environ["SQLITE_PATH"])
+    print(json.dumps({}))
+
+
+def measure(source, repeat, scene_id, lesson_id):
+    # source を /tmp 相当へコピーするところから計測する（lambda.py の初期化と同じ順序）
+    started = time.perf_counter()
+    shutil.copy(source, os.environ["SQLITE_PATH"])
+    copy_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    import django
+
+    django.setup(set_prefix=False)
+    setup_ms = (time.perf_counter() - started) * 1000
+
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    client = Client()
+    started = time.perf_counter()
+    response = client.get(f"/api/scenes/{scene_id}/")
+    first_ms = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, response.status_code
+
+    # セッション・ユーザーは書き込み側（default）に作られる
+    user = User.objects.create(username="bench")
+    client.force_login(user)
+    scene = timed(lambda: client.get(f"/api/scenes/{scene_id}/"), repeat)
+    bundle = timed(lambda: client.get(f"/api/lessons/{lesson_id}/bundle/"), repeat)
+    print(
+        json.dumps(
+            {
+                "copy_ms": copy_ms,
+                "setup_ms": setup_ms,
+                "first_request_ms": first_ms,
+                "scene_detail": summarize(scene),
+                "bundle": summarize(bundle),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type=int, default=200)
+    parser.add_argument("--lessons", type=int, default=10)
+    parser.add_argument("--phrases", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--child", choices=["seed", "state", "measure"])
+    parser.add_argument("--source")
+    parser.add_argument("--scene-id", type=int)
+    parser.add_argument("--lesson-id", type=int)
+    args = parser.parse_args()
+
+    if args.child == "seed":
+        return build_seed(args.scenes, args.lessons, args.phrases)
+    if args.child == "state":
+        return build_state()
+    if args.child == "measure":
+        return measure(args.source, args.repeat, args.scene_id, args.lesson_id)
+
+    workdir = Path(tempfile.mkdtemp(prefix="ee-readonly-"))
+    seed = workdir / "seed_db.sqlite3"
+    state = workdir / "state_seed.sqlite3"
+    built = run_child(
+        ["--child", "seed", "--scenes", str(args.scenes), "--lessons", str(args.lessons),
+         "--phrases", str(args.phrases)],
+        child_env(SQLITE_PATH=str(seed)),
+    )
+    run_child(["--child", "state"], child_env(SQLITE_PATH=str(state)))
+    lesson_id = built["lesson_ids"][-1]
+
+    import sqlite3
+
+    with sqlite3.connect(seed) as conn:
+        scene_id = conn.execute("SELECT scene_id FROM core_lesson WHERE id = ?", (lesson_id,)).fetchone()[0]
+
+    modes = {
+        "copy": (seed, {}),
+        "readonly": (state, {"SQLITE_CATALOG_PATH": str(seed)}),
+    }
+    results = []
+    for label, (source, extra) in modes.items():
+        runs = []
+        for i in range(args.runs):
+            tmp = workdir / f"{label}-{i}.sqlite3"
+            runs.append(
+                run_child(
+                    ["--child", "measure", "--source", str(source), "--repeat", str(args.repeat),
+                     "--scene-id", str(scene_id), "--lesson-id", str(lesson_id)],
+                    child_env(SQLITE_PATH=str(tmp), **extra),
+                )
+            )
+            tmp.unlink()
+
+        def median(key, sub=None):
+            values = [r[key][sub] if sub else r[key] for r in runs]
+            return round(statistics.median(values), 3)
+
+        results.append(
+            {
+                "mode": label,
+                "copied_bytes": source.stat().st_size,
+                "copy_ms": median("copy_ms"),
+                "setup_ms": median("setup_ms"),
+                "first_request_ms": median("first_request_ms"),
+                "cold_start_ms": round(
+                    statistics.median(
+                        r["copy_ms"] + r["setup_ms"] + r["first_request_ms"] for r in runs
+                    ),
+                    3,
+                ),
+                "scene_detail": {k: median("scene_detail", k) for k in ("median_ms", "p99_ms")},
+                "bundle": {k: median("bundle", k) for k in ("median_ms", "p99_ms")},
+            }
+        )
+    shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
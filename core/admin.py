@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Scene, Phrase, Dialogue, Lesson, UserProgress
+from .models import Scene, Phrase, Dialogue, Lesson, UserProgress, ContentPack, PhraseReviewState
 
 admin.site.register(Scene)
 admin.site.register(Phrase)
@@ -7,9 +7,22 @@ admin.site.register(Dialogue)
 admin.site.register(Lesson)
 
 
+@admin.register(ContentPack)
+class ContentPackAdmin(admin.ModelAdmin):
+    list_display = ["name", "checksum", "imported_at"]
+    readonly_fields = ["imported_at"]
+
+
 @admin.register(UserProgress)
 class UserProgressAdmin(admin.ModelAdmin):
     list_display = ["user", "lesson", "completed_at", "score", "time_spent"]
     list_filter = ["completed_at", "score"]
     search_fields = ["user__username", "lesson__title"]
     readonly_fields = ["completed_at"]
+
+
+@admin.register(PhraseReviewState)
+class PhraseReviewStateAdmin(admin.ModelAdmin):
+    list_display = ["user", "phrase", "ease", "interval", "repetitions", "lapses", "due_at"]
+    list_filter = ["due_at"]
+    search_fields = ["user__username"]
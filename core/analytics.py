@@ -0,0 +1,191 @@
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, router
+
+from .models import Lesson, Scene, UserProgress
+
+# 進捗の分析レポート（progress_report コマンドと /api/reports/progress/ で共有）。
+# 集計・パーセンタイル・ファネルはすべて DB 側の集約とウィンドウ関数で計算し、
+# 結果の行（レッスン数・シーン数に比例）だけをカーソルから順に取り出して出力する。
+
+REPORTS = ("lessons", "scenes", "funnel")
+PERCENTILES = (50, 90)
+FETCH_SIZE = 500
+
+
+def _rank(p, n):
+    # nearest-rank 法の順位 ceil(p/100 * n) を整数演算で（SQLite / Postgres 共通）
+    return f"({p} * {n} + 99) / 100"
+
+
+def _stats_columns(partition, users=False):
+    # score / time_spent の件数・平均・パーセンタイルを求める列（ranked CTE に対して使う）
+    columns = ["MAX(n) AS completions"]
+    if users:
+        columns.append("COUNT(DISTINCT user_id) AS users")
+    columns += [
+        "AVG(score) AS score_avg",
+        "AVG(time_spent) AS time_avg",
+    ]
+    for p in PERCENTILES:
+        columns.append(f"MAX(CASE WHEN score_rn = {_rank(p, 'n')} THEN score END) AS score_p{p}")
+    for p in PERCENTILES:
+        columns.append(
+            f"MAX(CASE WHEN time_rn = {_rank(p, 'n')} THEN time_spent END) AS time_p{p}"
+        )
+    ranked = (
+        f"ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY p.score) AS score_rn, "
+        f"ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY p.time_spent) AS time_rn, "
+        f"COUNT(*) OVER (PARTITION BY {partition}) AS n"
+    )
+    return ", ".join(columns), ranked
+
+
+def _lessons_sql(progress, lessons):
+    columns, ranked = _stats_columns("p.lesson_id")
+    return (
+        f"WITH ranked AS (SELECT p.lesson_id, l.scene_id, p.score, p.time_spent, {ranked} "
+        f"FROM {progress} p JOIN {lessons} l ON l.id = p.lesson_id) "
+        f"SELECT scene_id, lesson_id, {columns} FROM ranked "
+        "GROUP BY scene_id, lesson_id ORDER BY scene_id, lesson_id"
+    )
+
+
+def _scenes_sql(progress, lessons):
+    columns, ranked = _stats_columns("l.scene_id", users=True)
+    return (
+        f"WITH ranked AS (SELECT l.scene_id, p.user_id, p.score, p.time_spent, {ranked} "
+        f"FROM {progress} p JOIN {lessons} l ON l.id = p.lesson_id) "
+        f"SELECT scene_id, {columns} FROM ranked GROUP BY scene_id ORDER BY scene_id"
+    )
+
+
+def _funnel_sql(progress, lessons):
+    # シーン内のレッスンを id 順に並べ、1番目から順に途切れず完了したユーザー数を数える。
+    # ユーザーごとに完了したレッスンを順番で並べた行番号が順番と一致すれば、それまでを全て完了している
+    return (
+        "WITH ordered AS (SELECT id, scene_id, "
+        f"ROW_NUMBER() OVER (PARTITION BY scene_id ORDER BY id) AS position FROM {lessons}), "
+        "steps AS (SELECT o.id AS lesson_id, o.position, "
+        "ROW_NUMBER() OVER (PARTITION BY p.user_id, o.scene_id ORDER BY o.position) AS rn "
+        f"FROM {progress} p JOIN ordered o ON o.id = p.lesson_id) "
+        "SELECT o.scene_id, o.position, o.id AS lesson_id, COUNT(s.lesson_id) AS completed, "
+        "COALESCE(SUM(CASE WHEN s.rn = s.position THEN 1 ELSE 0 END), 0) AS reached "
+        "FROM ordered o LEFT JOIN steps s ON s.lesson_id = o.id "
+        "GROUP BY o.scene_id, o.position, o.id ORDER BY o.scene_id, o.position"
+    )
+
+
+SQL_BUILDERS = {"lessons": _lessons_sql, "scenes": _scenes_sql, "funnel": _funnel_sql}
+
+
+@contextmanager
+def _report_cursor():
+    using = router.db_for_read(UserProgress)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    lessons = quote(Lesson._meta.db_table)
+    restore = None
+    with connection.cursor() as cursor:
+        if router.db_for_read(Lesson) != using:
+            # 読み取り専用カタログ構成: カタログの SQLite を ATTACH して同じ SQL で結合する
+            cursor.execute("PRAGMA database_list")
+            if "catalog" not in [row[1] for row in cursor.fetchall()]:
+                cursor.execute(
+                    "ATTACH DATABASE %s AS catalog", [settings.DATABASES["catalog"]["NAME"]]
+                )
+            lessons = f"catalog.{lessons}"
+        if connection.vendor == "sqlite":
+            # 並べ替えの一時領域をメモリではなくファイルにして、行数が多くてもメモリを抑える
+            cursor.execute("PRAGMA temp_store")
+            restore = cursor.fetchone()[0]
+            cursor.execute("PRAGMA temp_store = FILE")
+        try:
+            yield cursor, quote(UserProgress._meta.db_table), lessons
+        finally:
+            if restore is not None:
+                cursor.execute(f"PRAGMA temp_store = {int(restore)}")
+
+
+def iter_report(report):
+    # レポートの行を dict で1件ずつ返す（タイトルはカタログから引いて付与する）
+    lesson_titles = dict(Lesson.objects.values_list("id", "title"))
+    scene_titles = dict(Scene.objects.values_list("id", "title"))
+    with _report_cursor() as (cursor, progress, lessons):
+        cursor.execute(SQL_BUILDERS[report](progress, lessons))
+        names = [col[0] for col in cursor.description]
+        first_step = {}
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for values in rows:
+                row = dict(zip(names, values))
+                for name in ("score_avg", "time_avg"):
+                    if row.get(name) is not None:
+                        row[name] = round(float(row[name]), 2)
+                if report == "funnel":
+                    # 1番目のレッスンを完了したユーザーに対する割合
+                    base = first_step.setdefault(row["scene_id"], row["reached"])
+                    row["conversion"] = round(row["reached"] / base, 4) if base else 0.0
+                out = {"scene_id": row.pop("scene_id")}
+                out["scene_title"] = scene_titles.get(out["scene_id"], "")
+                if "lesson_id" in row:
+                    out["lesson_id"] = row.pop("lesson_id")
+                    out["lesson_title"] = lesson_titles.get(out["lesson_id"], "")
+                out.update(row)
+                yield out
+
+
+class _Echo:
+    # csv.writer の出力をそのまま返す（StreamingHttpResponse 用）
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    header = None
+    for row in rows:
+        if header is None:
+            header = list(row)
+            yield writer.writerow(header)
+        yield writer.writerow([row[name] for name in header])
+
+
+def stream_json(rows):
+    yield "["
+    for index, row in enumerate(rows):
+        yield ("," if index else "") + "\n" + json.dumps(row, ensure_ascii=False)
+    yield "\n]\n"
+
+
+FORMATS = {"csv": (stream_csv, "text/csv"), "json": (stream_json, "application/json")}
+
+
+async def aiter_chunks(chunks, batch=FETCH_SIZE):
+    # ASGI 用: 同期のイテレータ（DB カーソルを使う）を batch 件ずつスレッドで進めて流す。
+    # ASGI の StreamingHttpResponse は同期イテレータを全件リストにしてから送るため。
+    # スレッドはリクエストごとに同じもの（thread_sensitive）なので、カーソルも同じ接続のまま
+    iterator = iter(chunks)
+
+    def take():
+        return list(islice(iterator, batch))
+
+    try:
+        while True:
+            items = await sync_to_async(take)()
+            if not items:
+                break
+            for item in items:
+                yield item
+    finally:
+        # 途中で切断されたときもカーソルを閉じる
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .db import apply_sqlite_pragmas
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="core_sqlite_pragmas")
+        if settings.METRICS_ENABLED:
+            from .metrics import install_sql_wrapper
+
+            connection_created.connect(install_sql_wrapper, dispatch_uid="core_sql_metrics")
@@ -0,0 +1,132 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern
+from django.utils.cache import cc_delim_re, patch_vary_headers
+from rest_framework.exceptions import APIException, NotAcceptable
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from .metrics import render_timed
+
+# 読み取りアクションの async 版。ViewSet に a<アクション名>（alist、abundle など）の
+# コルーチンメソッドがあれば、ASGI ではスレッドに渡さずイベントループ上で処理する
+# （SQL は async ORM 経由で、キャッシュ済みなら DB にもスレッドにも行かない）。
+# 書き込み・?format= やブラウザ表示の API・Basic 認証の要求は元の同期ビューに回す。
+
+# DRF の例外処理（handle_exception）でそのまま応答にするもの（404 など）。
+# それ以外の例外は async 側の不具合なので同期ビューでやり直さずに送出する
+HANDLED_ERRORS = (APIException, Http404, ObjectDoesNotExist)
+
+
+def async_action(callback, method):
+    actions = getattr(callback, "actions", None) or {}
+    action = actions.get(method)
+    if action and hasattr(callback.cls, f"a{action}"):
+        return action
+    return None
+
+
+def async_read_urls(patterns):
+    # ASYNC_READ_VIEWS が有効なら、async のアクションを持つルートのビューを差し替える
+    if not settings.ASYNC_READ_VIEWS:
+        return patterns
+    return [
+        URLPattern(p.pattern, async_read_view(p.callback), p.default_args, p.name)
+        if async_action(p.callback, "get")
+        else p
+        for p in patterns
+    ]
+
+
+def async_read_view(sync_view):
+    @wraps(sync_view)
+    async def view(request, *args, **kwargs):
+        viewset = prepare_viewset(sync_view, request, args, kwargs)
+        if viewset is not None:
+            handler = getattr(viewset, f"a{viewset.action}")
+            try:
+                response = await handler(viewset.request, *args, **kwargs)
+            except HANDLED_ERRORS as exc:
+                if isinstance(exc, ObjectDoesNotExist):
+                    exc = Http404()
+                response = viewset.handle_exception(exc)
+            return finalize_response(viewset, response)
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+    return view
+
+
+async def aget_object_or_404(queryset, **filters):
+    # rest_framework.generics.get_object_or_404 の async 版（数値でない pk なども 404）
+    try:
+        return await queryset.aget(**filters)
+    except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+        raise Http404
+
+
+def prepare_viewset(sync_view, request, args, kwargs):
+    # as_view() のビュー関数と APIView.initial() と同じ手順で ViewSet を用意する（認証はしない）
+    if request.method not in ("GET", "HEAD") or kwargs.get("format"):
+        return None
+    if "HTTP_AUTHORIZATION" in request.META:
+        return None
+    action = async_action(sync_view, "get")
+    if action is None:
+        return None
+    viewset = sync_view.cls(**sync_view.initkwargs)
+    viewset.action_map = {**sync_view.actions, "head": action}
+    for method, name in viewset.action_map.items():
+        setattr(viewset, method, getattr(viewset, name))
+    viewset.args = args
+    viewset.kwargs = kwargs
+    viewset.request = viewset.initialize_request(request, *args, **kwargs)
+    viewset.format_kwarg = None
+    viewset.headers = viewset.default_response_headers
+    try:
+        renderer, media_type = viewset.perform_content_negotiation(viewset.request)
+    except NotAcceptable:
+        return None
+    if renderer.format != "json" or viewset.get_throttles():
+        return None
+    if not all(isinstance(p, AllowAny) for p in viewset.get_permissions()):
+        return None
+    drf_request = viewset.request
+    drf_request.accepted_renderer = renderer
+    drf_request.accepted_media_type = media_type
+    drf_request.version, drf_request.versioning_scheme = viewset.determine_version(
+        drf_request, *args, **kwargs
+    )
+    return viewset
+
+
+def finalize_response(viewset, response):
+    # DRF の Response はここで JSON にして返す（Django が描画をスレッドに渡さないように）
+    if isinstance(response, Response):
+        response.accepted_renderer = viewset.request.accepted_renderer
+        response.accepted_media_type = viewset.request.accepted_media_type
+        response.renderer_context = viewset.get_renderer_context()
+        content = render_timed(viewset.request._request, lambda: response.rendered_content)
+        response = HttpResponse(
+            content, status=response.status_code, headers=dict(response.items())
+        )
+    headers = dict(viewset.headers)
+    vary = headers.pop("Vary", None)
+    if vary is not None:
+        patch_vary_headers(response, cc_delim_re.split(vary))
+    for key, value in headers.items():
+        response[key] = value
+    return response
+
+
+async def aauthenticate(request):
+    # SessionAuthentication と同じく、セッションのユーザーが有効なときだけ認証済みにする
+    user = await request._request.auser()
+    if not user.is_active:
+        user = AnonymousUser()
+    request.user = user
+    return user
@@ -0,0 +1,111 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.response import Response
+
+# カタログ（Scene / Lesson / Phrase / Dialogue）のシリアライズ結果を保持するキャッシュ
+CATALOG_CACHE_ALIAS = "catalog"
+VERSION_KEY = "catalog:version"
+
+
+def get_catalog_cache():
+    return caches[CATALOG_CACHE_ALIAS]
+
+
+def _initial_version():
+    # 新しいコンテナ/キャッシュでも過去のバージョンと衝突しないよう時刻(ms)から始める
+    return int(time.time() * 1000)
+
+
+def content_version():
+    # バージョン自体もキャッシュの TIMEOUT で期限切れになり、次は新しい時刻から始まる
+    # （locmem で他のプロセスが行った更新は、ここで初めて反映される）
+    cache = get_catalog_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = _initial_version()
+        if not cache.add(VERSION_KEY, version):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_content_version():
+    cache = get_catalog_cache()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        version = _initial_version()
+        cache.set(VERSION_KEY, version)
+        return version
+
+
+async def acall_cache(func, *args, **kwargs):
+    # async ビューからキャッシュを使う同期関数を呼ぶ。LocMemCache（プロセス内の dict）なら
+    # スレッドに渡さずその場で呼び、Redis などの外部キャッシュはスレッドで呼ぶ
+    if isinstance(get_catalog_cache(), LocMemCache):
+        return func(*args, **kwargs)
+    return await sync_to_async(func)(*args, **kwargs)
+
+
+def catalog_cache_key(request, prefix):
+    # ページングの next はホスト込みの URL なのでキーにもホストを含める
+    return "catalog:v{version}:{prefix}:{url}".format(
+        version=content_version(),
+        prefix=prefix,
+        url=request.build_absolute_uri(),
+    )
+
+
+# list / retrieve のシリアライズ結果をコンテンツバージョン単位でキャッシュする
+class CatalogCacheMixin:
+    # False で常に build する（as_view の引数で指定。export_catalog がキャッシュを汚さないため）
+    use_catalog_cache = True
+
+    def cached_data(self, request, build):
+        if not self.use_catalog_cache:
+            return build()
+        cache = get_catalog_cache()
+        key = catalog_cache_key(request, self.basename)
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data)
+        return data
+
+    async def acached_data(self, request, build):
+        # cached_data の async 版（build はコルーチン関数）。キャッシュは同期版と共有する
+        if not self.use_catalog_cache:
+            return await build()
+        cache = get_catalog_cache()
+        key = await acall_cache(catalog_cache_key, request, self.basename)
+        data = await acall_cache(cache.get, key)
+        if data is None:
+            data = await build()
+            await acall_cache(cache.set, key, data)
+        return data
+
+    def cached_response(self, request, build):
+        if request.method != "GET" or not self.use_catalog_cache:
+            return build()
+        cache = get_catalog_cache()
+        key = catalog_cache_key(request, self.basename)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = build()
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs),
+        )
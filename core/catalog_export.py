@@ -0,0 +1,163 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.test import RequestFactory
+
+from .models import Dialogue, Lesson, Phrase, Scene
+from .renderers import encode_json
+from .views import LessonViewSet, SceneViewSet
+
+try:
+    import brotli
+except ImportError:  # brotli が無い環境では .gz だけを書く
+    brotli = None
+
+MANIFEST = "manifest.json"
+HASH_LENGTH = 12
+
+# カタログの静的スナップショット（S3 + CloudFront からそのまま配信する）。
+#   scenes.<hash>.json                 … GET /api/scenes/ と同じ本文
+#   scenes/<id>.<hash>.json            … GET /api/scenes/<id>/
+#   lessons/<id>/bundle.<hash>.json    … GET /api/lessons/<id>/bundle/（未ログイン時。progress は空）
+#   search/<scene_id>.<hash>.json      … シーンごとの検索用の断片（フレーズ・対話の en / ja）
+# 各ファイルに .gz（と brotli があれば .br）を並べ、manifest.json に論理名 -> パス・バイト数と
+# 圧縮版の拡張子を書く。
+# ファイル名は内容のハッシュなので、既にあるファイルは書き直さない（変わったものだけ増える）。
+
+
+class ExportError(Exception):
+    pass
+
+
+def _export_host():
+    # Host ヘッダは ALLOWED_HOSTS から選ぶ（既定の testserver だと DisallowedHost になる）。
+    # 本文にホストは含まれないので、検証を通る名前なら何でもよい
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != "*":
+            return host.lstrip(".")
+    return "localhost"
+
+
+def _render(view, path, **kwargs):
+    # API と同じ本文にするため ViewSet をそのまま呼ぶ（未ログインの GET）
+    host = _export_host()
+    request = RequestFactory().get(
+        path, HTTP_ACCEPT="application/json", HTTP_HOST=host, SERVER_NAME=host
+    )
+    response = view(request, **kwargs)
+    response.render()
+    if response.status_code != 200:
+        raise ExportError(f"{path}: HTTP {response.status_code}")
+    return response.content
+
+
+def search_shards(scene_ids):
+    # /api/search/ の results と同じキー（rank を除く）。並びは種別・シーン内の順
+    entries = {scene_id: [] for scene_id in scene_ids}
+    for kind, queryset, en, ja in (
+        ("phrase", Phrase.objects.order_by("scene_id", "id"), "text_en", "text_ja"),
+        ("dialogue", Dialogue.objects.order_by("scene_id", "order", "id"), "line_en", "line_ja"),
+    ):
+        for pk, scene_id, lesson_id, text_en, text_ja in queryset.values_list(
+            "id", "scene_id", "lesson_id", en, ja
+        ):
+            entries.setdefault(scene_id, []).append(
+                {"type": kind, "id": pk, "scene": scene_id, "lesson": lesson_id, "en": text_en, "ja": text_ja}
+            )
+    for scene_id, shard in entries.items():
+        yield f"search/{scene_id}", encode_json(shard)
+
+
+def iter_documents():
+    # (論理名, JSON のバイト列)
+    scene_ids = list(Scene.objects.order_by("id").values_list("id", flat=True))
+    # カタログキャッシュは使わない（キーがこのホストの URL になり、API からは使われない）
+    list_view = SceneViewSet.as_view({"get": "list"}, use_catalog_cache=False)
+    yield "scenes", _render(list_view, "/api/scenes/")
+    scene_view = SceneViewSet.as_view({"get": "retrieve"}, use_catalog_cache=False)
+    for pk in scene_ids:
+        yield f"scenes/{pk}", _render(scene_view, f"/api/scenes/{pk}/", pk=str(pk))
+    bundle_view = LessonViewSet.as_view({"get": "bundle"}, use_catalog_cache=False)
+    for pk in Lesson.objects.order_by("id").values_list("id", flat=True):
+        yield f"lessons/{pk}/bundle", _render(bundle_view, f"/api/lessons/{pk}/bundle/", pk=str(pk))
+    yield from search_shards(scene_ids)
+
+
+def compressors():
+    # 拡張子 -> 圧縮関数（gzip は mtime=0 で、同じ内容なら同じバイト列にする）
+    result = {"gzip": (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        result["br"] = (".br", lambda data: brotli.compress(data, mode=brotli.MODE_TEXT))
+    return result
+
+
+def _write(path, data):
+    # 一時ファイルに書いてから置き換える（書きかけのファイルを配信しない）
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def read_manifest(root):
+    try:
+        return json.loads((Path(root) / MANIFEST).read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def _manifest_paths(manifest):
+    paths = set()
+    suffixes = (manifest or {}).get("encodings", {}).values()
+    for entry in (manifest or {}).get("files", {}).values():
+        paths.add(entry["path"])
+        paths.update(entry["path"] + suffix for suffix in suffixes)
+    return paths
+
+
+def export_catalog(output_dir, prune=False):
+    root = Path(output_dir)
+    previous = read_manifest(root)
+    encoders = compressors()
+    files = {}
+    result = {"documents": 0, "written": 0, "unchanged": 0, "pruned": 0, "manifest_updated": False}
+    for name, content in iter_documents():
+        digest = hashlib.sha256(content).hexdigest()
+        path = f"{name}.{digest[:HASH_LENGTH]}.json"
+        written = 0
+        if not (root / path).exists():
+            _write(root / path, content)
+            written += 1
+        for suffix, compress in encoders.values():
+            if not (root / (path + suffix)).exists():
+                _write(root / (path + suffix), compress(content))
+                written += 1
+        files[name] = {"path": path, "bytes": len(content)}
+        result["documents"] += 1
+        result["written"] += written
+        result["unchanged"] += not written
+
+    # manifest は本体をすべて書いた後に置き換える（存在しないファイルを指さない）
+    manifest = {
+        "version": hashlib.sha256(encode_json(files)).hexdigest()[:HASH_LENGTH],
+        "encodings": {encoding: suffix for encoding, (suffix, _) in encoders.items()},
+        "files": files,
+    }
+    if manifest != previous:
+        _write(root / MANIFEST, encode_json(manifest))
+        result["manifest_updated"] = True
+
+    if prune:
+        # 前回の manifest にあって今回は参照しないファイルを消す
+        for path in _manifest_paths(previous) - _manifest_paths(manifest):
+            try:
+                (root / path).unlink()
+            except FileNotFoundError:
+                continue
+            result["pruned"] += 1
+    result["version"] = manifest["version"]
+    return result
@@ -0,0 +1,109 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import acall_cache, content_version, get_catalog_cache
+from .signals import CATALOG_MODELS
+
+
+def model_state(queryset):
+    agg = queryset.aggregate(count=Count("pk"), updated=Max("updated_at"))
+    return agg["count"], agg["updated"]
+
+
+async def amodel_state(queryset):
+    agg = await queryset.aaggregate(count=Count("pk"), updated=Max("updated_at"))
+    return agg["count"], agg["updated"]
+
+
+def _states_key():
+    return "catalog:v{}:states".format(content_version())
+
+
+def _cached_states():
+    return get_catalog_cache().get(_states_key())
+
+
+def catalog_states(models):
+    # カタログの (件数, 最終更新) はコンテンツバージョンごとに1回だけ集計する
+    states = _cached_states()
+    if states is None:
+        states = {
+            model._meta.label_lower: model_state(model._default_manager.all())
+            for model in CATALOG_MODELS
+        }
+        get_catalog_cache().set(_states_key(), states)
+    return [states[model._meta.label_lower] for model in models]
+
+
+async def acatalog_states(models):
+    # キャッシュ済みならその場で返し、集計が要るときだけスレッドで catalog_states を呼ぶ
+    states = await acall_cache(_cached_states)
+    if states is None:
+        return await sync_to_async(catalog_states)(models)
+    return [states[model._meta.label_lower] for model in models]
+
+
+def validators_for(request, states, scope=None):
+    # ボディをハッシュせず、(件数, 最終更新) とレンダラ形式から強い ETag を作る
+    renderer = getattr(request, "accepted_renderer", None)
+    parts = [getattr(renderer, "format", ""), scope, *states]
+    etag = quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+    timestamps = [updated for _, updated in states if updated is not None]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    return etag, last_modified
+
+
+# GET 系アクションで ETag / Last-Modified を付与し、変更がなければ 304 を返す
+class ConditionalGetMixin:
+    etag_models = ()
+
+    def get_content_states(self, request):
+        return catalog_states(self.etag_models)
+
+    def conditional_response(self, request, build, states=None, scope=None):
+        if request.method not in ("GET", "HEAD"):
+            return build()
+        if states is None:
+            states = self.get_content_states(request)
+        etag, last_modified = validators_for(request, states, scope)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        return self.add_validators(build(), etag, last_modified)
+
+    async def aconditional_response(self, request, build, states, scope=None):
+        # conditional_response の async 版（GET/HEAD 専用、build はコルーチン関数）
+        etag, last_modified = validators_for(request, states, scope)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        return self.add_validators(await build(), etag, last_modified)
+
+    def add_validators(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+            # ブラウザに毎回再検証させる（304 で本文は返さない）
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
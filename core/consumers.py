@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import time
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from .roleplay import get_reply_generator
+
+logger = logging.getLogger(__name__)
+
+# シーンのロールプレイ: ws/roleplay/<scene_id>/
+#   クライアント → {"type": "message", "content": "..."} / {"type": "cancel"}
+#   サーバー     → start, token（複数）, done（全文と次の例文）/ cancelled / error
+# 返信は1接続につき1つずつ。生成器と送信の間は上限付きのキューでつなぎ、送信が詰まると
+# 生成を止め、その間に溜まったトークンは1フレームにまとめて送る。
+
+
+class RateLimiter:
+    # トークンバケット: 連続 rate 回まで、period 秒で rate 回分回復する
+    def __init__(self, rate, period, clock=time.monotonic):
+        self.rate = rate
+        self.period = period
+        self.clock = clock
+        self.tokens = float(rate)
+        self.updated = clock()
+
+    def hit(self):
+        # 許可なら 0、超過なら次に送れるまでの秒数
+        now = self.clock()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.period)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) * self.period / self.rate
+
+
+class RoleplayConsumer(AsyncWebsocketConsumer):
+    async def connect(self):
+        self.reply_task = None
+        self.limiter = RateLimiter(settings.ROLEPLAY_RATE_LIMIT, settings.ROLEPLAY_RATE_PERIOD)
+        self.generator = get_reply_generator(self.scope["url_route"]["kwargs"]["scene_id"])
+        if not await self.generator.load():
+            # シーンが無いか対話が無い
+            await self.close(code=4404)
+            return
+        await self.accept()
+        self.start_reply(None)
+
+    async def disconnect(self, code):
+        if self.reply_task is not None:
+            self.reply_task.cancel()
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or "")
+        except ValueError:
+            data = None
+        kind = data.get("type") if isinstance(data, dict) else None
+        if kind == "cancel":
+            if self.reply_task is not None and not self.reply_task.done():
+                self.reply_task.cancel()
+                await self.send_event("cancelled")
+            return
+        content = data.get("content") if kind == "message" else None
+        if not isinstance(content, str) or not content.strip():
+            await self.send_event(
+                "error", code="invalid", detail='{"type": "message", "content": "..."} を送信してください'
+            )
+            return
+        if len(content) > settings.ROLEPLAY_MAX_MESSAGE_CHARS:
+            await self.send_event(
+                "error", code="too_long", detail=f"{settings.ROLEPLAY_MAX_MESSAGE_CHARS} 文字までです"
+            )
+            return
+        if self.reply_task is not None and not self.reply_task.done():
+            await self.send_event("error", code="busy", detail="返信の途中です")
+            return
+        retry_after = self.limiter.hit()
+        if retry_after:
+            await self.send_event("error", code="rate_limited", retry_after=round(retry_after, 1))
+            return
+        self.start_reply(content)
+
+    async def send_event(self, kind, **data):
+        await self.send(text_data=json.dumps({"type": kind, **data}, ensure_ascii=False))
+
+    def start_reply(self, message):
+        self.reply_task = asyncio.create_task(self.reply(message))
+
+    async def reply(self, message):
+        queue = asyncio.Queue(maxsize=settings.ROLEPLAY_SEND_BUFFER)
+        producer = asyncio.create_task(self.produce(message, queue))
+        parts = []
+        try:
+            await self.send_event("start")
+            finished = False
+            while not finished:
+                chunks = [await queue.get()]
+                while not queue.empty():
+                    chunks.append(queue.get_nowait())
+                finished = chunks[-1] is None
+                text = "".join(chunk for chunk in chunks if chunk is not None)
+                if text:
+                    parts.append(text)
+                    await self.send_event("token", content=text)
+            # 生成器で起きた例外はここで受け取る
+            await producer
+        except asyncio.CancelledError:
+            producer.cancel()
+            raise
+        except Exception:
+            logger.exception("roleplay reply failed")
+            await self.send_event("error", code="generator_failed", detail="返信を生成できませんでした")
+            return
+        await self.send_event("done", content="".join(parts), hint=self.generator.hint())
+
+    async def produce(self, message, queue):
+        # 終わり（例外を含む）は None で知らせる
+        try:
+            async for token in self.generator.stream(message):
+                # キューが一杯（送信が追いついていない）の間は生成を止める
+                await queue.put(token)
+        except Exception:
+            await queue.put(None)
+            raise
+        await queue.put(None)
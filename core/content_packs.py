@@ -0,0 +1,199 @@
+import hashlib
+import json
+from pathlib import Path
+
+from .models import ContentPack
+from .seeding import sync_scenes
+
+try:
+    import yaml
+except ImportError:  # YAML パックを使わない環境では不要
+    yaml = None
+
+PACKS_DIR = Path(__file__).resolve().parent / "packs"
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+YAML_SUFFIXES = {".yaml", ".yml"}
+
+
+class PackError(Exception):
+    pass
+
+
+# コンテンツパック: 1レコード = 1シーン（JSON Lines は1行、YAML は1ドキュメント）。
+# 先頭に {"pack": {...}} のヘッダーレコードを置くとパック単位の設定を指定できる。
+#   {"pack": {"name": "six_scenes", "managed_note": "seed", "obsolete_dialogue_en": [...]}}
+#   {"title": "要件定義", "lessons": [...], "phrases": [...], "dialogues": [...]}
+def iter_records(path):
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in JSONL_SUFFIXES:
+        with path.open(encoding="utf-8") as fp:
+            for lineno, line in enumerate(fp, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield lineno, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise PackError(f"{path}:{lineno}: invalid JSON ({exc})")
+    elif suffix in YAML_SUFFIXES:
+        if yaml is None:
+            raise PackError(f"{path}: PyYAML is required to read YAML packs")
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        with path.open(encoding="utf-8") as fp:
+            try:
+                for index, document in enumerate(yaml.load_all(fp, Loader=loader), 1):
+                    if document is not None:
+                        yield index, document
+            except yaml.YAMLError as exc:
+                raise PackError(f"{path}: invalid YAML ({exc})")
+    else:
+        raise PackError(f"{path}: unsupported pack format (use .jsonl or .yaml)")
+
+
+def pack_checksum(path):
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _require_text(record, key, where, max_length=None, required=True):
+    value = record.get(key)
+    if value is None and not required:
+        return
+    if not isinstance(value, str) or (required and not value):
+        raise PackError(f"{where}: '{key}' must be a non-empty string")
+    if max_length is not None and len(value) > max_length:
+        raise PackError(f"{where}: '{key}' exceeds {max_length} characters")
+
+
+def validate_scene(record, where):
+    if not isinstance(record, dict):
+        raise PackError(f"{where}: scene record must be an object")
+    _require_text(record, "title", where, 120)
+    for key in ("lessons", "phrases", "dialogues"):
+        if not isinstance(record.get(key, []), list):
+            raise PackError(f"{where}: '{key}' must be a list")
+
+    lesson_titles = set()
+    for i, lesson in enumerate(record.get("lessons", [])):
+        at = f"{where}: lessons[{i}]"
+        if not isinstance(lesson, dict):
+            raise PackError(f"{at}: must be an object")
+        _require_text(lesson, "title", at, 120)
+        _require_text(lesson, "description", at, required=False)
+        lesson_titles.add(lesson["title"])
+
+    def check_lesson_ref(item, at):
+        ref = item.get("lesson")
+        if ref is not None and ref not in lesson_titles:
+            raise PackError(f"{at}: unknown lesson '{ref}'")
+
+    # フレーズはシーン内の text_en で突き合わせるので、重複すると取り込むたびに行が増える
+    phrase_texts = set()
+    for i, phrase in enumerate(record.get("phrases", [])):
+        at = f"{where}: phrases[{i}]"
+        if not isinstance(phrase, dict):
+            raise PackError(f"{at}: must be an object")
+        _require_text(phrase, "text_en", at, 255)
+        _require_text(phrase, "text_ja", at, 255)
+        if not isinstance(phrase.get("note", ""), str):
+            raise PackError(f"{at}: 'note' must be a string")
+        if phrase["text_en"] in phrase_texts:
+            raise PackError(f"{at}: duplicate phrase '{phrase['text_en']}'")
+        phrase_texts.add(phrase["text_en"])
+        check_lesson_ref(phrase, at)
+
+    orders = set()
+    for i, dialogue in enumerate(record.get("dialogues", [])):
+        at = f"{where}: dialogues[{i}]"
+        if not isinstance(dialogue, dict):
+            raise PackError(f"{at}: must be an object")
+        _require_text(dialogue, "speaker", at, 50)
+        _require_text(dialogue, "line_en", at)
+        _require_text(dialogue, "line_ja", at)
+        order = dialogue.get("order")
+        if not isinstance(order, int) or isinstance(order, bool) or order < 0:
+            raise PackError(f"{at}: 'order' must be a non-negative integer")
+        if order in orders:
+            raise PackError(f"{at}: duplicate order {order}")
+        orders.add(order)
+        check_lesson_ref(dialogue, at)
+
+
+def read_header(path):
+    for _, record in iter_records(path):
+        if isinstance(record, dict) and "pack" in record:
+            header = record["pack"]
+            if not isinstance(header, dict):
+                raise PackError(f"{path}: 'pack' header must be an object")
+            return header
+        return {}
+    return {}
+
+
+def validate_pack(path):
+    # 1パス目: ストリームで全レコードを検証する（書き込み前に不正を検出）
+    count = 0
+    titles = set()
+    for position, (index, record) in enumerate(iter_records(path)):
+        if isinstance(record, dict) and "pack" in record:
+            if position:
+                raise PackError(f"{path}:{index}: 'pack' header must come first")
+            continue
+        where = f"{path}:{index}"
+        validate_scene(record, where)
+        if record["title"] in titles:
+            raise PackError(f"{where}: duplicate scene '{record['title']}'")
+        titles.add(record["title"])
+        count += 1
+    return count
+
+
+def import_pack(path, batch_size=200, force=False, name=None):
+    # 2パス目: batch_size シーンずつ、バッチごとのトランザクションで差分反映する
+    path = Path(path)
+    header = read_header(path)
+    name = name or header.get("name") or path.stem
+    checksum = pack_checksum(path)
+    result = {
+        "name": name,
+        "skipped": False,
+        "scenes": 0,
+        "created": {},
+        "updated": {},
+        "deleted": {},
+    }
+
+    existing = ContentPack.objects.filter(name=name).first()
+    if existing is not None and existing.checksum == checksum and not force:
+        result["skipped"] = True
+        return result
+
+    validate_pack(path)
+    managed_note = header.get("managed_note")
+    obsolete = header.get("obsolete_dialogue_en", ())
+
+    def flush(batch):
+        counts = sync_scenes(
+            batch, managed_note=managed_note, obsolete_dialogue_en=obsolete
+        )
+        for kind in ("created", "updated", "deleted"):
+            for model, n in counts[kind].items():
+                result[kind][model] = result[kind].get(model, 0) + n
+        result["scenes"] += len(batch)
+
+    batch = []
+    for _, record in iter_records(path):
+        if "pack" in record:
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    ContentPack.objects.update_or_create(name=name, defaults={"checksum": checksum})
+    return result
@@ -0,0 +1,12 @@
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    # 接続確立時に settings.SQLITE_PRAGMAS[エイリアス] の PRAGMA を適用する
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {}).get(connection.alias)
+    if not pragmas:
+        return
+    for name, value in pragmas.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
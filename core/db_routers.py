@@ -0,0 +1,30 @@
+# 読み取り専用カタログモード（settings.SQLITE_CATALOG_PATH）用のルーター。
+# カタログのモデルは "catalog"、それ以外（進捗・ユーザー・セッション）は default を使う。
+CATALOG_DB = "catalog"
+CATALOG_MODELS = {"scene", "lesson", "phrase", "dialogue", "contentpack"}
+
+
+def is_catalog_model(model):
+    return model._meta.app_label == "core" and model._meta.model_name in CATALOG_MODELS
+
+
+class CatalogRouter:
+    def db_for_read(self, model, **hints):
+        if is_catalog_model(model):
+            return CATALOG_DB
+        return None
+
+    def db_for_write(self, model, **hints):
+        # カタログは immutable で開いているため、書き込みは "readonly database" で失敗させる
+        if is_catalog_model(model):
+            return CATALOG_DB
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # UserProgress(default) -> Lesson(catalog) のような DB をまたぐ参照を許可する
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == CATALOG_DB:
+            return False
+        return None
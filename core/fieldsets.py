@@ -0,0 +1,60 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignObjectRel
+
+# ?fields= / ?expand= を受け付けるアクション
+SPARSE_ACTIONS = ("list", "retrieve", "my_progress")
+
+
+def parse_field_list(value):
+    # 未指定は None（= 既定の全フィールド）、空文字は空集合
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+# ?fields=id,title で返すフィールドを、?expand=phrases で展開するネストを選ぶ。
+# シリアライザの絞り込みに合わせて only() と prefetch_related() も最小限にする。
+class SparseFieldsetMixin:
+    # ネスト名 -> Prefetch（未定義ならフィールドの source をそのまま prefetch する）
+    expand_prefetches = {}
+
+    def get_sparse_kwargs(self):
+        if getattr(self, "action", None) not in SPARSE_ACTIONS:
+            return {}
+        params = self.request.query_params
+        return {
+            "fields": parse_field_list(params.get("fields")),
+            "expand": parse_field_list(params.get("expand")),
+        }
+
+    def get_serializer(self, *args, **kwargs):
+        for key, value in self.get_sparse_kwargs().items():
+            kwargs.setdefault(key, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def sparse_queryset(self, queryset):
+        serializer = self.get_serializer_class()(**self.get_sparse_kwargs())
+        opts = queryset.model._meta
+        only = {opts.pk.name}
+        prefetches = []
+        for field in serializer.fields.values():
+            if field.source == "*":
+                return queryset
+            path = field.source.split(".")
+            try:
+                model_field = opts.get_field(path[0])
+            except FieldDoesNotExist:
+                return queryset
+            if isinstance(model_field, ForeignObjectRel) or model_field.many_to_many:
+                prefetches.append(
+                    self.expand_prefetches.get(field.field_name, path[0])
+                )
+                continue
+            only.add(model_field.name)
+            if len(path) > 1:
+                # lesson.scene.title のような参照はリレーション部分を prefetch する
+                prefetches.append("__".join(path[:-1]))
+        # 断片（core.fragments）の再利用の判定に使う updated_at は返さなくても読み込む
+        if any(field.name == "updated_at" for field in opts.concrete_fields):
+            only.add("updated_at")
+        return queryset.only(*only).prefetch_related(*prefetches)
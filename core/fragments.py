@@ -0,0 +1,132 @@
+from django.conf import settings
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.response import Response
+from rest_framework.serializers import ListSerializer, ModelSerializer
+
+from .cache import content_version
+from .renderers import EncodedJSON, ORJSONRenderer, encode_json
+from .serializers import DialogueSerializer, LessonSerializer, PhraseSerializer
+
+# カタログ（Phrase / Dialogue / Lesson）の1件ごとのエンコード済み JSON をプロセス内に持ち、
+# シーン一覧などの本文はそれを連結して組み立てる（DRF のフィールド処理とエンコードを1件1回にする）。
+# 断片はコンテンツバージョン（core.cache）ごとに持ち、バージョンが変わったら全て捨てる。
+# シグナルの届かない更新（QuerySet.update() や生 SQL、別プロセスでの保存）もカタログキャッシュと
+# 同じく、バージョンの更新か CATALOG_CACHE_TIMEOUT での期限切れで反映される。
+# 保存・削除のシグナルではその1件をすぐに捨て、updated_at が変わった行も作り直す。
+
+
+class FragmentStore:
+    def __init__(self, serializer_class, max_entries=None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.max_entries = max_entries or settings.CATALOG_FRAGMENT_MAX_ENTRIES
+        self.field_names = None
+        self.version = None
+        self.fragments = {}
+
+    def use_version(self, version):
+        # 別のバージョンで作った断片は使わない
+        if version != self.version:
+            self.fragments = {}
+            self.version = version
+
+    def covers(self, serializer):
+        # fields= で絞っていない（全フィールドを返す）シリアライザか
+        if self.field_names is None:
+            self.field_names = list(self.serializer_class().fields)
+        return list(serializer.fields) == self.field_names
+
+    def get(self, instance, serializer):
+        # serializer は covers() を満たすもの（一覧では子のシリアライザを使い回す）。
+        # updated_at が読み込まれていない（only() で外した）ときは保持しない
+        updated_at = instance.__dict__.get("updated_at")
+        entry = self.fragments.get(instance.pk)
+        if entry is not None and updated_at is not None and entry[0] == updated_at:
+            return entry[1]
+        fragment = encode_json(serializer.to_representation(instance))
+        if updated_at is not None:
+            if entry is None and len(self.fragments) >= self.max_entries:
+                # 上限を超えたら古く作ったものから捨てる
+                self.fragments.pop(next(iter(self.fragments), None), None)
+            self.fragments[instance.pk] = (updated_at, fragment)
+        return fragment
+
+    def discard(self, pk):
+        self.fragments.pop(pk, None)
+
+    def clear(self):
+        self.fragments.clear()
+
+
+STORES = {
+    serializer_class: FragmentStore(serializer_class)
+    for serializer_class in (PhraseSerializer, DialogueSerializer, LessonSerializer)
+}
+
+
+def discard_fragment(sender, instance, **kwargs):
+    for store in STORES.values():
+        if store.model is sender:
+            store.discard(instance.pk)
+
+
+def encode_serializer(serializer, version=None):
+    # serializer.data と同じ JSON を、STORES にあるシリアライザの部分は保持した断片で組み立てる。
+    # version は現在のコンテンツバージョン（async ビューは acall_cache で読んで渡す）
+    if version is None:
+        version = content_version()
+    for store in STORES.values():
+        store.use_version(version)
+    if isinstance(serializer, ListSerializer):
+        return EncodedJSON(_encode_list(serializer.child, serializer.instance))
+    return EncodedJSON(_encode_instance(serializer, serializer.instance))
+
+
+def _encode_list(child, instances):
+    if hasattr(instances, "all"):
+        instances = instances.all()
+    return b"[" + b",".join(_encode_instance(child, instance) for instance in instances) + b"]"
+
+
+def _encode_instance(serializer, instance):
+    store = STORES.get(type(serializer))
+    if store is not None and store.covers(serializer):
+        return store.get(instance, serializer)
+    if type(serializer).to_representation is not ModelSerializer.to_representation:
+        return encode_json(serializer.to_representation(instance))
+    # Serializer.to_representation と同じ手順で、ネストした一覧だけ断片を連結する
+    parts = []
+    for field in serializer._readable_fields:
+        try:
+            attribute = field.get_attribute(instance)
+        except SkipField:
+            continue
+        if isinstance(field, ListSerializer):
+            value = b"null" if attribute is None else _encode_list(field.child, attribute)
+        else:
+            check = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            value = encode_json(None if check is None else field.to_representation(attribute))
+        parts.append(encode_json(field.field_name) + b":" + value)
+    return b"{" + b",".join(parts) + b"}"
+
+
+# list / retrieve の本文を encode_serializer で組み立てる（ページングは KeysetPagination が埋め込む）。
+# ORJSONRenderer で返すときだけ使い、ブラウザ表示の API などは通常の serializer.data のまま
+class EncodedResponseMixin:
+    def encoded_data(self, serializer, version=None):
+        if isinstance(getattr(self.request, "accepted_renderer", None), ORJSONRenderer):
+            return encode_serializer(serializer, version)
+        return serializer.data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.encoded_data(self.get_serializer(page, many=True))
+            )
+        return Response(self.encoded_data(self.get_serializer(queryset, many=True)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.encoded_data(self.get_serializer(self.get_object())))
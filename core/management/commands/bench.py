@@ -0,0 +1,578 @@
+import asyncio
+import itertools
+import json
+import platform
+import random
+import subprocess
+import time
+from datetime import timedelta
+from http.cookies import SimpleCookie
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.test import Client
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from core.models import (
+    Dialogue,
+    Lesson,
+    Phrase,
+    Scene,
+    SceneProgressSummary,
+    UserProgress,
+    UserProgressSummary,
+)
+from core.search import has_search_table, reindex
+from core.summaries import longest_runs
+
+# 合成データを作り、各 API を ASGI アプリに直接（ネットワークなしで）同時に送って、
+# エンドポイントごとのスループットとレイテンシ（p50/p90/p99）を JSON で出力する。
+# 乱数は --seed で固定するので、同じ引数なら同じデータ・同じリクエスト列になる。
+
+USERNAME_PREFIX = "bench-"
+INSERT_CHUNK = 10_000
+WORDS = (
+    "deploy", "review", "release", "incident", "rollback", "schedule", "estimate", "merge",
+    "request", "database", "latency", "monitoring", "kubernetes", "pipeline", "backlog",
+    "sprint", "retrospective", "migration", "staging", "production", "hotfix", "refactor",
+)
+WORDS_JA = ("デプロイ", "レビュー", "リリース", "障害", "切り戻し", "見積もり", "監視", "移行")
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic catalog and user base, then drive every API endpoint through the "
+        "ASGI app in-process with concurrent clients and report throughput and latency as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenes", type=int, default=1000)
+        parser.add_argument("--lessons-per-scene", type=int, default=10)
+        parser.add_argument("--phrases", type=int, default=50_000)
+        parser.add_argument("--dialogues", type=int, default=20_000)
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--progress", type=int, default=10_000_000, help="UserProgress rows")
+        parser.add_argument(
+            "--skip-generate",
+            action="store_true",
+            help="Reuse the data already in the database instead of generating it.",
+        )
+        parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+        parser.add_argument(
+            "--requests", type=int, default=1000, help="Measured requests per endpoint"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=50, help="Unmeasured requests per endpoint"
+        )
+        parser.add_argument("--endpoints", help="Comma-separated endpoint names (default: all)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+        parser.add_argument("--baseline", help="A previous report to compare against.")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["clients"] < 1:
+            raise CommandError("--requests and --clients must be at least 1.")
+        self.rng = random.Random(options["seed"])
+        catalog = router.db_for_write(Scene)
+        has_data = Scene.objects.using(catalog).exists()
+        if options["skip_generate"]:
+            if not has_data:
+                raise CommandError("--skip-generate was given but the database has no scenes.")
+            sizes = None
+        else:
+            if has_data:
+                raise CommandError(
+                    "The database already has scenes. Point SQLITE_PATH at an empty, migrated "
+                    "database or pass --skip-generate to reuse the existing data."
+                )
+            if settings.SQLITE_CATALOG_PATH:
+                raise CommandError(
+                    "The catalog is read-only (SQLITE_CATALOG_PATH); use --skip-generate."
+                )
+            sizes = self.generate(options)
+
+        endpoints = self.endpoints()
+        if options["endpoints"]:
+            names = options["endpoints"].split(",")
+            unknown = set(names) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            endpoints = {name: endpoints[name] for name in names}
+
+        fixtures = self.load_fixtures(options["clients"])
+        try:
+            results = asyncio.run(
+                self.run(endpoints, fixtures, options["requests"], options["warmup"])
+            )
+        finally:
+            sessions = [client["session"] for client in fixtures["clients"]]
+            Session.objects.filter(session_key__in=sessions).delete()
+
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connections[catalog].vendor,
+                "generated": sizes,
+                "rows": {
+                    "scenes": len(fixtures["scenes"]),
+                    "lessons": len(fixtures["lessons"]),
+                    "phrases": Phrase.objects.count(),
+                    "dialogues": Dialogue.objects.count(),
+                    "users": User.objects.count(),
+                    "progress": UserProgress.objects.count(),
+                },
+                "clients": options["clients"],
+                "requests": options["requests"],
+                "seed": options["seed"],
+            },
+            "endpoints": results,
+        }
+        if options["baseline"]:
+            report["baseline"] = self.compare(results, options["baseline"])
+
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(text + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            self.stdout.write(text)
+
+    def log(self, message):
+        # 標準出力は JSON のために空けておく
+        self.stderr.write(message)
+
+    # ---- 合成データ ----
+
+    def insert(self, model, columns, rows):
+        # 行のイテレータを INSERT_CHUNK 行ずつ executemany で投入する（全件をメモリに持たず、
+        # チャンクごとにコミットして WAL を大きくしない）
+        using = router.db_for_write(model)
+        connection = connections[using]
+        quote = connection.ops.quote_name
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote(model._meta.db_table),
+            ", ".join(quote(column) for column in columns),
+            ", ".join(["%s"] * len(columns)),
+        )
+        total = 0
+        rows = iter(rows)
+        while chunk := list(itertools.islice(rows, INSERT_CHUNK)):
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                cursor.executemany(sql, chunk)
+            total += len(chunk)
+        return total
+
+    def ids(self, model):
+        return list(model.objects.order_by("id").values_list("id", flat=True))
+
+    def sentence(self, length):
+        return " ".join(self.rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+    def generate(self, options):
+        rng = self.rng
+        now = timezone.now()
+        ops = connections[router.db_for_write(UserProgress)].ops
+        # 日時は1時間刻みの候補を DB 向けに1回だけ変換して使い回す
+        stamps = [
+            ops.adapt_datetimefield_value(now - timedelta(hours=h)) for h in range(24 * 365)
+        ]
+        catalog_now = connections[router.db_for_write(Scene)].ops.adapt_datetimefield_value(now)
+        started = time.perf_counter()
+
+        with transaction.atomic(using=router.db_for_write(Scene)):
+            self.log(f"Generating {options['scenes']} scenes ...")
+            self.insert(
+                Scene,
+                ["title", "updated_at"],
+                ((f"Scene {i}", catalog_now) for i in range(options["scenes"])),
+            )
+            scene_ids = self.ids(Scene)
+            self.insert(
+                Lesson,
+                ["scene_id", "title", "description", "updated_at"],
+                (
+                    (scene_id, f"Lesson {j + 1}", self.sentence(8), catalog_now)
+                    for scene_id in scene_ids
+                    for j in range(options["lessons_per_scene"])
+                ),
+            )
+            scene_lessons = {}
+            for lesson_id, scene_id in Lesson.objects.order_by("id").values_list("id", "scene_id"):
+                scene_lessons.setdefault(scene_id, []).append(lesson_id)
+
+            def content(count):
+                for i in range(count):
+                    scene_id = scene_ids[i % len(scene_ids)]
+                    yield i, scene_id, rng.choice(scene_lessons[scene_id])
+
+            self.log(
+                f"Generating {options['phrases']} phrases, {options['dialogues']} dialogues ..."
+            )
+            self.insert(
+                Phrase,
+                ["scene_id", "lesson_id", "text_en", "text_ja", "note", "updated_at"],
+                (
+                    (
+                        scene_id,
+                        lesson_id,
+                        self.sentence(rng.randint(4, 12)),
+                        "".join(rng.choices(WORDS_JA, k=3)) + "します。",
+                        "",
+                        catalog_now,
+                    )
+                    for i, scene_id, lesson_id in content(options["phrases"])
+                ),
+            )
+            self.insert(
+                Dialogue,
+                ["scene_id", "lesson_id", "speaker", "line_en", "line_ja", "order", "updated_at"],
+                (
+                    (
+                        scene_id,
+                        lesson_id,
+                        "PM" if i % 2 else "Dev",
+                        self.sentence(rng.randint(6, 16)),
+                        "".join(rng.choices(WORDS_JA, k=4)) + "ですか？",
+                        i,
+                        catalog_now,
+                    )
+                    for i, scene_id, lesson_id in content(options["dialogues"])
+                ),
+            )
+            # 一括投入はシグナルを送らないので検索索引は作り直す（Postgres は元の表の索引）
+            search_db = connections[router.db_for_write(Phrase)]
+            if search_db.vendor == "sqlite" and has_search_table(search_db):
+                self.log("Rebuilding the search index ...")
+                reindex(using=search_db.alias)
+
+        self.log(f"Generating {options['users']} users ...")
+        self.insert(
+            User,
+            ["password", "is_superuser", "username", "first_name", "last_name", "email",
+             "is_staff", "is_active", "date_joined"],
+            (
+                ("!", False, f"{USERNAME_PREFIX}{i}", "", "", "", False, True, stamps[-1])
+                for i in range(options["users"])
+            ),
+        )
+        user_ids = self.ids(User)
+        lesson_ids = self.ids(Lesson)
+        lesson_scene = dict(Lesson.objects.values_list("id", "scene_id"))
+        days = [timezone.localdate(now - timedelta(hours=h)) for h in range(len(stamps))]
+        # ユーザーごとに連続したレッスンを完了させる（(user, lesson) は重複しない）
+        per_user = min(len(lesson_ids), max(1, options["progress"] // max(1, len(user_ids))))
+        self.log(f"Generating {per_user * len(user_ids)} progress rows and their summaries ...")
+        # 集計（core.summaries と同じ内容）は生成しながら作る。
+        # 1000万行を rebuild_summaries で読み直すより桁違いに速い
+        scene_summaries = []
+        user_summaries = []
+
+        def progress():
+            for user_id in user_ids:
+                start = rng.randrange(len(lesson_ids))
+                scenes = {}
+                active = set()
+                for j in range(per_user):
+                    lesson_id = lesson_ids[(start + j) % len(lesson_ids)]
+                    hour = rng.randrange(len(stamps))
+                    score = rng.randint(0, 100)
+                    time_spent = rng.randint(30, 1800)
+                    row = scenes.setdefault(lesson_scene[lesson_id], [0, 0, 0, 0])
+                    row[0] += 1
+                    row[1] = max(row[1], score)
+                    row[2] += score
+                    row[3] += time_spent
+                    active.add(days[hour])
+                    yield (user_id, lesson_id, stamps[hour], score, time_spent, stamps[hour])
+                for scene_id, row in scenes.items():
+                    scene_summaries.append((user_id, scene_id, *row, stamps[0]))
+                current, longest = longest_runs(active)
+                user_summaries.append(
+                    (
+                        user_id,
+                        sum(row[0] for row in scenes.values()),
+                        max(row[1] for row in scenes.values()),
+                        sum(row[2] for row in scenes.values()),
+                        sum(row[3] for row in scenes.values()),
+                        current,
+                        longest,
+                        ops.adapt_datefield_value(max(active)),
+                        stamps[0],
+                    )
+                )
+
+        self.insert(
+            UserProgress,
+            ["user_id", "lesson_id", "completed_at", "score", "time_spent", "updated_at"],
+            progress(),
+        )
+        self.insert(
+            SceneProgressSummary,
+            ["user_id", "scene_id", "lessons_completed", "best_score", "score_sum", "time_spent",
+             "updated_at"],
+            scene_summaries,
+        )
+        self.insert(
+            UserProgressSummary,
+            ["user_id", "lessons_completed", "best_score", "score_sum", "time_spent",
+             "current_streak", "longest_streak", "last_active_date", "updated_at"],
+            user_summaries,
+        )
+        sizes = {
+            "scenes": len(scene_ids),
+            "lessons": len(lesson_ids),
+            "phrases": options["phrases"],
+            "dialogues": options["dialogues"],
+            "users": len(user_ids),
+            "progress": per_user * len(user_ids),
+            "seconds": round(time.perf_counter() - started, 1),
+        }
+        self.log(f"Generated in {sizes['seconds']}s.")
+        return sizes
+
+    # ---- リクエスト ----
+
+    def load_fixtures(self, clients):
+        users = list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).order_by("id")[:clients]
+        )
+        if len(users) < clients:
+            users = list(User.objects.filter(is_active=True).order_by("id")[:clients])
+        if not users:
+            raise CommandError("No users to log in as.")
+        sessions = []
+        for index in range(clients):
+            # force_login でセッションを作り、Cookie だけを ASGI のリクエストで使う
+            client = Client()
+            client.force_login(users[index % len(users)])
+            token = get_random_string(32)
+            cookie = SimpleCookie()
+            session = client.cookies[settings.SESSION_COOKIE_NAME].value
+            cookie[settings.SESSION_COOKIE_NAME] = session
+            cookie[settings.CSRF_COOKIE_NAME] = token
+            sessions.append(
+                {
+                    "session": session,
+                    "headers": [
+                        (b"cookie", cookie.output(header="", sep=";").strip().encode()),
+                        (b"x-csrftoken", token.encode()),
+                    ],
+                }
+            )
+        return {
+            "clients": sessions,
+            "scenes": self.ids(Scene),
+            "lessons": self.ids(Lesson),
+            "phrases": list(Phrase.objects.order_by("id").values_list("id", flat=True)[:10_000]),
+            "dialogues": list(Dialogue.objects.order_by("id").values_list("id", flat=True)[:10_000]),
+        }
+
+    def endpoints(self):
+        # 名前 -> (メソッド, リクエストを作る関数(rng, fixtures) -> (パス?クエリ, JSON ボディ))
+        def get(path):
+            return lambda rng, f: (path(rng, f), None)
+
+        def records(rng, f):
+            now = timezone.now()
+            return {
+                "records": [
+                    {
+                        "idempotency_key": f"{rng.getrandbits(64):016x}",
+                        "lesson_id": rng.choice(f["lessons"]),
+                        "score": rng.randint(0, 100),
+                        "time_spent": rng.randint(30, 600),
+                        "client_ts": (now - timedelta(minutes=i)).isoformat(),
+                    }
+                    for i in range(10)
+                ]
+            }
+
+        return {
+            "scene-list": ("GET", get(lambda rng, f: "/api/scenes/")),
+            "scene-detail": (
+                "GET", get(lambda rng, f: f"/api/scenes/{rng.choice(f['scenes'])}/")
+            ),
+            "lesson-list": ("GET", get(lambda rng, f: "/api/lessons/")),
+            "lesson-detail": (
+                "GET", get(lambda rng, f: f"/api/lessons/{rng.choice(f['lessons'])}/")
+            ),
+            "lesson-bundle": (
+                "GET", get(lambda rng, f: f"/api/lessons/{rng.choice(f['lessons'])}/bundle/")
+            ),
+            "phrase-list": (
+                "GET", get(lambda rng, f: f"/api/phrases/?scene={rng.choice(f['scenes'])}")
+            ),
+            "phrase-detail": (
+                "GET", get(lambda rng, f: f"/api/phrases/{rng.choice(f['phrases'])}/")
+            ),
+            "dialogue-list": (
+                "GET", get(lambda rng, f: f"/api/dialogues/?scene={rng.choice(f['scenes'])}")
+            ),
+            "dialogue-detail": (
+                "GET", get(lambda rng, f: f"/api/dialogues/{rng.choice(f['dialogues'])}/")
+            ),
+            "search": (
+                "GET", get(lambda rng, f: f"/api/search/?q={rng.choice(WORDS)}+{rng.choice(WORDS)}")
+            ),
+            "progress-my-progress": ("GET", get(lambda rng, f: "/api/progress/my_progress/")),
+            "progress-summary": ("GET", get(lambda rng, f: "/api/progress/summary/")),
+            "progress-complete-lesson": (
+                "POST",
+                lambda rng, f: (
+                    "/api/progress/complete_lesson/",
+                    {
+                        "lesson_id": rng.choice(f["lessons"]),
+                        "score": rng.randint(0, 100),
+                        "time_spent": 60,
+                    },
+                ),
+            ),
+            "progress-sync": ("POST", lambda rng, f: ("/api/progress/sync/", records(rng, f))),
+            "review-next": ("GET", get(lambda rng, f: "/api/review/next/?limit=20")),
+            "review-answer": (
+                "POST",
+                lambda rng, f: (
+                    "/api/review/answer/",
+                    {
+                        "answers": [
+                            {"phrase_id": phrase_id, "grade": rng.randint(0, 5)}
+                            for phrase_id in rng.sample(f["phrases"], min(10, len(f["phrases"])))
+                        ]
+                    },
+                ),
+            ),
+        }
+
+    async def request(self, application, method, target, body, headers):
+        path, _, query = target.partition("?")
+        payload = json.dumps(body).encode() if body is not None else b""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", self.host),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+                *headers,
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("127.0.0.1", 80),
+        }
+        received = False
+        status = None
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            # 切断の待ち受け（レスポンスを返し終えると Django が取り消す）
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await application(scope, receive, send)
+        return status
+
+    async def run(self, endpoints, fixtures, requests, warmup):
+        from engineer_english.asgi import application
+
+        self.host = next(
+            (host.lstrip(".") for host in settings.ALLOWED_HOSTS if host not in ("*", "")),
+            "localhost",
+        ).encode()
+        results = {}
+        for name, (method, build) in endpoints.items():
+            rng = random.Random(f"{name}:{self.rng.random()}")
+            plan = [build(rng, fixtures) for _ in range(warmup + requests)]
+            headers = fixtures["clients"][0]["headers"]
+            for target, body in plan[:warmup]:
+                await self.request(application, method, target, body, headers)
+            # 全クライアントで残りの requests 件を分け合う（閉ループ）
+            pending = iter(plan[warmup:])
+            latencies = []
+            errors = {}
+
+            async def worker(client):
+                for target, body in pending:
+                    started = time.perf_counter()
+                    status = await self.request(
+                        application, method, target, body, client["headers"]
+                    )
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    if status >= 400:
+                        errors[status] = errors.get(status, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for client in fixtures["clients"]))
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                "method": method,
+                "requests": len(latencies),
+                "errors": errors,
+                "throughput_rps": round(len(latencies) / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p90_ms": round(percentile(latencies, 90), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(max(latencies), 2),
+            }
+            result = results[name]
+            self.log(
+                f"{name}: {result['throughput_rps']} req/s, p50 {result['p50_ms']} ms, "
+                f"p99 {result['p99_ms']} ms, errors {sum(errors.values())}"
+            )
+        return results
+
+    def compare(self, results, path):
+        # 前回のレポートとの比（1.0 より大きいほど今回が遅い / スループットが高い）
+        with open(path) as f:
+            baseline = json.load(f)
+        changes = {"commit": baseline.get("meta", {}).get("commit"), "endpoints": {}}
+        for name, result in results.items():
+            before = baseline.get("endpoints", {}).get(name)
+            if not before:
+                continue
+            changes["endpoints"][name] = {
+                key: round(result[key] / before[key], 3) if before[key] else None
+                for key in ("throughput_rps", "p50_ms", "p99_ms")
+            }
+        return changes
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.query_plans import SUPPORTED_VENDORS, check_endpoints, create_fixtures
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on every query issued by the core API endpoints and fail if any falls back to a full table scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verbose-plans", action="store_true", help="Print every query plan."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(f"Unsupported database vendor: {connection.vendor}")
+
+        # サンプルデータを作って各エンドポイントを叩き、最後にロールバックする。
+        # テスト用クライアントのホスト（testserver）は ALLOWED_HOSTS に無いことが多いので足す
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            fixtures = create_fixtures()
+            client = Client()
+            client.force_login(fixtures["user"])
+            checked, failures, plans = check_endpoints(client, fixtures)
+            transaction.set_rollback(True)
+
+        if options["verbose_plans"]:
+            for label, sql, plan in plans:
+                self.stdout.write(f"{label}\n  {sql}\n  {plan}")
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f"{len(failures)} query plan problem(s) found.")
+        self.stdout.write(
+            self.style.SUCCESS(f"Query plans OK ({checked} queries checked).")
+        )
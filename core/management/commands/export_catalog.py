@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog_export import ExportError, brotli, export_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Export every scene, lesson bundle and search shard as content-hashed static JSON "
+        "(with .gz and .br copies) plus manifest.json. Files that already exist are not rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir", help="Directory to write the catalog into")
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete files listed in the previous manifest that are no longer referenced",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = export_catalog(options["output_dir"], prune=options["prune"])
+        except (OSError, ExportError) as exc:
+            raise CommandError(str(exc))
+
+        if brotli is None:
+            self.stdout.write("brotli is not installed; wrote .gz copies only.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Exported {documents} documents to {path} (version {version}): "
+                "{written} files written, {unchanged} documents unchanged, {pruned} files pruned, "
+                "manifest {manifest}.".format(
+                    path=options["output_dir"],
+                    manifest="updated" if result["manifest_updated"] else "unchanged",
+                    **result,
+                )
+            )
+        )
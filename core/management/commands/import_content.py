@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.content_packs import PackError, import_pack
+
+
+class Command(BaseCommand):
+    help = "Import content packs (scenes -> lessons -> phrases/dialogues) from JSON Lines or YAML files. Unchanged packs are skipped by checksum."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Pack files (.jsonl / .yaml)")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Scenes applied per transaction (default: 200)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-apply packs even if their checksum is unchanged",
+        )
+
+    def handle(self, *args, **options):
+        for path in options["paths"]:
+            try:
+                result = import_pack(
+                    path, batch_size=options["batch_size"], force=options["force"]
+                )
+            except (OSError, PackError) as exc:
+                raise CommandError(str(exc))
+
+            if result["skipped"]:
+                self.stdout.write(f"{result['name']}: unchanged, skipped.")
+                continue
+            created = result["created"]
+            updated = result["updated"]
+            deleted = result["deleted"]
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "{name}: {scenes} scenes imported: +{s} scenes, +{l} lessons, +{p} phrases, +{d} dialogues "
+                    "(updated {up_l} lessons, {up_p} phrases, {up_d} dialogues; deleted {del_p} phrases, {del_d} dialogues).".format(
+                        name=result["name"],
+                        scenes=result["scenes"],
+                        s=created.get("scene", 0),
+                        l=created.get("lesson", 0),
+                        p=created.get("phrase", 0),
+                        d=created.get("dialogue", 0),
+                        up_l=updated.get("lesson", 0),
+                        up_p=updated.get("phrase", 0),
+                        up_d=updated.get("dialogue", 0),
+                        del_p=deleted.get("phrase", 0),
+                        del_d=deleted.get("dialogue", 0),
+                    )
+                )
+            )
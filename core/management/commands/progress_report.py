@@ -0,0 +1,26 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.analytics import FORMATS, REPORTS, iter_report
+
+
+class Command(BaseCommand):
+    help = "Report per-lesson / per-scene progress statistics (count, mean, p50/p90 of score and time_spent) or the lesson completion funnel per scene. Aggregation runs in the database and rows are streamed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("report", choices=REPORTS, help="lessons, scenes or funnel")
+        parser.add_argument(
+            "--output", choices=list(FORMATS), default="csv", help="Output format (default: csv)"
+        )
+        parser.add_argument("--file", help="Write to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        stream, _content_type = FORMATS[options["output"]]
+        out = open(options["file"], "w", newline="", encoding="utf-8") if options["file"] else sys.stdout
+        try:
+            for chunk in stream(iter_report(options["report"])):
+                out.write(chunk)
+        finally:
+            if options["file"]:
+                out.close()
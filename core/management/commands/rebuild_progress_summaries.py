@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user and per-user x scene progress summaries from UserProgress."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Rows read and inserted per batch (default: 2000)",
+        )
+
+    def handle(self, *args, **options):
+        result = rebuild_summaries(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt progress summaries: {result['users']} users, {result['scenes']} user x scene rows."
+            )
+        )
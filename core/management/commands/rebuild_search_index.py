@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+
+from core.models import Phrase
+from core.search import SEARCH_TABLE, create_search_table, has_search_table, reindex
+
+
+class Command(BaseCommand):
+    help = "Rebuild the phrase/dialogue full-text search index (SQLite FTS5)."
+
+    def handle(self, *args, **options):
+        using = router.db_for_write(Phrase)
+        connection = connections[using]
+        if connection.vendor != "sqlite":
+            self.stdout.write("Search uses pg_trgm indexes on the source tables; nothing to rebuild.")
+            return
+        if not has_search_table(connection):
+            create_search_table(connection)
+        with transaction.atomic(using=using):
+            reindex(using=using)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+            count = cursor.fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index: {count} rows."))
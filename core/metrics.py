@@ -0,0 +1,271 @@
+import bisect
+import math
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# リクエストごとの計測（METRICS_ENABLED）: 全体の時間・SQL の件数と時間・レンダリング時間・
+# レスポンスのバイト数を、ビュー名（scene-list、review-next など）とメソッドごとに
+# プロセス内のヒストグラムへ記録し、Server-Timing ヘッダーでも返す。
+# 集計はプロセスごと（uvicorn のワーカーや Lambda のコンテナごと）で、/api/_metrics/ で読める。
+# SQL は接続ごとに1回だけ差し込むラッパーで数え、リクエスト単位の集計先は ContextVar で渡す
+# （リクエストごとに execute_wrapper を付け外しするより安い）。
+
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    # 固定バケットの累積ヒストグラム（ラベルの組ごと）。分位数はバケット内の線形補間で求める
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        # 呼び出し側で _lock を取っておく
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def snapshot(self):
+        return {
+            labels: (list(counts), total, count)
+            for labels, (counts, total, count) in self.series.items()
+        }
+
+    def quantile(self, counts, count, q):
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    # +Inf のバケットは上限が無いので最後の境界を返す
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return 0.0
+
+
+LABELS = ("view", "method")
+
+REQUEST_DURATION = Histogram(
+    "ee_http_request_duration_seconds", "Wall time of a request", DURATION_BUCKETS
+)
+DB_DURATION = Histogram(
+    "ee_http_request_db_seconds", "Time spent in SQL per request", DURATION_BUCKETS
+)
+DB_QUERIES = Histogram("ee_http_request_db_queries", "SQL queries per request", QUERY_BUCKETS)
+RENDER_DURATION = Histogram(
+    "ee_http_request_render_seconds", "Time spent rendering the response body", DURATION_BUCKETS
+)
+RESPONSE_BYTES = Histogram(
+    "ee_http_response_bytes", "Response body size (non-streaming)", BYTES_BUCKETS
+)
+HISTOGRAMS = (REQUEST_DURATION, DB_DURATION, DB_QUERIES, RENDER_DURATION, RESPONSE_BYTES)
+
+_lock = threading.Lock()
+_status_counts = {}
+_current = ContextVar("request_metrics", default=None)
+
+
+def reset_metrics():
+    with _lock:
+        for histogram in HISTOGRAMS:
+            histogram.series.clear()
+        _status_counts.clear()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_started = None
+        self.render_seconds = 0.0
+
+    def rendered(self, response):
+        self.render_seconds = time.perf_counter() - self.render_started
+
+    def record(self, labels, status, total, response_bytes):
+        with _lock:
+            REQUEST_DURATION.observe(labels, total)
+            DB_DURATION.observe(labels, self.db_seconds)
+            DB_QUERIES.observe(labels, self.queries)
+            RENDER_DURATION.observe(labels, self.render_seconds)
+            if response_bytes is not None:
+                RESPONSE_BYTES.observe(labels, response_bytes)
+            key = (*labels, status)
+            _status_counts[key] = _status_counts.get(key, 0) + 1
+
+
+def record_sql(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_seconds += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    # connection_created で呼ばれる。接続オブジェクトは再接続しても同じなので重複させない
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+def server_timing(metrics, total):
+    app = max(0.0, total - metrics.db_seconds - metrics.render_seconds)
+    return ", ".join(
+        [
+            f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.queries} queries"',
+            f"render;dur={metrics.render_seconds * 1000:.2f}",
+            f"app;dur={app * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ]
+    )
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # ASGI では async のまま次へ渡す（同期にすると以降のミドルウェアとビューが丸ごとスレッドで動く）
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = request._metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = request._metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def finish(self, request, response, metrics, started):
+        total = time.perf_counter() - started
+        # ストリーミングは本文を返し始めるまでを計測する（本文の生成中の SQL は含まない）
+        metrics.record(
+            (view_label(request), request.method),
+            f"{response.status_code // 100}xx",
+            total,
+            None if response.streaming else len(response.content),
+        )
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = server_timing(metrics, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF の Response はビューの後で描画される（JSON へのエンコード）。描画の前後を計る
+        metrics = getattr(request, "_metrics", None)
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(metrics.rendered)
+        return response
+
+    async def _aprocess_template_response(self, request, response):
+        # 中身は同期版と同じだが、コルーチンにしておくと Django がスレッドに渡さない
+        return MetricsMiddleware.process_template_response(self, request, response)
+
+
+def render_timed(request, render):
+    # ビューの中で描画するレスポンス（async ビューの JSON）の描画時間を計る
+    metrics = getattr(request, "_metrics", None)
+    if metrics is None:
+        return render()
+    metrics.render_started = time.perf_counter()
+    content = render()
+    metrics.rendered(None)
+    return content
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, **extra):
+    pairs = [*zip(names, values), *extra.items()]
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _bound(value):
+    return "+Inf" if math.isinf(value) else str(value)
+
+
+def render_prometheus():
+    # Prometheus のテキスト形式（0.0.4）。ヒストグラムに加え、p50/p95/p99 を summary として出す
+    lines = []
+    with _lock:
+        status_counts = dict(_status_counts)
+        snapshots = [(histogram, histogram.snapshot()) for histogram in HISTOGRAMS]
+    lines.append("# HELP ee_http_requests_total Requests by view, method and status class")
+    lines.append("# TYPE ee_http_requests_total counter")
+    for key, count in sorted(status_counts.items()):
+        lines.append(f"ee_http_requests_total{_labels((*LABELS, 'status'), key)} {count}")
+
+    for histogram, snapshot in snapshots:
+        series = sorted(snapshot.items())
+        lines.append(f"# HELP {histogram.name} {histogram.help_text}")
+        lines.append(f"# TYPE {histogram.name} histogram")
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip((*histogram.buckets, math.inf), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{histogram.name}_bucket{_labels(LABELS, labels, le=_bound(bound))} {cumulative}"
+                )
+            lines.append(f"{histogram.name}_sum{_labels(LABELS, labels)} {total}")
+            lines.append(f"{histogram.name}_count{_labels(LABELS, labels)} {count}")
+
+        name = f"{histogram.name}_quantiles"
+        lines.append(f"# HELP {name} {histogram.help_text} (estimated from the buckets)")
+        lines.append(f"# TYPE {name} summary")
+        for labels, (counts, total, count) in series:
+            for q in QUANTILES:
+                value = histogram.quantile(counts, count, q)
+                lines.append(f"{name}{_labels(LABELS, labels, quantile=q)} {value}")
+            lines.append(f"{name}_sum{_labels(LABELS, labels)} {total}")
+            lines.append(f"{name}_count{_labels(LABELS, labels)} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_dialogue_lesson_phrase_lesson'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dialogue',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='phrase',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
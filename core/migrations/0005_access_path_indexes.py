@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dialogue',
+            index=models.Index(fields=['scene', 'order', 'id'], name='dialogue_scene_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dialogue',
+            index=models.Index(fields=['lesson', 'scene', 'order', 'id'], name='dialogue_lesson_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='phrase',
+            index=models.Index(fields=['scene', 'id'], name='phrase_scene_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='phrase',
+            index=models.Index(fields=['lesson', 'scene', 'id'], name='phrase_lesson_scene_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprogress',
+            index=models.Index(fields=['user', '-completed_at', '-id'], name='progress_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentPack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('checksum', models.CharField(max_length=64)),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0007_progresssynckey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserProgressSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('lessons_completed', models.PositiveIntegerField(default=0)),
+                ('best_score', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0, help_text='平均スコア算出用の合計')),
+                ('time_spent', models.PositiveIntegerField(default=0, help_text='学習時間の合計（秒）')),
+                ('current_streak', models.PositiveIntegerField(default=0, help_text='last_active_date までの連続学習日数')),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_active_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SceneProgressSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lessons_completed', models.PositiveIntegerField(default=0)),
+                ('best_score', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0, help_text='平均スコア算出用の合計')),
+                ('time_spent', models.PositiveIntegerField(default=0, help_text='学習時間の合計（秒）')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('scene', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_summaries', to='core.scene')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scene_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'scene'), name='scene_summary_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# 全文検索の索引（SQLite: FTS5 trigram の仮想テーブル、Postgres: pg_trgm の GIN 索引）。
+# マイグレーションは core.search に依存せず、この時点の DDL と履歴モデルだけで作る
+SEARCH_TABLE = "core_search"
+TRGM_INDEXES = (
+    ("core_phrase", "text_en"),
+    ("core_phrase", "text_ja"),
+    ("core_dialogue", "line_en"),
+    ("core_dialogue", "line_ja"),
+)
+
+
+def _source_sql(apps, schema_editor):
+    # rowid = id * 2 + 種別（0: phrase, 1: dialogue）
+    quote = schema_editor.quote_name
+    selects = []
+    for kind, (model_name, en, ja) in enumerate(
+        (("Phrase", "text_en", "text_ja"), ("Dialogue", "line_en", "line_ja"))
+    ):
+        opts = apps.get_model("core", model_name)._meta
+        columns = [quote(opts.get_field(name).column) for name in ("id", en, ja, "scene")]
+        selects.append(
+            f"SELECT {columns[0]} * 2 + {kind}, {columns[1]}, {columns[2]}, {columns[3]} "
+            f"FROM {quote(opts.db_table)}"
+        )
+    return " UNION ALL ".join(selects)
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+                "USING fts5(en, ja, scene_id UNINDEXED, tokenize = 'trigram')"
+            )
+        except OperationalError:
+            # FTS5 / trigram トークナイザが無い SQLite では部分一致検索で代替する
+            return
+        schema_editor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, en, ja, scene_id) "
+            + _source_sql(apps, schema_editor)
+        )
+    elif connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, column in TRGM_INDEXES:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_{column}_trgm "
+                f"ON {table} USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    elif connection.vendor == "postgresql":
+        for table, column in TRGM_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_{column}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_progress_summaries'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhraseReviewState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ease', models.PositiveSmallIntegerField(default=2500, help_text='易しさ係数 × 1000')),
+                ('interval', models.PositiveIntegerField(default=0, help_text='次回までの間隔（日）')),
+                ('repetitions', models.PositiveSmallIntegerField(default=0, help_text='連続正解回数')),
+                ('lapses', models.PositiveSmallIntegerField(default=0, help_text='忘れた回数')),
+                ('due_at', models.DateTimeField()),
+                ('last_reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('phrase', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_states', to='core.phrase')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'due_at'], name='review_user_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'phrase'), name='review_state_unique')],
+            },
+        ),
+    ]
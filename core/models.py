@@ -1,9 +1,44 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .cache import bump_content_version
+
+
+class CatalogQuerySet(models.QuerySet):
+    # update() / bulk_update() / bulk_create() は auto_now も post_save も通らないので、
+    # updated_at を進め（ETag 用）、コミット後にコンテンツバージョンを上げる（キャッシュ・断片用）
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        rows = super().update(**kwargs)
+        if rows:
+            transaction.on_commit(bump_content_version, using=self.db)
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        if "updated_at" not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields = [*fields, "updated_at"]
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        if rows:
+            transaction.on_commit(bump_content_version, using=self.db)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            transaction.on_commit(bump_content_version, using=self.db)
+        return created
 
 
 class Scene(models.Model):
     title = models.CharField(max_length=120)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CatalogQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -13,6 +48,9 @@ class Lesson(models.Model):
     scene = models.ForeignKey(Scene, on_delete=models.CASCADE, related_name="lessons")
     title = models.CharField(max_length=120)
     description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CatalogQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -31,6 +69,16 @@ class Phrase(models.Model):
     text_en = models.CharField(max_length=255)
     text_ja = models.CharField(max_length=255)
     note = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CatalogQuerySet.as_manager()
+
+    class Meta:
+        # PhraseViewSet の ?scene= / ?lesson= 絞り込みとカーソル順 (scene_id, id) 用
+        indexes = [
+            models.Index(fields=["scene", "id"], name="phrase_scene_idx"),
+            models.Index(fields=["lesson", "scene", "id"], name="phrase_lesson_scene_idx"),
+        ]
 
     def __str__(self):
         return self.text_en
@@ -50,9 +98,19 @@ class Dialogue(models.Model):
     line_en = models.TextField()
     line_ja = models.TextField()
     order = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CatalogQuerySet.as_manager()
 
     class Meta:
         ordering = ["order"]
+        # DialogueViewSet の絞り込みとカーソル順 (scene_id, order, id) 用
+        indexes = [
+            models.Index(fields=["scene", "order", "id"], name="dialogue_scene_order_idx"),
+            models.Index(
+                fields=["lesson", "scene", "order", "id"], name="dialogue_lesson_order_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.order}: {self.speaker}"
@@ -66,10 +124,103 @@ class UserProgress(models.Model):
     completed_at = models.DateTimeField(auto_now_add=True)
     score = models.PositiveIntegerField(default=0, help_text="学習スコア（0-100）")
     time_spent = models.PositiveIntegerField(default=0, help_text="学習時間（秒）")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ["user", "lesson"]
         ordering = ["-completed_at"]
+        # my_progress（ユーザー絞り込み + 新しい順のカーソル）用
+        indexes = [
+            models.Index(
+                fields=["user", "-completed_at", "-id"], name="progress_user_recent_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.lesson.title} ({self.completed_at.strftime('%Y-%m-%d')})"
+
+
+class ContentPack(models.Model):
+    # import_content で取り込んだコンテンツパック（チェックサムが同じなら再取り込みしない）
+    name = models.CharField(max_length=200, unique=True)
+    checksum = models.CharField(max_length=64)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ProgressSyncKey(models.Model):
+    # progress/sync で適用済みのレコード（冪等キー）。再送されたレコードは適用しない
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="progress_sync_keys")
+    key = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="progress_sync_key_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
+
+
+class SceneProgressSummary(models.Model):
+    # ユーザー × シーンの進捗集計（core.summaries が complete_lesson / sync のたびに更新する）
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="scene_summaries")
+    scene = models.ForeignKey(Scene, on_delete=models.CASCADE, related_name="progress_summaries")
+    lessons_completed = models.PositiveIntegerField(default=0)
+    best_score = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0, help_text="平均スコア算出用の合計")
+    time_spent = models.PositiveIntegerField(default=0, help_text="学習時間の合計（秒）")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scene"], name="scene_summary_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.scene_id} ({self.lessons_completed})"
+
+
+class UserProgressSummary(models.Model):
+    # ユーザー単位の進捗集計（シーン別集計の合計 + 連続学習日数）
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="progress_summary"
+    )
+    lessons_completed = models.PositiveIntegerField(default=0)
+    best_score = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0, help_text="平均スコア算出用の合計")
+    time_spent = models.PositiveIntegerField(default=0, help_text="学習時間の合計（秒）")
+    current_streak = models.PositiveIntegerField(default=0, help_text="last_active_date までの連続学習日数")
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} ({self.lessons_completed})"
+
+
+class PhraseReviewState(models.Model):
+    # ユーザー × フレーズの復習状態（core.review が SM-2 で回答ごとに更新する）
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="review_states")
+    phrase = models.ForeignKey(Phrase, on_delete=models.CASCADE, related_name="review_states")
+    ease = models.PositiveSmallIntegerField(default=2500, help_text="易しさ係数 × 1000")
+    interval = models.PositiveIntegerField(default=0, help_text="次回までの間隔（日）")
+    repetitions = models.PositiveSmallIntegerField(default=0, help_text="連続正解回数")
+    lapses = models.PositiveSmallIntegerField(default=0, help_text="忘れた回数")
+    due_at = models.DateTimeField()
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "phrase"], name="review_state_unique"),
+        ]
+        # review/next（ユーザーの期限切れカードを期限順に）用
+        indexes = [
+            models.Index(fields=["user", "due_at"], name="review_user_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.phrase_id} (due {self.due_at:%Y-%m-%d})"
@@ -0,0 +1,146 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .renderers import EncodedJSON, encode_json
+
+
+def concrete_field(model, name):
+    # "scene" / "scene_id" のどちらでも実カラムのフィールドを返す
+    for field in model._meta.concrete_fields:
+        if name in (field.name, field.attname):
+            return field
+    raise ValueError(name)
+
+
+# インデックス列の組 (例: completed_at, id) によるキーセット（カーソル）ページング。
+# OFFSET を使わないため深いページでも一定コストで、途中に新しい行が書き込まれても
+# 既に返した行が次ページへずれ込むことがない。
+class KeysetPagination(BasePagination):
+    ordering = ("id",)
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "カーソルが不正です"
+
+    def get_page_size(self, request):
+        page_size = settings.API_PAGE_SIZE
+        value = request.query_params.get(self.page_size_query_param)
+        if value:
+            try:
+                page_size = int(value)
+            except ValueError:
+                pass
+        return max(1, min(page_size, settings.API_MAX_PAGE_SIZE))
+
+    def get_ordering(self, view):
+        return getattr(view, "keyset_ordering", self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        return self.finish_page(list(queryset[: self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        return self.finish_page([row async for row in queryset[: self.page_size + 1]])
+
+    def page_queryset(self, queryset, request, view):
+        # 1ページ分（+1件）を取る QuerySet を組み立てる（ここでは SQL を実行しない）
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+        fields = [
+            concrete_field(queryset.model, name.lstrip("-")) for name in self.ordering
+        ]
+        self.keys = [field.attname for field in fields]
+
+        # only() で絞られていてもキー列は必ず読み込む
+        loading, deferred = queryset.query.deferred_loading
+        if loading and not deferred:
+            queryset = queryset.only(*loading, *self.keys)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request, fields)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+        return queryset
+
+    def finish_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.next_cursor = (
+            self.encode_cursor([getattr(rows[-1], key) for key in self.keys])
+            if self.has_next
+            else None
+        )
+        return rows
+
+    def after(self, values):
+        # (a, b, c) > (x, y, z) を OR 条件に展開（各列の昇順/降順を考慮）
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            key = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{key}__{lookup}": value})
+            equal &= Q(**{key: value})
+        # 先頭列の範囲条件を重ねて、OR 展開でも索引の範囲検索が効くようにする
+        first = self.ordering[0]
+        lookup = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{lookup}": values[0]}) & condition
+
+    def encode_cursor(self, values):
+        raw = json.dumps([str(v) if v is not None else None for v in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, fields):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            values = json.loads(raw)
+            if len(values) != len(fields):
+                raise ValueError(token)
+            return [field.to_python(v) for field, v in zip(fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if isinstance(data, EncodedJSON):
+            # 断片から組み立てた results（core.fragments）はエンコードし直さずに埋め込む
+            head = encode_json({"next": self.get_next_link(), "next_cursor": self.next_cursor})
+            return Response(EncodedJSON(head[:-1] + b',"results":' + data + b"}"))
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("next_cursor", self.next_cursor),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "next_cursor": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
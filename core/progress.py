@@ -0,0 +1,162 @@
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+
+from .models import Lesson, ProgressSyncKey, UserProgress
+from .summaries import refresh_summaries, scene_lessons
+
+
+class LessonNotFound(Exception):
+    pass
+
+
+def is_foreign_key_violation(exc):
+    # SQLite: "FOREIGN KEY constraint failed" / Postgres: SQLSTATE 23503
+    if getattr(exc.__cause__, "pgcode", None) == "23503":
+        return True
+    return "FOREIGN KEY" in str(exc).upper()
+
+
+def _upsert_sql(connection, rows=1):
+    # (user, lesson) の行を1文で作成/更新する。スコアは高い方を残し、学習時間は最新の値にする
+    quote = connection.ops.quote_name
+    table = quote(UserProgress._meta.db_table)
+    greatest = "GREATEST" if connection.vendor == "postgresql" else "MAX"
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * rows)
+    return (
+        f"INSERT INTO {table} (user_id, lesson_id, completed_at, score, time_spent, updated_at) "
+        f"VALUES {values} "
+        "ON CONFLICT (user_id, lesson_id) DO UPDATE SET "
+        f"score = {greatest}({table}.score, excluded.score), "
+        "time_spent = excluded.time_spent, "
+        "updated_at = excluded.updated_at "
+        "RETURNING id, user_id, lesson_id, completed_at, score, time_spent, updated_at"
+    )
+
+
+def upsert_progress(user_id, lesson_id, score, time_spent):
+    # 事前の SELECT なしで進捗を記録する（同じユーザーの同時送信でもスコアを取りこぼさない）。
+    # 存在しないレッスンは外部キー制約か集計時のシーン検索で検出し、LessonNotFound を送出する
+    # （読み取り専用カタログ構成ではレッスンが別 DB にあり外部キーで検証できない）。
+    using = router.db_for_write(UserProgress)
+    connection = connections[using]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    try:
+        # SQLite / Postgres の外部キーは DEFERRABLE なので、違反はコミット時に検出される
+        with transaction.atomic(using=using):
+            rows = list(
+                UserProgress.objects.raw(
+                    _upsert_sql(connection),
+                    [user_id, lesson_id, now, score, time_spent, now],
+                    using=using,
+                )
+            )
+            # 同じトランザクションでユーザー × シーンとユーザーの集計を更新する
+            scenes = scene_lessons([lesson_id])
+            if not scenes:
+                raise LessonNotFound(lesson_id)
+            refresh_summaries(user_id, scenes)
+    except IntegrityError as exc:
+        # CHECK 制約などの違反は入力の検証漏れなのでそのまま送出する
+        if not is_foreign_key_violation(exc):
+            raise
+        raise LessonNotFound(lesson_id) from exc
+    return rows[0]
+
+
+def _claim_keys(connection, user_id, keys, now):
+    # 冪等キーを登録し、今回初めて登録できた（= 未適用の）キーだけを返す
+    quote = connection.ops.quote_name
+    table = quote(ProgressSyncKey._meta.db_table)
+    claimed = set()
+    batch = connection.ops.bulk_batch_size(["user_id", "key", "created_at"], keys)
+    with connection.cursor() as cursor:
+        for start in range(0, len(keys), batch):
+            chunk = keys[start : start + batch]
+            values = ", ".join(["(%s, %s, %s)"] * len(chunk))
+            params = [p for key in chunk for p in (user_id, key, now)]
+            cursor.execute(
+                f"INSERT INTO {table} (user_id, {quote('key')}, created_at) VALUES {values} "
+                f"ON CONFLICT (user_id, {quote('key')}) DO NOTHING RETURNING {quote('key')}",
+                params,
+            )
+            claimed.update(row[0] for row in cursor.fetchall())
+    return claimed
+
+
+def _merge_records(records, now):
+    # 同じレッスンのレコードを1行にまとめる（スコアは最大、学習時間は最新の client_ts のもの）
+    merged = {}
+    for record in records:
+        ts = min(record.get("client_ts") or now, now)
+        current = merged.get(record["lesson_id"])
+        if current is None:
+            merged[record["lesson_id"]] = {
+                "score": record["score"],
+                "time_spent": record["time_spent"],
+                "first_ts": ts,
+                "last_ts": ts,
+            }
+            continue
+        current["score"] = max(current["score"], record["score"])
+        if ts >= current["last_ts"]:
+            current["time_spent"] = record["time_spent"]
+            current["last_ts"] = ts
+        current["first_ts"] = min(current["first_ts"], ts)
+    return merged
+
+
+def sync_progress(user_id, records):
+    # オフライン中に溜まった学習完了をまとめて反映する（1トランザクション）。
+    # records: ProgressSyncRecordSerializer で検証済みのレコード
+    # 冪等キーが適用済みのレコードと、存在しないレッスンのレコードは反映しない。
+    using = router.db_for_write(UserProgress)
+    connection = connections[using]
+    now = timezone.now()
+
+    lesson_ids = {record["lesson_id"] for record in records}
+    known = set(Lesson.objects.filter(id__in=lesson_ids).values_list("id", flat=True))
+    rejected = sorted({r["idempotency_key"] for r in records if r["lesson_id"] not in known})
+
+    # 同じキーが複数回あれば最初のものだけを使う
+    by_key = {}
+    for record in records:
+        if record["lesson_id"] in known:
+            by_key.setdefault(record["idempotency_key"], record)
+
+    db_now = connection.ops.adapt_datetimefield_value(now)
+    with transaction.atomic(using=using):
+        claimed = _claim_keys(connection, user_id, list(by_key), db_now) if by_key else set()
+        merged = _merge_records([r for key, r in by_key.items() if key in claimed], now)
+        rows = [
+            (
+                user_id,
+                lesson_id,
+                # 新規作成時の完了日時は端末で最初に完了した時刻
+                connection.ops.adapt_datetimefield_value(item["first_ts"]),
+                item["score"],
+                item["time_spent"],
+                db_now,
+            )
+            for lesson_id, item in sorted(merged.items())
+        ]
+        batch = connection.ops.bulk_batch_size(["f"] * 6, rows)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch):
+                chunk = rows[start : start + batch]
+                cursor.execute(
+                    _upsert_sql(connection, len(chunk)), [p for row in chunk for p in row]
+                )
+        if claimed:
+            refresh_summaries(user_id, scene_lessons(list(merged)))
+        progress = list(
+            UserProgress.objects.using(using)
+            .filter(user_id=user_id, lesson_id__in=known)
+            .only("lesson_id", "score", "time_spent", "completed_at")
+            .order_by("lesson_id")
+        )
+    return {
+        "applied": len(claimed),
+        "duplicates": sum(1 for r in records if r["lesson_id"] in known) - len(claimed),
+        "rejected": rejected,
+        "progress": progress,
+    }
@@ -0,0 +1,157 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .cache import get_catalog_cache
+from .models import Dialogue, Lesson, Phrase, Scene, UserProgress
+
+# API の各エンドポイントが発行する SELECT を EXPLAIN し、索引を使わないフルスキャンを探す。
+# manage.py check_query_plans と core/tests/test_query_plans.py が使う。
+
+# フルスキャン（索引の全件走査を含む）を許容するエンドポイントとテーブル、その理由
+ALLOWED_SCANS = {
+    "GET /api/scenes/": {"core_scene": "シーン一覧はページングせず全シーンを返す仕様"},
+    "GET /api/lessons/": {"core_lesson": "レッスン一覧はページングせず全レッスンを返す仕様"},
+}
+SUPPORTED_VENDORS = ("sqlite", "postgresql")
+
+
+def create_fixtures():
+    user = User.objects.create(username="__query_plan_check__")
+    scene = Scene.objects.create(title="plan-check")
+    lesson = Lesson.objects.create(scene=scene, title="plan-check")
+    phrase = Phrase.objects.create(scene=scene, lesson=lesson, text_en="a", text_ja="a")
+    Dialogue.objects.create(
+        scene=scene, lesson=lesson, speaker="PM", line_en="a", line_ja="a", order=1
+    )
+    UserProgress.objects.create(user=user, lesson=lesson, score=10)
+    return {"user": user, "scene": scene, "lesson": lesson, "phrase": phrase}
+
+
+def endpoints(fixtures):
+    scene_id = fixtures["scene"].id
+    lesson_id = fixtures["lesson"].id
+    return [
+        ("get", "/api/scenes/", None),
+        ("get", f"/api/scenes/{scene_id}/", None),
+        ("get", "/api/lessons/", None),
+        ("get", f"/api/lessons/{lesson_id}/", None),
+        ("get", f"/api/lessons/{lesson_id}/bundle/", None),
+        ("get", "/api/phrases/", None),
+        ("get", f"/api/phrases/?scene={scene_id}", None),
+        ("get", f"/api/phrases/?lesson={lesson_id}", None),
+        ("get", "/api/dialogues/", None),
+        ("get", f"/api/dialogues/?scene={scene_id}", None),
+        ("get", f"/api/dialogues/?lesson={lesson_id}", None),
+        ("get", "/api/progress/my_progress/", None),
+        ("get", "/api/progress/summary/", None),
+        (
+            "post",
+            "/api/progress/sync/",
+            {"records": [{"idempotency_key": "plan-check", "lesson_id": lesson_id, "score": 60}]},
+        ),
+        (
+            "post",
+            "/api/progress/complete_lesson/",
+            {"lesson_id": lesson_id, "score": 50, "time_spent": 10},
+        ),
+        (
+            "post",
+            "/api/review/answer/",
+            {"answers": [{"phrase_id": fixtures["phrase"].id, "grade": 4}]},
+        ),
+        ("get", "/api/review/next/", None),
+    ]
+
+
+def is_checked_query(sql):
+    head = sql.lstrip().upper()
+    if not head.startswith("SELECT"):
+        return False
+    # カタログ状態（ETag 用の件数・最終更新）はコンテンツバージョンごとに1回だけ集計する
+    if "COUNT(" in head and "MAX(" in head and " WHERE " not in head:
+        return False
+    return True
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return [row[-1] for row in cursor.fetchall()]
+        # 小さなテーブルでも seq scan を選ばせず、使える索引があるかだけを見る
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql)
+        return cursor.fetchone()[0]
+
+
+def _walk_pg_plan(plan):
+    stack = [entry["Plan"] for entry in plan]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.get("Plans", []))
+
+
+def is_bounded(sql, sorts):
+    # WHERE なしで LIMIT 件だけ索引順に読む（キーセットの1ページ目）。ソートがあれば全件を読む
+    head = sql.upper()
+    return " LIMIT " in head and " WHERE " not in head and not sorts
+
+
+def full_scan(plan, sql, vendor, allowed=None):
+    # 許容されていないフルスキャン（索引の条件なしに表か索引の全体を読むもの）を返す
+    allowed = allowed or {}
+    if vendor == "sqlite":
+        for detail in plan:
+            if not detail.startswith("SCAN ") or detail == "SCAN CONSTANT ROW":
+                continue
+            sorts = any("TEMP B-TREE" in other for other in plan)
+            if detail.split()[1] in allowed or is_bounded(sql, sorts):
+                continue
+            return detail
+        return None
+    sorts = any(node.get("Node Type") == "Sort" for node in _walk_pg_plan(plan))
+    for node in _walk_pg_plan(plan):
+        node_type = node.get("Node Type")
+        table = node.get("Relation Name")
+        if node_type == "Seq Scan":
+            problem = f"Seq Scan on {table}"
+        elif node_type in ("Index Scan", "Index Only Scan") and "Index Cond" not in node:
+            problem = f"{node_type} using {node.get('Index Name')} on {table} without Index Cond"
+        else:
+            continue
+        if table in allowed or is_bounded(sql, sorts):
+            continue
+        return problem
+    return None
+
+
+def check_endpoints(client, fixtures):
+    # client（fixtures["user"] でログイン済み）で各エンドポイントを呼び、
+    # (確認したクエリ数, 問題の一覧, [(エンドポイント, SQL, プラン)]) を返す
+    failures = []
+    plans = []
+    for method, url, data in endpoints(fixtures):
+        label = f"{method.upper()} {url}"
+        get_catalog_cache().clear()
+        with CaptureQueriesContext(connection) as ctx:
+            if method == "post":
+                response = client.post(url, json.dumps(data), content_type="application/json")
+            else:
+                response = client.get(url)
+        if response.status_code >= 400:
+            failures.append(f"{label}: HTTP {response.status_code}")
+            continue
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not is_checked_query(sql):
+                continue
+            plan = explain(sql)
+            plans.append((label, sql, plan))
+            problem = full_scan(plan, sql, connection.vendor, ALLOWED_SCANS.get(label))
+            if problem:
+                failures.append(f"{label}: {problem}\n    {sql}")
+    return len(plans), failures, plans
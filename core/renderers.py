@@ -0,0 +1,59 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson が無い環境では標準の json でエンコードする
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+class EncodedJSON(bytes):
+    # エンコード済みの JSON 本文（core.fragments が組み立てる）。ORJSONRenderer はそのまま返す
+    pass
+
+
+def encode_json(data):
+    # JSONRenderer の既定（UNICODE_JSON・COMPACT_JSON）と同じ形のコンパクトな UTF-8。
+    # datetime などは DRF のエンコーダに任せて、書式（末尾 Z・ミリ秒）を揃える
+    content = None
+    if orjson is not None:
+        try:
+            content = orjson.dumps(
+                data,
+                default=_encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            # 64bit を超える整数など orjson が扱えない値
+            content = None
+    if content is None:
+        content = json.dumps(
+            data,
+            cls=JSONEncoder,
+            ensure_ascii=False,
+            allow_nan=not api_settings.STRICT_JSON,
+            separators=(",", ":"),
+        ).encode()
+    # JSONRenderer と同じく U+2028 / U+2029 はエスケープする（JavaScript の文字列に埋め込めるように）
+    return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+# orjson でエンコードする JSONRenderer（orjson が無ければ標準の json）。EncodedJSON はそのまま返す。
+# インデント付き（ブラウザ表示の API）や UNICODE_JSON / COMPACT_JSON を切った設定では標準の描画に任せる
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent or self.ensure_ascii or not self.compact:
+            if isinstance(data, EncodedJSON):
+                data = json.loads(data)
+            return super().render(data, accepted_media_type, renderer_context)
+        if isinstance(data, EncodedJSON):
+            return bytes(data)
+        return encode_json(data)
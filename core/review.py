@@ -0,0 +1,157 @@
+from datetime import timedelta
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import Phrase, PhraseReviewState, UserProgress
+
+# フレーズの間隔反復（SM-2）。
+# 状態は PhraseReviewState に (user, phrase) ごと1行。回答はまとめて受け取り、
+# 既存の状態を1回読み込んで回答順に1パスで次回の期限を計算し、1回の upsert で書き戻す。
+
+DEFAULT_EASE = 2500
+MIN_EASE = 1300
+# 期限前の回答を繰り返しても列の範囲（smallint）と日付の範囲を超えないように上限を設ける
+MAX_EASE = 5000
+MAX_INTERVAL = 3650
+PASSING_GRADE = 3
+
+STATE_FIELDS = ["ease", "interval", "repetitions", "lapses", "due_at", "last_reviewed_at"]
+
+
+def _new_state(user_id, phrase_id, now):
+    return PhraseReviewState(
+        user_id=user_id,
+        phrase_id=phrase_id,
+        ease=DEFAULT_EASE,
+        interval=0,
+        repetitions=0,
+        lapses=0,
+        due_at=now,
+    )
+
+
+def _apply(state, grade, reviewed_at):
+    # SM-2: 3 未満は忘れたものとして 1日後からやり直し、それ以外は間隔を ease 倍に伸ばす
+    if grade < PASSING_GRADE:
+        state.repetitions = 0
+        state.lapses += 1
+        state.interval = 1
+    else:
+        state.repetitions += 1
+        if state.repetitions == 1:
+            state.interval = 1
+        elif state.repetitions == 2:
+            state.interval = 6
+        else:
+            state.interval = min(
+                MAX_INTERVAL, max(state.interval + 1, round(state.interval * state.ease / 1000))
+            )
+    miss = 5 - grade
+    state.ease = min(MAX_EASE, max(MIN_EASE, state.ease + 100 - miss * (80 + miss * 20)))
+    state.due_at = reviewed_at + timedelta(days=state.interval)
+    state.last_reviewed_at = reviewed_at
+
+
+def schedule(states, user_id, answers, now):
+    # states: phrase_id -> PhraseReviewState（無ければ新規カードとして作る）
+    # 同じフレーズへの複数の回答（オフラインで溜まった分）は回答時刻の順に適用する
+    for answer in sorted(answers, key=lambda a: a["reviewed_at"]):
+        phrase_id = answer["phrase_id"]
+        state = states.get(phrase_id)
+        if state is None:
+            state = states[phrase_id] = _new_state(user_id, phrase_id, now)
+        _apply(state, answer["grade"], answer["reviewed_at"])
+    return states
+
+
+def _upsert_sql(connection, rows):
+    # (user, phrase) の状態を複数行まとめて作成/更新する
+    quote = connection.ops.quote_name
+    table = quote(PhraseReviewState._meta.db_table)
+    columns = ["user_id", "phrase_id", *STATE_FIELDS]
+    values = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * rows)
+    updates = ", ".join(f"{quote(name)} = excluded.{quote(name)}" for name in STATE_FIELDS)
+    return (
+        f"INSERT INTO {table} ({', '.join(quote(name) for name in columns)}) VALUES {values} "
+        f"ON CONFLICT (user_id, phrase_id) DO UPDATE SET {updates}"
+    )
+
+
+def _save_states(connection, states):
+    adapt = connection.ops.adapt_datetimefield_value
+    rows = [
+        (
+            state.user_id,
+            state.phrase_id,
+            state.ease,
+            state.interval,
+            state.repetitions,
+            state.lapses,
+            adapt(state.due_at),
+            adapt(state.last_reviewed_at),
+        )
+        for state in states
+    ]
+    batch = connection.ops.bulk_batch_size(["f"] * 8, rows)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch):
+            chunk = rows[start : start + batch]
+            cursor.execute(_upsert_sql(connection, len(chunk)), [p for row in chunk for p in row])
+
+
+def answer_cards(user_id, answers):
+    # answers: ReviewAnswerSerializer で検証済みの回答。存在しないフレーズへの回答は反映しない
+    now = timezone.now()
+    phrase_ids = {answer["phrase_id"] for answer in answers}
+    known = set(Phrase.objects.filter(id__in=phrase_ids).values_list("id", flat=True))
+    answers = [
+        {**answer, "reviewed_at": min(answer.get("reviewed_at") or now, now)}
+        for answer in answers
+        if answer["phrase_id"] in known
+    ]
+
+    using = router.db_for_write(PhraseReviewState)
+    with transaction.atomic(using=using):
+        states = {
+            state.phrase_id: state
+            for state in PhraseReviewState.objects.using(using)
+            .select_for_update()
+            .filter(user_id=user_id, phrase_id__in=known)
+        }
+        schedule(states, user_id, answers, now)
+        _save_states(connections[using], states.values())
+    return {
+        "updated": len(states),
+        "rejected": sorted(phrase_ids - known),
+        "cards": sorted(states.values(), key=lambda state: state.due_at),
+    }
+
+
+def next_cards(user_id, limit):
+    # 期限切れのカードを期限の古い順に返し、足りない分は完了済みレッスンの未学習フレーズで埋める
+    now = timezone.now()
+    states = PhraseReviewState.objects.filter(user_id=user_id)
+    cards = list(states.filter(due_at__lte=now).order_by("due_at", "id")[:limit])
+    due_count = len(cards) if len(cards) < limit else states.filter(due_at__lte=now).count()
+    if len(cards) < limit:
+        lesson_ids = UserProgress.objects.filter(user_id=user_id).values_list("lesson_id", flat=True)
+        seen = set(states.values_list("phrase_id", flat=True))
+        candidates = Phrase.objects.filter(lesson_id__in=list(lesson_ids)).order_by("lesson_id", "id")
+        for phrase_id in candidates.values_list("id", flat=True).iterator():
+            if phrase_id not in seen:
+                cards.append(_new_state(user_id, phrase_id, now))
+                if len(cards) >= limit:
+                    break
+    attach_phrases(cards)
+    return {"due_count": due_count, "cards": cards}
+
+
+def attach_phrases(cards):
+    # カタログからフレーズを1回で読み込んで付与する（読み取り専用カタログ構成では別 DB）
+    phrases = Phrase.objects.only("id", "lesson_id", "text_en", "text_ja", "note").in_bulk(
+        [card.phrase_id for card in cards]
+    )
+    for card in cards:
+        card.phrase = phrases[card.phrase_id]
+    return cards
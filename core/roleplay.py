@@ -0,0 +1,54 @@
+import asyncio
+import re
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Dialogue
+
+# ロールプレイの返信生成（settings.ROLEPLAY_REPLY_GENERATOR で差し替え可能）。
+# 生成器は接続ごとに1つ作り、load() でシーンを読み込み、stream(message) で返信を
+# トークン単位で返す（message が None なら最初の一言）。hint() は次にユーザーが言う例文。
+
+TOKEN_RE = re.compile(r"\S+\s*")
+
+
+def get_reply_generator(scene_id):
+    return import_string(settings.ROLEPLAY_REPLY_GENERATOR)(scene_id)
+
+
+class DialogueReplyGenerator:
+    # 外部サービスを使わない既定の生成器: シーンの Dialogue を order 順に、
+    # 偶数番目のセリフをアシスタント、奇数番目をユーザーの例文として交互に演じる（決定的）
+    def __init__(self, scene_id):
+        self.scene_id = scene_id
+        self.lines = []
+        self.position = -2
+        self.interval = settings.ROLEPLAY_TOKEN_INTERVAL_MS / 1000
+
+    async def load(self):
+        self.lines = await database_sync_to_async(self._load_lines)()
+        return bool(self.lines)
+
+    def _load_lines(self):
+        return list(
+            Dialogue.objects.filter(scene_id=self.scene_id)
+            .order_by("order", "id")
+            .values("speaker", "line_en", "line_ja")
+        )
+
+    def _line(self, position):
+        return self.lines[position % len(self.lines)]
+
+    async def stream(self, message):
+        self.position += 2
+        line = self._line(self.position)
+        for token in TOKEN_RE.findall(line["line_en"]):
+            if self.interval:
+                await asyncio.sleep(self.interval)
+            yield token
+
+    def hint(self):
+        line = self._line(self.position + 1)
+        return {"speaker": line["speaker"], "en": line["line_en"], "ja": line["line_ja"]}
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import RoleplayConsumer
+
+websocket_urlpatterns = [
+    path("ws/roleplay/<int:scene_id>/", RoleplayConsumer.as_asgi()),
+]
@@ -0,0 +1,217 @@
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Dialogue, Phrase
+
+# フレーズ・対話の全文検索。
+# SQLite: FTS5（trigram トークナイザ、日本語も部分一致）の仮想テーブル core_search を
+#   signals と sync_scenes で本体と同期し、bm25 で順位付けする。
+#   rowid = id * 2 + 種別（0: phrase, 1: dialogue）、scene_id は同期用（検索対象外）。
+# Postgres: 本体テーブルの pg_trgm GIN 索引を使い、similarity で順位付けする（同期不要）。
+
+SEARCH_TABLE = "core_search"
+KINDS = ("phrase", "dialogue")
+MIN_TRIGRAM = 3
+# bm25 で順位付けする一致件数の上限（ありふれた語で全件をスコア計算しないため）
+MAX_CANDIDATES = 1000
+
+_available = {}
+
+
+def has_search_table(connection):
+    # FTS5 / trigram が使えない SQLite ではマイグレーションで作られない
+    if connection.alias not in _available:
+        _available[connection.alias] = SEARCH_TABLE in connection.introspection.table_names()
+    return _available[connection.alias]
+
+
+def forget_search_tables(**kwargs):
+    # post_migrate: マイグレーション（0009 など）で索引テーブルが作られた・消えた後に調べ直す
+    _available.clear()
+
+
+def create_search_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            "USING fts5(en, ja, scene_id UNINDEXED, tokenize = 'trigram')"
+        )
+    _available.pop(connection.alias, None)
+
+
+def drop_search_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    _available.pop(connection.alias, None)
+
+
+def _source_sql(where=""):
+    phrase = Phrase._meta.db_table
+    dialogue = Dialogue._meta.db_table
+    return (
+        f"SELECT id * 2, text_en, text_ja, scene_id FROM {phrase} {where} "
+        f"UNION ALL SELECT id * 2 + 1, line_en, line_ja, scene_id FROM {dialogue} {where}"
+    )
+
+
+def reindex(scene_ids=None, using=None):
+    # 索引を本体から作り直す（scene_ids を指定するとそのシーンの分だけ）
+    using = using or router.db_for_write(Phrase)
+    connection = connections[using]
+    if connection.vendor != "sqlite" or not has_search_table(connection):
+        return
+    with connection.cursor() as cursor:
+        if scene_ids is None:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} (rowid, en, ja, scene_id) {_source_sql()}")
+            return
+        scene_ids = list(scene_ids)
+        if not scene_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(scene_ids))
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE scene_id IN ({placeholders})", scene_ids
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, en, ja, scene_id) "
+            + _source_sql(f"WHERE scene_id IN ({placeholders})"),
+            scene_ids * 2,
+        )
+
+
+def _rowid(instance):
+    return instance.pk * 2 + (1 if isinstance(instance, Dialogue) else 0)
+
+
+def index_instance(instance, using):
+    connection = connections[using]
+    if connection.vendor != "sqlite" or not has_search_table(connection):
+        return
+    if isinstance(instance, Dialogue):
+        en, ja = instance.line_en, instance.line_ja
+    else:
+        en, ja = instance.text_en, instance.text_ja
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [_rowid(instance)])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, en, ja, scene_id) VALUES (%s, %s, %s, %s)",
+            [_rowid(instance), en, ja, instance.scene_id],
+        )
+
+
+def unindex_instance(instance, using):
+    connection = connections[using]
+    if connection.vendor != "sqlite" or not has_search_table(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [_rowid(instance)])
+
+
+def _like_pattern(term):
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _fts_query(terms):
+    # 各語をフレーズとして AND 検索（" はエスケープ）
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _sqlite_search(connection, terms, limit):
+    with connection.cursor() as cursor:
+        if all(len(term) >= MIN_TRIGRAM for term in terms):
+            match = _fts_query(terms)
+            # bm25 は一致した全行から語の出現頻度を数えるため、一致が多すぎる語
+            # （ほぼ全行に現れる語は bm25 でも差が付かない）は先頭の候補を短い順に並べる
+            cursor.execute(
+                f"SELECT COUNT(*) FROM (SELECT rowid FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s LIMIT %s)",
+                [match, MAX_CANDIDATES + 1],
+            )
+            if cursor.fetchone()[0] > MAX_CANDIDATES:
+                cursor.execute(
+                    f"SELECT rowid FROM (SELECT rowid, length(en) + length(ja) AS size "
+                    f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s LIMIT %s) "
+                    "ORDER BY size LIMIT %s",
+                    [match, MAX_CANDIDATES, limit],
+                )
+                return [(rowid % 2, rowid // 2, 0.0) for (rowid,) in cursor.fetchall()]
+            cursor.execute(
+                f"SELECT rowid, bm25({SEARCH_TABLE}) FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s ORDER BY bm25({SEARCH_TABLE}) LIMIT %s",
+                [match, limit],
+            )
+            return [(rowid % 2, rowid // 2, -score) for rowid, score in cursor.fetchall()]
+        # trigram は3文字未満を索引で引けないため LIKE で走査する（順位は付けない）
+        where = " AND ".join(["(en LIKE %s ESCAPE '\\' OR ja LIKE %s ESCAPE '\\')"] * len(terms))
+        params = [p for term in terms for p in (_like_pattern(term),) * 2]
+        cursor.execute(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {where} LIMIT %s", [*params, limit]
+        )
+        return [(rowid % 2, rowid // 2, 0.0) for (rowid,) in cursor.fetchall()]
+
+
+def _postgres_search(connection, terms, limit):
+    query = " ".join(terms)
+    results = []
+    with connection.cursor() as cursor:
+        for kind, model, en, ja in (
+            (0, Phrase, "text_en", "text_ja"),
+            (1, Dialogue, "line_en", "line_ja"),
+        ):
+            where = " AND ".join([f"({en} ILIKE %s OR {ja} ILIKE %s)"] * len(terms))
+            params = [p for term in terms for p in (_like_pattern(term),) * 2]
+            cursor.execute(
+                f"SELECT id, GREATEST(similarity({en}, %s), similarity({ja}, %s)) AS rank "
+                f"FROM {model._meta.db_table} WHERE {where} ORDER BY rank DESC LIMIT %s",
+                [query, query, *params, limit],
+            )
+            results += [(kind, pk, rank) for pk, rank in cursor.fetchall()]
+    results.sort(key=lambda row: row[2], reverse=True)
+    return results[:limit]
+
+
+def search(q, limit=20):
+    # [(種別, id, スコア)] を関連度の高い順に返す。索引が無ければ None
+    terms = q.split()
+    if not terms:
+        return []
+    using = router.db_for_read(Phrase)
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        return _postgres_search(connection, terms, limit)
+    if connection.vendor == "sqlite" and has_search_table(connection):
+        return _sqlite_search(connection, terms, limit)
+    return None
+
+
+def search_objects(q, limit=20):
+    # 検索結果を Phrase / Dialogue のインスタンスで順位どおりに返す
+    hits = search(q, limit)
+    if hits is None:
+        # 全文検索索引が無い環境では部分一致で代替する（件数が多いと遅い）
+        hits = _fallback_hits(q.split(), limit)
+    by_kind = {0: [], 1: []}
+    for kind, pk, _score in hits:
+        by_kind[kind].append(pk)
+    objects = {
+        (0, obj.pk): obj for obj in Phrase.objects.filter(pk__in=by_kind[0])
+    }
+    objects.update(
+        {(1, obj.pk): obj for obj in Dialogue.objects.filter(pk__in=by_kind[1])}
+    )
+    return [
+        (KINDS[kind], objects[(kind, pk)], score)
+        for kind, pk, score in hits
+        if (kind, pk) in objects
+    ]
+
+
+def _fallback_hits(terms, limit):
+    phrase_q = Q()
+    dialogue_q = Q()
+    for term in terms:
+        phrase_q &= Q(text_en__icontains=term) | Q(text_ja__icontains=term)
+        dialogue_q &= Q(line_en__icontains=term) | Q(line_ja__icontains=term)
+    hits = [(0, pk, 0.0) for pk in Phrase.objects.filter(phrase_q).values_list("pk", flat=True)[:limit]]
+    hits += [(1, pk, 0.0) for pk in Dialogue.objects.filter(dialogue_q).values_list("pk", flat=True)[:limit]]
+    return hits[:limit]
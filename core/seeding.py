@@ -0,0 +1,209 @@
+from django.db import router, transaction
+from django.utils import timezone
+
+from .cache import bump_content_version
+from .models import Scene, Lesson, Phrase, Dialogue
+from .search import reindex
+
+BATCH_SIZE = 500
+
+
+# シーン単位のコンテンツ（lessons / phrases / dialogues）を DB と突き合わせ、
+# モデルごとに1回の読み込みと bulk_create / bulk_update / delete で反映する。
+#
+# scenes: [
+#   {
+#     "title": "要件定義",
+#     "lessons": [{"title": "...", "description": None}],   # None は作成時のみ既定値
+#     "phrases": [{"text_en", "text_ja", "note", "lesson"}],  # lesson はレッスン名
+#     "dialogues": [{"speaker", "line_en", "line_ja", "order", "lesson"}],
+#   },
+# ]
+# managed_note: この note を持つフレーズは入力に無ければ削除する（seed 由来の掃除）
+# obsolete_dialogue_en: この英文の対話は削除する（旧ジェネリック seed の掃除）
+def sync_scenes(scenes, managed_note=None, obsolete_dialogue_en=()):
+    counts = {
+        "created": {"scene": 0, "lesson": 0, "phrase": 0, "dialogue": 0},
+        "updated": {"lesson": 0, "phrase": 0, "dialogue": 0},
+        "deleted": {"phrase": 0, "dialogue": 0},
+    }
+    if not scenes:
+        return counts
+
+    using = router.db_for_write(Scene)
+    with transaction.atomic(using=using):
+        scene_map = _sync_scene_rows(scenes, counts)
+        lesson_map = _sync_lessons(scenes, scene_map, counts)
+        _sync_phrases(scenes, scene_map, lesson_map, managed_note, counts)
+        _sync_dialogues(scenes, scene_map, lesson_map, obsolete_dialogue_en, counts)
+        # bulk 操作は post_save を送らないので検索索引は対象シーン分を作り直し、
+        # キャッシュはまとめて無効化する
+        reindex(scene_ids=[scene.id for scene in scene_map.values()], using=using)
+        transaction.on_commit(bump_content_version, using=using)
+    return counts
+
+
+def _sync_scene_rows(scenes, counts):
+    titles = [s["title"] for s in scenes]
+    scene_map = {}
+    for scene in Scene.objects.filter(title__in=titles).order_by("id"):
+        scene_map.setdefault(scene.title, scene)
+    missing = [Scene(title=t) for t in dict.fromkeys(titles) if t not in scene_map]
+    if missing:
+        Scene.objects.bulk_create(missing, batch_size=BATCH_SIZE)
+        counts["created"]["scene"] += len(missing)
+        for scene in Scene.objects.filter(title__in=[s.title for s in missing]).order_by("id"):
+            scene_map.setdefault(scene.title, scene)
+    return scene_map
+
+
+def _sync_lessons(scenes, scene_map, counts):
+    scene_ids = [scene.id for scene in scene_map.values()]
+    lesson_map = {}
+    for lesson in Lesson.objects.filter(scene_id__in=scene_ids).order_by("id"):
+        lesson_map.setdefault((lesson.scene_id, lesson.title), lesson)
+
+    to_create = []
+    to_update = []
+    for data in scenes:
+        scene = scene_map[data["title"]]
+        for entry in data.get("lessons", []):
+            key = (scene.id, entry["title"])
+            description = entry.get("description")
+            lesson = lesson_map.get(key)
+            if lesson is None:
+                lesson = Lesson(
+                    scene=scene,
+                    title=entry["title"],
+                    description=description
+                    if description is not None
+                    else f"{scene.title} / {entry['title']}",
+                )
+                lesson_map[key] = lesson
+                to_create.append(lesson)
+            elif description is not None and _apply(lesson, {"description": description}):
+                to_update.append(lesson)
+
+    if to_create:
+        Lesson.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        counts["created"]["lesson"] += len(to_create)
+        if any(lesson.pk is None for lesson in to_create):
+            # RETURNING 非対応の DB では作成後に読み直す
+            for lesson in Lesson.objects.filter(scene_id__in=scene_ids).order_by("id"):
+                lesson_map[(lesson.scene_id, lesson.title)] = lesson
+    if to_update:
+        Lesson.objects.bulk_update(
+            to_update, ["description", "updated_at"], batch_size=BATCH_SIZE
+        )
+        counts["updated"]["lesson"] += len(to_update)
+    return lesson_map
+
+
+def _lesson_id(lesson_map, scene, title):
+    if title is None:
+        return None
+    return lesson_map[(scene.id, title)].id
+
+
+def _sync_phrases(scenes, scene_map, lesson_map, managed_note, counts):
+    scene_ids = [scene.id for scene in scene_map.values()]
+    existing = {}
+    stale = []
+    for phrase in Phrase.objects.filter(scene_id__in=scene_ids).order_by("id"):
+        if (phrase.scene_id, phrase.text_en) in existing:
+            continue
+        existing[(phrase.scene_id, phrase.text_en)] = phrase
+
+    wanted = set()
+    to_create = []
+    to_update = []
+    for data in scenes:
+        scene = scene_map[data["title"]]
+        for entry in data.get("phrases", []):
+            key = (scene.id, entry["text_en"])
+            wanted.add(key)
+            values = {
+                "text_ja": entry["text_ja"],
+                "note": entry.get("note", ""),
+                "lesson_id": _lesson_id(lesson_map, scene, entry.get("lesson")),
+            }
+            phrase = existing.get(key)
+            if phrase is None:
+                to_create.append(Phrase(scene=scene, text_en=entry["text_en"], **values))
+            elif _apply(phrase, values):
+                to_update.append(phrase)
+
+    if managed_note is not None:
+        stale = [
+            phrase.id
+            for key, phrase in existing.items()
+            if key not in wanted and phrase.note == managed_note
+        ]
+
+    if to_create:
+        Phrase.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        counts["created"]["phrase"] += len(to_create)
+    if to_update:
+        Phrase.objects.bulk_update(
+            to_update, ["text_ja", "note", "lesson", "updated_at"], batch_size=BATCH_SIZE
+        )
+        counts["updated"]["phrase"] += len(to_update)
+    if stale:
+        counts["deleted"]["phrase"] += Phrase.objects.filter(id__in=stale).delete()[0]
+
+
+def _sync_dialogues(scenes, scene_map, lesson_map, obsolete_dialogue_en, counts):
+    scene_ids = [scene.id for scene in scene_map.values()]
+    obsolete = set(obsolete_dialogue_en)
+    existing = {}
+    stale = []
+    for dialogue in Dialogue.objects.filter(scene_id__in=scene_ids).order_by("id"):
+        if dialogue.line_en in obsolete:
+            stale.append(dialogue.id)
+            continue
+        existing.setdefault((dialogue.scene_id, dialogue.order), dialogue)
+
+    to_create = []
+    to_update = []
+    for data in scenes:
+        scene = scene_map[data["title"]]
+        for entry in data.get("dialogues", []):
+            key = (scene.id, entry["order"])
+            values = {
+                "speaker": entry["speaker"],
+                "line_en": entry["line_en"],
+                "line_ja": entry["line_ja"],
+                "lesson_id": _lesson_id(lesson_map, scene, entry.get("lesson")),
+            }
+            dialogue = existing.get(key)
+            if dialogue is None:
+                dialogue = Dialogue(scene=scene, order=entry["order"], **values)
+                existing[key] = dialogue
+                to_create.append(dialogue)
+            elif _apply(dialogue, values):
+                to_update.append(dialogue)
+
+    if stale:
+        counts["deleted"]["dialogue"] += Dialogue.objects.filter(id__in=stale).delete()[0]
+    if to_create:
+        Dialogue.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        counts["created"]["dialogue"] += len(to_create)
+    if to_update:
+        Dialogue.objects.bulk_update(
+            to_update,
+            ["speaker", "line_en", "line_ja", "lesson", "updated_at"],
+            batch_size=BATCH_SIZE,
+        )
+        counts["updated"]["dialogue"] += len(to_update)
+
+
+def _apply(obj, values):
+    changed = False
+    for name, value in values.items():
+        if getattr(obj, name) != value:
+            setattr(obj, name, value)
+            changed = True
+    if changed:
+        # bulk_update は auto_now を更新しないため明示的に更新日時を進める（ETag 用）
+        obj.updated_at = timezone.now()
+    return changed
@@ -1,20 +1,46 @@
 from rest_framework import serializers
-from .models import Scene, Phrase, Dialogue, Lesson, UserProgress
+from .models import (
+    Scene,
+    Phrase,
+    Dialogue,
+    Lesson,
+    UserProgress,
+    SceneProgressSummary,
+    UserProgressSummary,
+    PhraseReviewState,
+)
+from .summaries import effective_streak
 
 
-class PhraseSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    # fields= で返すフィールドを絞り、expand= で Meta.expandable_fields のネストを選ぶ
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expandable = getattr(self.Meta, "expandable_fields", ())
+        if expand is not None:
+            for name in expandable:
+                if name not in expand:
+                    self.fields.pop(name, None)
+        if fields is not None:
+            keep = fields | (expand or set())
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+
+class PhraseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Phrase
-        fields = "__all__"
+        fields = ["id", "scene", "lesson", "text_en", "text_ja", "note"]
 
 
-class DialogueSerializer(serializers.ModelSerializer):
+class DialogueSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Dialogue
-        fields = "__all__"
+        fields = ["id", "scene", "lesson", "speaker", "line_en", "line_ja", "order"]
 
 
-class LessonDetailSerializer(serializers.ModelSerializer):
+class LessonDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lesson_phrases = PhraseSerializer(many=True, read_only=True)
     lesson_dialogues = DialogueSerializer(many=True, read_only=True)
 
@@ -28,15 +54,16 @@ class LessonDetailSerializer(serializers.ModelSerializer):
             "lesson_phrases",
             "lesson_dialogues",
         ]
+        expandable_fields = ["lesson_phrases", "lesson_dialogues"]
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Lesson
-        fields = "__all__"
+        fields = ["id", "scene", "title", "description"]
 
 
-class SceneSerializer(serializers.ModelSerializer):
+class SceneSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     phrases = PhraseSerializer(many=True, read_only=True)
     dialogues = DialogueSerializer(many=True, read_only=True)
     lessons = LessonSerializer(many=True, read_only=True)
@@ -50,9 +77,62 @@ class SceneSerializer(serializers.ModelSerializer):
             "dialogues",
             "lessons",
         ]
+        expandable_fields = ["phrases", "dialogues", "lessons"]
+
+
+# レッスン詳細ページ（LessonDetail.tsx）が描画するフィールドだけに絞ったバンドル用
+class BundlePhraseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Phrase
+        fields = ["id", "text_en", "text_ja", "note"]
+
+
+class BundleDialogueSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Dialogue
+        fields = ["id", "speaker", "line_en", "line_ja", "order"]
+
+
+class BundleSiblingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Lesson
+        fields = ["id", "title"]
+
+
+class BundleSceneSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Scene
+        fields = ["id", "title"]
+
+
+class LessonBundleSerializer(serializers.ModelSerializer):
+    scene = BundleSceneSerializer(read_only=True)
+    lesson_phrases = BundlePhraseSerializer(many=True, read_only=True)
+    lesson_dialogues = BundleDialogueSerializer(many=True, read_only=True)
+    siblings = BundleSiblingSerializer(
+        source="scene.sibling_lessons", many=True, read_only=True
+    )
+
+    class Meta:
+        model = Lesson
+        fields = [
+            "id",
+            "title",
+            "description",
+            "scene",
+            "lesson_phrases",
+            "lesson_dialogues",
+            "siblings",
+        ]
+
 
+class BundleProgressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserProgress
+        fields = ["lesson", "score", "time_spent", "completed_at"]
 
-class UserProgressSerializer(serializers.ModelSerializer):
+
+class UserProgressSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lesson_title = serializers.CharField(source="lesson.title", read_only=True)
     scene_title = serializers.CharField(source="lesson.scene.title", read_only=True)
     username = serializers.CharField(source="user.username", read_only=True)
@@ -71,3 +151,92 @@ class UserProgressSerializer(serializers.ModelSerializer):
             "time_spent",
         ]
         read_only_fields = ["user", "completed_at"]
+
+
+class LessonCompletionSerializer(serializers.Serializer):
+    # progress/complete_lesson の入力（学習時間は PositiveIntegerField の範囲）
+    lesson_id = serializers.IntegerField()
+    score = serializers.IntegerField(default=0)
+    time_spent = serializers.IntegerField(default=0, min_value=0, max_value=2147483647)
+
+    def validate_score(self, value):
+        # スコアを100%を超えないように制限
+        return min(max(0, value), 100)
+
+
+class ProgressSyncRecordSerializer(LessonCompletionSerializer):
+    # progress/sync の1レコード（オフライン中に記録した学習完了）
+    idempotency_key = serializers.CharField(max_length=64)
+    client_ts = serializers.DateTimeField(required=False)
+
+
+class ReviewAnswerSerializer(serializers.Serializer):
+    # review/answer の1件（grade は SM-2 の 0〜5、3 以上で正解）
+    phrase_id = serializers.IntegerField()
+    grade = serializers.IntegerField(min_value=0, max_value=5)
+    reviewed_at = serializers.DateTimeField(required=False)
+
+
+class ReviewStateSerializer(serializers.ModelSerializer):
+    # review/answer の戻り値（更新後の予定だけ。フレーズ本文は含めない）
+    ease = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PhraseReviewState
+        fields = ["phrase", "ease", "interval", "repetitions", "lapses", "due_at"]
+
+    def get_ease(self, obj):
+        return obj.ease / 1000
+
+
+class ReviewCardSerializer(ReviewStateSerializer):
+    # review/next のカード（フレーズ本文付き）
+    phrase = BundlePhraseSerializer(read_only=True)
+    lesson = serializers.IntegerField(source="phrase.lesson_id", read_only=True)
+    new = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PhraseReviewState
+        fields = ["phrase", "lesson", "ease", "interval", "repetitions", "lapses", "due_at", "new"]
+
+    def get_new(self, obj):
+        # まだ一度も回答していないカード
+        return obj.last_reviewed_at is None
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    # /api/search/ のクエリ（q は空白区切りの AND 検索）
+    q = serializers.CharField(max_length=100, trim_whitespace=True)
+    limit = serializers.IntegerField(default=20, min_value=1, max_value=50)
+
+
+class SceneProgressSummarySerializer(serializers.ModelSerializer):
+    average_score = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SceneProgressSummary
+        fields = ["scene", "lessons_completed", "best_score", "average_score", "time_spent"]
+
+    def get_average_score(self, obj):
+        if not obj.lessons_completed:
+            return 0
+        return round(obj.score_sum / obj.lessons_completed)
+
+
+class UserProgressSummarySerializer(SceneProgressSummarySerializer):
+    current_streak = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserProgressSummary
+        fields = [
+            "lessons_completed",
+            "best_score",
+            "average_score",
+            "time_spent",
+            "current_streak",
+            "longest_streak",
+            "last_active_date",
+        ]
+
+    def get_current_streak(self, obj):
+        return effective_streak(obj)
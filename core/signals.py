@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+from django.contrib.auth.models import User
+
+from .cache import bump_content_version
+from .fragments import discard_fragment
+from .models import Dialogue, Lesson, Phrase, Scene, UserProgress
+from .search import forget_search_tables, index_instance, unindex_instance
+from .summaries import refresh_summaries, scene_lessons
+
+CATALOG_MODELS = (Scene, Lesson, Phrase, Dialogue)
+
+
+def invalidate_catalog(sender, using=None, **kwargs):
+    # コミット後にバージョンを上げる（トランザクション途中の内容をキャッシュさせない）
+    transaction.on_commit(bump_content_version, using=using)
+
+
+for _model in CATALOG_MODELS:
+    post_save.connect(
+        invalidate_catalog, sender=_model, dispatch_uid=f"catalog_save_{_model.__name__}"
+    )
+    post_delete.connect(
+        invalidate_catalog, sender=_model, dispatch_uid=f"catalog_delete_{_model.__name__}"
+    )
+
+
+for _model in (Lesson, Phrase, Dialogue):
+    # エンコード済みの断片（core.fragments）は保存・削除したその1件だけ捨てる
+    post_save.connect(
+        discard_fragment, sender=_model, dispatch_uid=f"fragment_save_{_model.__name__}"
+    )
+    post_delete.connect(
+        discard_fragment, sender=_model, dispatch_uid=f"fragment_delete_{_model.__name__}"
+    )
+
+
+def update_search_index(sender, instance, using=None, **kwargs):
+    # 全文検索の索引を本体と同じトランザクションで更新する
+    index_instance(instance, using)
+
+
+def remove_search_index(sender, instance, using=None, **kwargs):
+    unindex_instance(instance, using)
+
+
+post_migrate.connect(forget_search_tables, dispatch_uid="search_forget_tables")
+
+for _model in (Phrase, Dialogue):
+    post_save.connect(
+        update_search_index, sender=_model, dispatch_uid=f"search_save_{_model.__name__}"
+    )
+    post_delete.connect(
+        remove_search_index, sender=_model, dispatch_uid=f"search_delete_{_model.__name__}"
+    )
+
+
+def refresh_progress_summary(sender, instance, using=None, **kwargs):
+    # complete_lesson / sync は集計を直接更新する。API・admin からの保存・削除はここで反映する
+    user_id = instance.user_id
+    lesson_id = instance.lesson_id
+    activity = kwargs.get("created") is not None
+
+    def refresh():
+        # ユーザーごと削除された場合（カスケード）は集計も消えている
+        if User.objects.filter(pk=user_id).exists():
+            refresh_summaries(user_id, scene_lessons([lesson_id]), activity=activity)
+
+    transaction.on_commit(refresh, using=using)
+
+
+post_save.connect(
+    refresh_progress_summary, sender=UserProgress, dispatch_uid="progress_summary_save"
+)
+post_delete.connect(
+    refresh_progress_summary, sender=UserProgress, dispatch_uid="progress_summary_delete"
+)
@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import Lesson, SceneProgressSummary, UserProgress, UserProgressSummary
+
+# 進捗の集計（ユーザー × シーン、ユーザー）を書き込みのたびに更新する。
+# シーン集計は対象シーンの進捗だけ（= レッスン数に比例）を集計し直し、
+# ユーザー集計はシーン集計の合計と連続学習日数の更新を1文で行う。
+
+
+def scene_lessons(lesson_ids):
+    # 指定レッスンが属するシーンごとのレッスン id 一覧（カタログ DB 内で完結させる）
+    scenes = {}
+    rows = Lesson.objects.filter(scene__lessons__id__in=lesson_ids).values_list("id", "scene_id")
+    for lesson_id, scene_id in rows.distinct():
+        scenes.setdefault(scene_id, []).append(lesson_id)
+    return scenes
+
+
+def _refresh_scene_sql(connection, lesson_count):
+    quote = connection.ops.quote_name
+    summary = quote(SceneProgressSummary._meta.db_table)
+    progress = quote(UserProgress._meta.db_table)
+    placeholders = ", ".join(["%s"] * lesson_count)
+    return (
+        f"INSERT INTO {summary} (user_id, scene_id, lessons_completed, best_score, score_sum, "
+        "time_spent, updated_at) "
+        "SELECT %s, %s, COUNT(*), COALESCE(MAX(score), 0), COALESCE(SUM(score), 0), "
+        f"COALESCE(SUM(time_spent), 0), %s FROM {progress} "
+        f"WHERE user_id = %s AND lesson_id IN ({placeholders}) "
+        "ON CONFLICT (user_id, scene_id) DO UPDATE SET "
+        "lessons_completed = excluded.lessons_completed, best_score = excluded.best_score, "
+        "score_sum = excluded.score_sum, time_spent = excluded.time_spent, "
+        "updated_at = excluded.updated_at"
+    )
+
+
+def _refresh_user_sql(connection, activity):
+    quote = connection.ops.quote_name
+    table = quote(UserProgressSummary._meta.db_table)
+    scenes = quote(SceneProgressSummary._meta.db_table)
+    greatest = "GREATEST" if connection.vendor == "postgresql" else "MAX"
+    columns = "user_id, lessons_completed, best_score, score_sum, time_spent, updated_at"
+    values = (
+        "%s, COALESCE(SUM(lessons_completed), 0), COALESCE(MAX(best_score), 0), "
+        "COALESCE(SUM(score_sum), 0), COALESCE(SUM(time_spent), 0), %s"
+    )
+    streak_sql = ""
+    if not activity:
+        columns += ", current_streak, longest_streak"
+        values += ", 0, 0"
+    else:
+        # 今日すでに学習済みなら据え置き、昨日なら +1、それ以外は 1 から数え直す
+        columns += ", current_streak, longest_streak, last_active_date"
+        values += ", 1, 1, %s"
+        streak = (
+            f"CASE WHEN {table}.last_active_date = %s THEN {table}.current_streak "
+            f"WHEN {table}.last_active_date = %s THEN {table}.current_streak + 1 ELSE 1 END"
+        )
+        streak_sql = (
+            f"current_streak = {streak}, "
+            f"longest_streak = {greatest}({table}.longest_streak, {streak}), "
+            "last_active_date = excluded.last_active_date, "
+        )
+    return (
+        f"INSERT INTO {table} ({columns}) SELECT {values} FROM {scenes} WHERE user_id = %s "
+        "ON CONFLICT (user_id) DO UPDATE SET "
+        "lessons_completed = excluded.lessons_completed, best_score = excluded.best_score, "
+        "score_sum = excluded.score_sum, time_spent = excluded.time_spent, "
+        f"{streak_sql}updated_at = excluded.updated_at"
+    )
+
+
+def refresh_summaries(user_id, scenes, activity=True):
+    # scenes: scene_lessons() の戻り値。activity=True なら今日を学習日として連続日数を進める
+    using = router.db_for_write(UserProgressSummary)
+    connection = connections[using]
+    ops = connection.ops
+    now = timezone.now()
+    today = timezone.localdate(now)
+    db_now = ops.adapt_datetimefield_value(now)
+    db_today = ops.adapt_datefield_value(today)
+    db_yesterday = ops.adapt_datefield_value(today - timedelta(days=1))
+
+    with transaction.atomic(using=using, savepoint=False), connection.cursor() as cursor:
+        for scene_id, lesson_ids in scenes.items():
+            cursor.execute(
+                _refresh_scene_sql(connection, len(lesson_ids)),
+                [user_id, scene_id, db_now, user_id, *lesson_ids],
+            )
+        params = [user_id, db_now]
+        if activity:
+            params += [db_today, user_id, *[db_today, db_yesterday] * 2]
+        else:
+            params += [user_id]
+        cursor.execute(_refresh_user_sql(connection, activity), params)
+
+
+def longest_runs(dates):
+    # 日付の集合から（最終日で終わる連続日数, 最長の連続日数）を求める
+    current = longest = 0
+    previous = None
+    for day in sorted(dates):
+        current = current + 1 if previous == day - timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+
+def rebuild_summaries(batch_size=2000):
+    # UserProgress から全ユーザーの集計を作り直す。
+    # 学習日は履歴に残っている completed_at / updated_at の日付から推定する。
+    lesson_scene = dict(Lesson.objects.values_list("id", "scene_id"))
+    scene_rows = {}
+    user_rows = {}
+    active_days = {}
+    progress = UserProgress.objects.values_list(
+        "user_id", "lesson_id", "score", "time_spent", "completed_at", "updated_at"
+    ).order_by()
+    for user_id, lesson_id, score, time_spent, completed_at, updated_at in progress.iterator(
+        chunk_size=batch_size
+    ):
+        scene_id = lesson_scene.get(lesson_id)
+        if scene_id is None:
+            continue
+        for rows, key in ((scene_rows, (user_id, scene_id)), (user_rows, user_id)):
+            row = rows.setdefault(key, [0, 0, 0, 0])
+            row[0] += 1
+            row[1] = max(row[1], score)
+            row[2] += score
+            row[3] += time_spent
+        days = active_days.setdefault(user_id, set())
+        days.add(timezone.localdate(completed_at))
+        days.add(timezone.localdate(updated_at))
+
+    scene_summaries = [
+        SceneProgressSummary(
+            user_id=user_id,
+            scene_id=scene_id,
+            lessons_completed=row[0],
+            best_score=row[1],
+            score_sum=row[2],
+            time_spent=row[3],
+        )
+        for (user_id, scene_id), row in scene_rows.items()
+    ]
+    user_summaries = []
+    for user_id, row in user_rows.items():
+        current, longest = longest_runs(active_days[user_id])
+        user_summaries.append(
+            UserProgressSummary(
+                user_id=user_id,
+                lessons_completed=row[0],
+                best_score=row[1],
+                score_sum=row[2],
+                time_spent=row[3],
+                current_streak=current,
+                longest_streak=longest,
+                last_active_date=max(active_days[user_id]),
+            )
+        )
+
+    using = router.db_for_write(UserProgressSummary)
+    with transaction.atomic(using=using):
+        SceneProgressSummary.objects.all().delete()
+        UserProgressSummary.objects.all().delete()
+        SceneProgressSummary.objects.bulk_create(scene_summaries, batch_size=batch_size)
+        UserProgressSummary.objects.bulk_create(user_summaries, batch_size=batch_size)
+    return {"users": len(user_summaries), "scenes": len(scene_summaries)}
+
+
+def effective_streak(summary, today=None):
+    # 昨日も今日も学習していなければ連続日数は途切れている
+    if summary.last_active_date is None:
+        return 0
+    today = today or timezone.localdate()
+    if summary.last_active_date < today - timedelta(days=1):
+        return 0
+    return summary.current_streak
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from core.models import Lesson, Scene
+from core.views import LessonViewSet, SceneViewSet
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        self.scene = Scene.objects.create(title="s")
+        self.lesson = Lesson.objects.create(scene=self.scene, title="l")
+
+    async def test_not_found_is_answered_without_sync_fallback(self):
+        # 404 は async ビューが返す（同期ビューで DB をもう一度引かない）
+        with mock.patch.object(SceneViewSet, "retrieve") as retrieve, mock.patch.object(
+            LessonViewSet, "bundle"
+        ) as bundle:
+            for path in (
+                f"/api/scenes/{self.scene.pk + 100}/",
+                "/api/scenes/abc/",
+                f"/api/lessons/{self.lesson.pk + 100}/bundle/",
+                "/api/lessons/abc/bundle/",
+            ):
+                with self.subTest(path=path):
+                    response = await self.async_client.get(path)
+                    self.assertEqual(response.status_code, 404)
+                    self.assertEqual(response["Content-Type"], "application/json")
+                    self.assertIn("detail", response.json())
+        retrieve.assert_not_called()
+        bundle.assert_not_called()
+
+    async def test_found_is_served_by_async_view(self):
+        with mock.patch.object(SceneViewSet, "retrieve") as retrieve:
+            response = await self.async_client.get(f"/api/scenes/{self.scene.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "s")
+        retrieve.assert_not_called()
+
+    async def test_unexpected_errors_are_not_retried(self):
+        # async 側の不具合は同期ビューでやり直して隠さない
+        with mock.patch.object(SceneViewSet, "aretrieve", side_effect=TypeError("bug")), mock.patch.object(
+            SceneViewSet, "retrieve"
+        ) as retrieve:
+            with self.assertRaises(TypeError):
+                await self.async_client.get(f"/api/scenes/{self.scene.pk}/")
+        retrieve.assert_not_called()
@@ -0,0 +1,36 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+
+from core.cache import get_catalog_cache
+from core.models import Scene
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+        self.scene = Scene.objects.create(title="要件定義")
+
+    def titles(self):
+        return [scene["title"] for scene in self.client.get("/api/scenes/").json()]
+
+    def test_save_bumps_version(self):
+        self.assertEqual(self.titles(), ["要件定義"])
+        self.scene.title = "設計"
+        # バージョンはコミット後に上げる
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scene.save()
+        self.assertEqual(self.titles(), ["設計"])
+
+    def test_other_process_update_expires_with_timeout(self):
+        # シグナルの届かない更新（別ワーカーでの編集と同じ）は TIMEOUT 後に反映される
+        timeout = get_catalog_cache().default_timeout
+        if timeout is None:
+            self.skipTest("CATALOG_CACHE_TIMEOUT is none")
+        self.assertEqual(self.titles(), ["要件定義"])
+        Scene.objects.filter(pk=self.scene.pk).update(title="設計")
+        self.assertEqual(self.titles(), ["要件定義"])
+        later = time.time() + timeout + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertEqual(self.titles(), ["設計"])
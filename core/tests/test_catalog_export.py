@@ -0,0 +1,46 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.cache import get_catalog_cache
+from core.catalog_export import MANIFEST, export_catalog
+from core.models import Dialogue, Lesson, Phrase, Scene
+
+
+@override_settings(ALLOWED_HOSTS=["localhost", "127.0.0.1"])
+class CatalogExportTests(TestCase):
+    def setUp(self):
+        self.scene = scene = Scene.objects.create(title="障害対応")
+        self.lesson = lesson = Lesson.objects.create(scene=scene, title="報告")
+        Phrase.objects.create(scene=scene, lesson=lesson, text_en="Roll back", text_ja="切り戻します")
+        Dialogue.objects.create(scene=scene, lesson=lesson, speaker="PM", line_en="OK", line_ja="了解", order=1)
+        self.output = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def test_second_export_writes_nothing(self):
+        out = StringIO()
+        call_command("export_catalog", str(self.output), stdout=out)
+        self.assertIn("Exported 4 documents", out.getvalue())
+        manifest = json.loads((self.output / MANIFEST).read_bytes())
+        self.assertEqual(
+            sorted(manifest["files"]),
+            [f"lessons/{self.lesson.pk}/bundle", "scenes", f"scenes/{self.scene.pk}", f"search/{self.scene.pk}"],
+        )
+        files = {path: path.stat().st_mtime_ns for path in self.output.rglob("*")}
+
+        result = export_catalog(self.output)
+        self.assertEqual((result["written"], result["unchanged"]), (0, 4))
+        self.assertFalse(result["manifest_updated"])
+        self.assertEqual({path: path.stat().st_mtime_ns for path in self.output.rglob("*")}, files)
+
+    def test_does_not_fill_catalog_cache(self):
+        # エクスポート用のホストの URL をキーにした本文をキャッシュに残さない
+        cache = get_catalog_cache()
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            export_catalog(self.output)
+        keys = [call.args[0] for call in cache_set.call_args_list]
+        self.assertEqual([key for key in keys if "/api/" in key], [])
@@ -0,0 +1,84 @@
+import os
+import runpy
+import uuid
+from importlib.util import find_spec
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from channels.layers import ChannelLayerManager
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+import engineer_english
+
+SETTINGS = Path(engineer_english.__file__).with_name("settings.py")
+# 実際の Redis に送受信するテストの接続先（未設定・接続できないときは設定の確認だけ）
+REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://127.0.0.1:6379/15")
+
+
+def channel_layers(**env):
+    # 環境変数を変えて settings.py を読み直し、CHANNEL_LAYERS を返す
+    with mock.patch.dict(os.environ, env):
+        return runpy.run_path(str(SETTINGS))["CHANNEL_LAYERS"]
+
+
+def redis_available():
+    if find_spec("channels_redis") is None:
+        return False
+    import redis
+
+    try:
+        return redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.2).ping()
+    except redis.RedisError:
+        return False
+
+
+class ChannelLayerSettingsTests(SimpleTestCase):
+    def test_default_is_memory_even_with_redis_url(self):
+        layers = channel_layers(CHANNEL_LAYER_BACKEND="memory", REDIS_URL="redis://redis:6379/1")
+        self.assertEqual(layers["default"]["BACKEND"], "channels.layers.InMemoryChannelLayer")
+
+    def test_redis_backends(self):
+        redis = channel_layers(
+            CHANNEL_LAYER_BACKEND="redis", REDIS_URL="redis://redis:6379/1", CHANNEL_LAYER_CAPACITY="500"
+        )["default"]
+        self.assertEqual(redis["BACKEND"], "channels_redis.core.RedisChannelLayer")
+        self.assertEqual(redis["CONFIG"]["hosts"], ["redis://redis:6379/1"])
+        self.assertEqual(redis["CONFIG"]["capacity"], 500)
+
+        pubsub = channel_layers(CHANNEL_LAYER_BACKEND="redis-pubsub", REDIS_URL="redis://redis:6379/1")["default"]
+        self.assertEqual(pubsub["BACKEND"], "channels_redis.pubsub.RedisPubSubChannelLayer")
+        self.assertEqual(pubsub["CONFIG"]["hosts"], ["redis://redis:6379/1"])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            channel_layers(CHANNEL_LAYER_BACKEND="rabbitmq")
+
+
+@skipUnless(redis_available(), f"Redis is not reachable at {REDIS_URL}")
+class RedisChannelLayerTests(SimpleTestCase):
+    # settings の構成から作ったレイヤーでグループ送信が届くこと
+    def group_round_trip(self, backend):
+        layers = channel_layers(CHANNEL_LAYER_BACKEND=backend, REDIS_URL=REDIS_URL)
+        with override_settings(CHANNEL_LAYERS=layers):
+            layer = ChannelLayerManager()["default"]
+
+        async def round_trip():
+            group = f"test-{uuid.uuid4().hex}"
+            channel = await layer.new_channel()
+            await layer.group_add(group, channel)
+            try:
+                await layer.group_send(group, {"type": "test.message", "text": "hello"})
+                return await layer.receive(channel)
+            finally:
+                await layer.group_discard(group, channel)
+                await layer.flush()
+
+        self.assertEqual(async_to_sync(round_trip)(), {"type": "test.message", "text": "hello"})
+
+    def test_redis(self):
+        self.group_round_trip("redis")
+
+    def test_redis_pubsub(self):
+        self.group_round_trip("redis-pubsub")
@@ -0,0 +1,88 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
+
+from core.models import Lesson, Scene, UserProgress
+from core.progress import LessonNotFound, upsert_progress
+
+URL = "/api/progress/complete_lesson/"
+
+
+class CompleteLessonTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="learner")
+        self.lesson = Lesson.objects.create(scene=Scene.objects.create(title="s"), title="l")
+        self.client.force_login(self.user)
+
+    def post(self, **data):
+        return self.client.post(URL, data, content_type="application/json")
+
+    def test_keeps_highest_score(self):
+        self.assertEqual(self.post(lesson_id=self.lesson.pk, score=80, time_spent=10).status_code, 200)
+        response = self.post(lesson_id=self.lesson.pk, score=150, time_spent=20)
+        self.assertEqual(response.json()["score"], 100)
+        response = self.post(lesson_id=self.lesson.pk, score=30, time_spent=30)
+        self.assertEqual((response.json()["score"], response.json()["time_spent"]), (100, 30))
+        self.assertEqual(UserProgress.objects.count(), 1)
+
+    def test_invalid_values_are_400(self):
+        for data in (
+            {"lesson_id": self.lesson.pk, "time_spent": -5},
+            {"lesson_id": self.lesson.pk, "time_spent": "abc"},
+            {"lesson_id": self.lesson.pk, "time_spent": 12.7},
+            {"lesson_id": self.lesson.pk, "score": "high"},
+            {"lesson_id": "abc"},
+            {},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(**data).status_code, 400)
+        self.assertFalse(UserProgress.objects.exists())
+
+    def test_missing_lesson_is_404(self):
+        response = self.post(lesson_id=self.lesson.pk + 1000, score=50)
+        self.assertEqual(response.status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.post(lesson_id=self.lesson.pk + 1000).status_code, 404)
+
+    def test_check_violation_is_not_lesson_not_found(self):
+        # 外部キー以外の制約違反をレッスンなしと取り違えない
+        with self.assertRaises(IntegrityError):
+            upsert_progress(self.user.pk, self.lesson.pk, 50, -5)
+        with self.assertRaises(LessonNotFound):
+            upsert_progress(self.user.pk, self.lesson.pk + 1000, 50, 5)
+
+
+class CompleteLessonRaceTests(TransactionTestCase):
+    # 同じユーザー・レッスンへの同時送信でも最高スコアを取りこぼさない（lost update がない）
+    threads = 8
+    rounds = 5
+
+    def test_concurrent_submissions_keep_max_score(self):
+        user = User.objects.create(username="racer")
+        lesson = Lesson.objects.create(scene=Scene.objects.create(title="s"), title="l")
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def submit(index):
+            try:
+                for round_ in range(self.rounds):
+                    barrier.wait()
+                    upsert_progress(user.pk, lesson.pk, index * 10 + round_, index)
+            except Exception as exc:  # スレッド内の例外はテストの失敗として報告する
+                errors.append(exc)
+                barrier.abort()
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=submit, args=(i,)) for i in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        progress = UserProgress.objects.get(user=user, lesson=lesson)
+        self.assertEqual(progress.score, (self.threads - 1) * 10 + self.rounds - 1)
+        self.assertEqual(UserProgress.objects.filter(user=user).count(), 1)
@@ -0,0 +1,56 @@
+from django.test import TestCase
+
+from core.cache import get_catalog_cache
+from core.models import Dialogue, Lesson, Phrase, Scene
+
+
+class CatalogETagTests(TestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+        self.scene = Scene.objects.create(title="s")
+        self.lesson = Lesson.objects.create(scene=self.scene, title="l")
+        self.phrase = Phrase.objects.create(scene=self.scene, lesson=self.lesson, text_en="a", text_ja="あ")
+        Dialogue.objects.create(scene=self.scene, lesson=self.lesson, speaker="PM", line_en="b", line_ja="い", order=1)
+
+    def get(self, path, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(path, **headers)
+
+    def assert_write_changes_etag(self, write):
+        path = f"/api/scenes/{self.scene.pk}/"
+        etag = self.get(path)["ETag"]
+        self.assertEqual(self.get(path, etag).status_code, 304)
+        # バージョンの更新はコミット後
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        response = self.get(path, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["phrases"][0]["text_ja"], "変更")
+
+    def test_queryset_update_changes_etag(self):
+        # update() は auto_now を通らないが CatalogQuerySet が updated_at を進める
+        self.assert_write_changes_etag(
+            lambda: Phrase.objects.filter(pk=self.phrase.pk).update(text_ja="変更")
+        )
+
+    def test_bulk_update_changes_etag(self):
+        def write():
+            self.phrase.text_ja = "変更"
+            Phrase.objects.bulk_update([self.phrase], ["text_ja"])
+
+        self.assert_write_changes_etag(write)
+
+    def test_responses_do_not_expose_updated_at(self):
+        # updated_at は ETag 用の内部の列で、API のフィールドには含めない
+        scene = self.get(f"/api/scenes/{self.scene.pk}/").json()
+        rows = [
+            *scene["phrases"],
+            *scene["dialogues"],
+            *scene["lessons"],
+            *self.get("/api/phrases/").json()["results"],
+            *self.get("/api/dialogues/").json()["results"],
+            *self.get("/api/lessons/").json(),
+        ]
+        self.assertEqual(len(rows), 6)
+        for row in rows:
+            self.assertNotIn("updated_at", row)
@@ -0,0 +1,41 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+
+from core.content_packs import PACKS_DIR, PackError, import_pack, validate_pack
+from core.models import Phrase, Scene
+
+
+class ContentPackTests(TestCase):
+    def write_pack(self, *records):
+        directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        path = directory / "pack.jsonl"
+        path.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        return path
+
+    def scene(self, *phrases):
+        return {
+            "title": "朝会",
+            "phrases": [{"text_en": text_en, "text_ja": "-"} for text_en in phrases],
+        }
+
+    def test_rejects_duplicate_phrase_in_scene(self):
+        path = self.write_pack(self.scene("Any blockers?", "Any blockers?"))
+        with self.assertRaisesMessage(PackError, "phrases[1]: duplicate phrase 'Any blockers?'"):
+            import_pack(path)
+        self.assertFalse(Scene.objects.exists())
+
+    def test_same_phrase_in_other_scene(self):
+        other = {**self.scene("Any blockers?"), "title": "振り返り"}
+        path = self.write_pack(self.scene("Any blockers?"), other)
+        import_pack(path)
+        import_pack(path, force=True)
+        self.assertEqual(Phrase.objects.filter(text_en="Any blockers?").count(), 2)
+
+    def test_bundled_packs_are_valid(self):
+        for path in sorted(PACKS_DIR.iterdir()):
+            if path.suffix in (".jsonl", ".ndjson", ".yaml", ".yml"):
+                with self.subTest(path=path.name):
+                    self.assertGreater(validate_pack(path), 0)
@@ -0,0 +1,71 @@
+import json
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from core.cache import bump_content_version, get_catalog_cache
+from core.fragments import FragmentStore, encode_serializer
+from core.models import Phrase, Scene
+from core.serializers import PhraseSerializer
+
+
+class FragmentStoreTests(TestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+        self.scene = Scene.objects.create(title="s")
+        self.phrases = [
+            Phrase.objects.create(scene=self.scene, text_en=f"p{i}", text_ja=f"フレーズ{i}")
+            for i in range(3)
+        ]
+
+    def raw_update(self, phrase, text_ja):
+        # updated_at もシグナルも通らない書き込み（生 SQL）
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE core_phrase SET text_ja = %s WHERE id = %s", [text_ja, phrase.pk])
+
+    def texts(self):
+        serializer = PhraseSerializer(Phrase.objects.order_by("id"), many=True)
+        return [phrase["text_ja"] for phrase in json.loads(encode_serializer(serializer))]
+
+    def test_raw_write_is_rebuilt_on_new_version(self):
+        self.assertEqual(self.texts(), ["フレーズ0", "フレーズ1", "フレーズ2"])
+        # 断片は同じバージョンの間は残る
+        self.raw_update(self.phrases[0], "CHANGED")
+        self.assertEqual(self.texts()[0], "フレーズ0")
+        bump_content_version()
+        self.assertEqual(self.texts()[0], "CHANGED")
+
+    def test_raw_write_expires_with_timeout(self):
+        timeout = get_catalog_cache().default_timeout
+        if timeout is None:
+            self.skipTest("CATALOG_CACHE_TIMEOUT is none")
+        self.texts()
+        self.raw_update(self.phrases[0], "CHANGED")
+        later = time.time() + timeout + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertEqual(self.texts()[0], "CHANGED")
+
+    def test_queryset_update_is_rebuilt(self):
+        # QuerySet.update() は updated_at を進める（core.models.CatalogQuerySet）
+        self.texts()
+        Phrase.objects.filter(pk=self.phrases[0].pk).update(text_ja="CHANGED")
+        self.assertEqual(self.texts()[0], "CHANGED")
+
+    def test_save_discards_fragment(self):
+        self.texts()
+        phrase = self.phrases[1]
+        phrase.text_ja = "保存"
+        phrase.save()
+        self.assertEqual(self.texts()[1], "保存")
+
+    def test_store_is_capped(self):
+        store = FragmentStore(PhraseSerializer, max_entries=2)
+        store.use_version(1)
+        serializer = PhraseSerializer()
+        for phrase in Phrase.objects.order_by("id"):
+            store.get(phrase, serializer)
+        self.assertEqual(list(store.fragments), [self.phrases[1].pk, self.phrases[2].pk])
+        store.use_version(2)
+        self.assertEqual(store.fragments, {})
@@ -0,0 +1,123 @@
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.cache import get_catalog_cache
+from core.metrics import Histogram, reset_metrics
+from core.models import Lesson, Phrase, Scene
+
+# Prometheus のテキスト形式（0.0.4）の1行
+SAMPLE_RE = re.compile(r'^(?P<name>[a-z_]+)\{(?P<labels>(?:[a-z_]+="[^"]*",?)*)\} (?P<value>\S+)$')
+SERVER_TIMING_RE = re.compile(
+    r'^db;dur=[\d.]+;desc="(?P<queries>\d+) queries", render;dur=[\d.]+, app;dur=[\d.]+, total;dur=[\d.]+$'
+)
+
+
+class HistogramTests(SimpleTestCase):
+    def histogram(self, *values):
+        histogram = Histogram("h", "test", (1, 2, 4))
+        for value in values:
+            histogram.observe(("v", "GET"), value)
+        counts, total, count = histogram.snapshot()[("v", "GET")]
+        return histogram, counts, count
+
+    def test_buckets_are_upper_inclusive(self):
+        _, counts, count = self.histogram(0.5, 1, 1.5, 3, 10)
+        self.assertEqual(counts, [2, 1, 1, 1])
+        self.assertEqual(count, 5)
+
+    def test_quantile_interpolates_within_bucket(self):
+        histogram, counts, count = self.histogram(0.5, 1, 1.5, 3, 10)
+        self.assertAlmostEqual(histogram.quantile(counts, count, 0.2), 0.5)
+        self.assertAlmostEqual(histogram.quantile(counts, count, 0.5), 1.5)
+        self.assertAlmostEqual(histogram.quantile(counts, count, 0.8), 4)
+        # +Inf のバケットは最後の境界
+        self.assertEqual(histogram.quantile(counts, count, 0.99), 4)
+
+    def test_quantile_skips_empty_buckets(self):
+        histogram, counts, count = self.histogram(3, 3)
+        self.assertAlmostEqual(histogram.quantile(counts, count, 0.5), 3)
+        self.assertEqual(histogram.quantile([0, 0, 0, 0], 0, 0.5), 0.0)
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+        reset_metrics()
+        scene = Scene.objects.create(title="s")
+        lesson = Lesson.objects.create(scene=scene, title="l")
+        Phrase.objects.create(scene=scene, lesson=lesson, text_en="a", text_ja="あ")
+        self.staff = User.objects.create(username="staff", is_staff=True)
+
+    def exposition(self):
+        self.client.force_login(self.staff)
+        response = self.client.get("/api/_metrics/")
+        self.client.logout()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        return response.content.decode()
+
+    def samples(self, text):
+        # 形式を確認しながら {(名前, ラベル): 値} に読む
+        samples = {}
+        typed = set()
+        for line in text.splitlines():
+            if line.startswith("# TYPE "):
+                name, kind = line.split()[2:]
+                self.assertIn(kind, ("counter", "histogram", "summary"))
+                typed.add(name)
+                continue
+            if line.startswith("# HELP "):
+                continue
+            match = SAMPLE_RE.match(line)
+            self.assertIsNotNone(match, line)
+            name = match["name"]
+            self.assertTrue(any(name == base or name.startswith(f"{base}_") for base in typed), line)
+            samples[(name, match["labels"])] = float(match["value"])
+        return samples
+
+    def test_records_query_count_and_exposition(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/scenes/")
+        self.assertEqual(response.status_code, 200)
+        # 次のリクエストで connection.queries が空になるので、先に数えておく
+        query_count = len(queries)
+        self.assertGreater(query_count, 0)
+        timing = SERVER_TIMING_RE.match(response["Server-Timing"])
+        self.assertIsNotNone(timing, response["Server-Timing"])
+        self.assertEqual(int(timing["queries"]), query_count)
+
+        samples = self.samples(self.exposition())
+        labels = 'view="scene-list",method="GET"'
+        self.assertEqual(samples[("ee_http_requests_total", f'{labels},status="2xx"')], 1)
+        self.assertEqual(samples[("ee_http_request_db_queries_sum", labels)], query_count)
+        self.assertEqual(samples[("ee_http_request_db_queries_count", labels)], 1)
+        self.assertEqual(samples[("ee_http_response_bytes_sum", labels)], len(response.content))
+        # バケットは累積で、+Inf は件数と同じ
+        buckets = [
+            value
+            for (name, sample_labels), value in samples.items()
+            if name == "ee_http_request_duration_seconds_bucket" and sample_labels.startswith(labels)
+        ]
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(samples[("ee_http_request_duration_seconds_bucket", f'{labels},le="+Inf"')], 1)
+        for q in ("0.5", "0.95", "0.99"):
+            self.assertIn(("ee_http_request_duration_seconds_quantiles", f'{labels},quantile="{q}"'), samples)
+
+    def test_counts_errors_by_status_class(self):
+        self.assertEqual(self.client.get("/api/scenes/999999/").status_code, 404)
+        samples = self.samples(self.exposition())
+        self.assertEqual(
+            samples[("ee_http_requests_total", 'view="scene-detail",method="GET",status="4xx"')], 1
+        )
+
+    async def test_async_request_has_server_timing(self):
+        response = await self.async_client.get("/api/scenes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], SERVER_TIMING_RE)
+
+    def test_metrics_are_staff_only(self):
+        self.assertEqual(self.client.get("/api/_metrics/").status_code, 403)
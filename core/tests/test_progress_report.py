@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from core.analytics import aiter_chunks
+from core.models import Lesson, Scene, UserProgress
+
+URL = "/api/reports/progress/?report=lessons&output=csv"
+
+
+class ProgressReportStreamingTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username="staff", is_staff=True)
+        scene = Scene.objects.create(title="要件定義")
+        lessons = [Lesson.objects.create(scene=scene, title=f"L{i}") for i in range(3)]
+        for i in range(5):
+            user = User.objects.create(username=f"u{i}")
+            for lesson in lessons[: i % 3 + 1]:
+                UserProgress.objects.create(user=user, lesson=lesson, score=50 + i, time_spent=60)
+
+    def test_wsgi_streams_sync_iterator(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("scene_id,scene_title,lesson_id,lesson_title"))
+
+    async def test_asgi_streams_async_iterator(self):
+        # ASGI では非同期イテレータで返す（同期イテレータだと全件をリストにしてから送られる）
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.decode().splitlines()), 4)
+
+    async def test_aiter_chunks_pulls_in_batches_and_closes(self):
+        pulled = []
+        closed = []
+
+        def rows():
+            try:
+                for i in range(100):
+                    pulled.append(i)
+                    yield i
+            finally:
+                closed.append(True)
+
+        chunks = aiter_chunks(rows(), batch=10)
+        self.assertEqual(await anext(chunks), 0)
+        # 最初の1件を返した時点では1バッチ分しか読んでいない
+        self.assertEqual(len(pulled), 10)
+        await chunks.aclose()
+        self.assertEqual(closed, [True])
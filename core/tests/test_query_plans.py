@@ -0,0 +1,69 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.query_plans import (
+    ALLOWED_SCANS,
+    SUPPORTED_VENDORS,
+    check_endpoints,
+    create_fixtures,
+    full_scan,
+)
+
+
+@skipUnless(connection.vendor in SUPPORTED_VENDORS, "EXPLAIN is checked on SQLite / Postgres")
+class QueryPlanTests(TestCase):
+    # 各エンドポイントの SELECT が索引を使う（フルスキャンに落ちない）こと
+    def test_no_full_scans(self):
+        fixtures = create_fixtures()
+        self.client.force_login(fixtures["user"])
+        checked, failures, _plans = check_endpoints(self.client, fixtures)
+        self.assertGreater(checked, 0)
+        self.assertEqual(failures, [], "\n".join(failures))
+
+    @override_settings(ALLOWED_HOSTS=["localhost", "127.0.0.1"])
+    def test_command_with_default_allowed_hosts(self):
+        out = StringIO()
+        call_command("check_query_plans", stdout=out)
+        self.assertIn("Query plans OK", out.getvalue())
+
+
+class FullScanRuleTests(SimpleTestCase):
+    # EXPLAIN の結果の判定（Postgres のプランは JSON の例で確認する）
+    page = 'SELECT * FROM "core_phrase" ORDER BY "scene_id", "id" LIMIT 101'
+    filtered = 'SELECT * FROM "core_phrase" WHERE "lesson_id" = 1 ORDER BY "scene_id", "id" LIMIT 101'
+
+    def test_sqlite(self):
+        index_scan = ["SCAN core_phrase USING INDEX phrase_scene_idx"]
+        search = ["SEARCH core_phrase USING INDEX phrase_lesson_idx (lesson_id=?)"]
+        self.assertIsNone(full_scan(search, self.filtered, "sqlite"))
+        # 索引の全件走査もフルスキャン（WHERE なしの LIMIT だけが LIMIT 件で止まる）
+        self.assertIsNone(full_scan(index_scan, self.page, "sqlite"))
+        self.assertEqual(full_scan(index_scan, self.filtered, "sqlite"), index_scan[0])
+        sorted_scan = ["SCAN core_phrase", "USE TEMP B-TREE FOR ORDER BY"]
+        self.assertEqual(full_scan(sorted_scan, self.page, "sqlite"), "SCAN core_phrase")
+        sql = 'SELECT * FROM "core_scene"'
+        self.assertEqual(full_scan(["SCAN core_scene"], sql, "sqlite"), "SCAN core_scene")
+        self.assertIsNone(full_scan(["SCAN core_scene"], sql, "sqlite", ALLOWED_SCANS["GET /api/scenes/"]))
+
+    def test_postgresql(self):
+        def plan(*nodes):
+            return [{"Plan": {"Node Type": "Limit", "Plans": list(nodes)}}]
+
+        seq = {"Node Type": "Seq Scan", "Relation Name": "core_phrase"}
+        full_index = {
+            "Node Type": "Index Scan",
+            "Relation Name": "core_phrase",
+            "Index Name": "phrase_scene_idx",
+        }
+        search = {**full_index, "Index Cond": "(lesson_id = 1)"}
+        self.assertEqual(full_scan(plan(seq), self.filtered, "postgresql"), "Seq Scan on core_phrase")
+        self.assertIn("without Index Cond", full_scan(plan(full_index), self.filtered, "postgresql"))
+        self.assertIsNone(full_scan(plan(full_index), self.page, "postgresql"))
+        self.assertIsNone(full_scan(plan(search), self.filtered, "postgresql"))
+        sort = {"Node Type": "Sort", "Plans": [seq]}
+        self.assertEqual(full_scan(plan(sort), self.page, "postgresql"), "Seq Scan on core_phrase")
+        self.assertIsNone(full_scan(plan(seq), self.filtered, "postgresql", {"core_phrase": "理由"}))
@@ -0,0 +1,45 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core.models import Phrase, PhraseReviewState, Scene
+from core.review import answer_cards
+
+
+class AnswerCardsConcurrencyTests(TransactionTestCase):
+    # 別スレッド（別接続）からの同時回答が "database is locked" にならない
+    # （SQLite で読み取り→書き込みの昇格が busy_timeout を待たずに失敗しない）
+    threads = 8
+    rounds = 5
+
+    def test_concurrent_answers(self):
+        scene = Scene.objects.create(title="s")
+        phrases = [Phrase.objects.create(scene=scene, text_en=f"p{i}", text_ja=f"p{i}") for i in range(3)]
+        users = [User.objects.create(username=f"u{i}") for i in range(self.threads)]
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def answer(user):
+            try:
+                for _ in range(self.rounds):
+                    barrier.wait()
+                    answer_cards(user.pk, [{"phrase_id": phrase.pk, "grade": 4} for phrase in phrases])
+            except Exception as exc:  # スレッド内の例外はテストの失敗として報告する
+                errors.append(exc)
+                barrier.abort()
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=answer, args=(user,)) for user in users]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(PhraseReviewState.objects.count(), self.threads * len(phrases))
+        self.assertEqual(
+            set(PhraseReviewState.objects.values_list("repetitions", flat=True)), {self.rounds}
+        )
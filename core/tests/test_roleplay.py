@@ -0,0 +1,227 @@
+import asyncio
+import json
+
+from asgiref.testing import ApplicationCommunicator
+from channels.routing import URLRouter
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core.consumers import RateLimiter
+from core.models import Dialogue, Scene
+from core.routing import websocket_urlpatterns
+
+TIMEOUT = 2
+
+
+class WebsocketCommunicator(ApplicationCommunicator):
+    # channels.testing.WebsocketCommunicator と同じ使い方の最小版
+    # （channels.testing は daphne を読み込むが、daphne は依存に含めていない）
+    def __init__(self, application, path):
+        scope = {"type": "websocket", "path": path, "headers": [], "subprotocols": [], "query_string": b""}
+        super().__init__(application, scope)
+
+    async def connect(self, timeout=1):
+        await self.send_input({"type": "websocket.connect"})
+        message = await self.receive_output(timeout)
+        if message["type"] == "websocket.close":
+            return False, message.get("code", 1000)
+        return True, None
+
+    async def send_json_to(self, data):
+        await self.send_input({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json_from(self, timeout=1):
+        message = await self.receive_output(timeout)
+        return json.loads(message["text"])
+
+    async def disconnect(self, code=1000, timeout=1):
+        await self.send_input({"type": "websocket.disconnect", "code": code})
+        await self.wait(timeout)
+
+
+class ScriptedGenerator:
+    # テスト用の生成器: hold の間は released が立つまでトークンを返さない
+    tokens = ["Let's ", "start ", "the ", "meeting."]
+    hold = False
+    instances = []
+
+    def __init__(self, scene_id):
+        self.produced = 0
+        self.released = asyncio.Event()
+        self.cancelled = asyncio.Event()
+        if not self.hold:
+            self.released.set()
+        self.instances.append(self)
+
+    async def load(self):
+        return True
+
+    async def stream(self, message):
+        try:
+            for token in self.tokens:
+                await self.released.wait()
+                self.produced += 1
+                yield token
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+    def hint(self):
+        return {"speaker": "PM", "en": "OK.", "ja": "了解です。"}
+
+
+class HeldGenerator(ScriptedGenerator):
+    hold = True
+
+
+class LongGenerator(ScriptedGenerator):
+    tokens = [f"t{i} " for i in range(20)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimiterTests(SimpleTestCase):
+    def test_token_bucket(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, period=10, clock=clock)
+        self.assertEqual([limiter.hit(), limiter.hit()], [0, 0])
+        self.assertAlmostEqual(limiter.hit(), 5)
+        # 5 秒で1回分回復し、上限 rate を超えて貯まらない
+        clock.now = 5
+        self.assertEqual(limiter.hit(), 0)
+        clock.now = 100
+        self.assertEqual([limiter.hit(), limiter.hit()], [0, 0])
+        self.assertGreater(limiter.hit(), 0)
+
+
+@override_settings(ROLEPLAY_REPLY_GENERATOR="core.tests.test_roleplay.ScriptedGenerator")
+class RoleplayConsumerTests(SimpleTestCase):
+    def setUp(self):
+        ScriptedGenerator.instances.clear()
+
+    async def connect(self, application=None):
+        communicator = WebsocketCommunicator(application or URLRouter(websocket_urlpatterns), "/ws/roleplay/1/")
+        connected, _ = await communicator.connect(timeout=TIMEOUT)
+        self.assertTrue(connected)
+        return communicator
+
+    async def receive_reply(self, communicator):
+        # start から done までのイベントを返す
+        events = [await communicator.receive_json_from(TIMEOUT)]
+        while events[-1]["type"] not in ("done", "error"):
+            events.append(await communicator.receive_json_from(TIMEOUT))
+        return events
+
+    async def send_message(self, communicator, content="Hello"):
+        await communicator.send_json_to({"type": "message", "content": content})
+
+    async def test_reply(self):
+        communicator = await self.connect()
+        events = await self.receive_reply(communicator)
+        self.assertEqual(events[0], {"type": "start"})
+        self.assertEqual(events[-1]["content"], "Let's start the meeting.")
+        self.assertEqual(events[-1]["hint"]["en"], "OK.")
+        await communicator.disconnect()
+
+    @override_settings(ROLEPLAY_RATE_LIMIT=2, ROLEPLAY_RATE_PERIOD=60)
+    async def test_rate_limited(self):
+        communicator = await self.connect()
+        await self.receive_reply(communicator)
+        for _ in range(2):
+            await self.send_message(communicator)
+            self.assertEqual((await self.receive_reply(communicator))[-1]["type"], "done")
+        await self.send_message(communicator)
+        event = await communicator.receive_json_from(TIMEOUT)
+        self.assertEqual(event["code"], "rate_limited")
+        self.assertGreater(event["retry_after"], 29)
+        await communicator.disconnect()
+
+    @override_settings(ROLEPLAY_REPLY_GENERATOR="core.tests.test_roleplay.HeldGenerator")
+    async def test_busy_while_replying(self):
+        communicator = await self.connect()
+        self.assertEqual(await communicator.receive_json_from(TIMEOUT), {"type": "start"})
+        await self.send_message(communicator)
+        self.assertEqual((await communicator.receive_json_from(TIMEOUT))["code"], "busy")
+        # 拒否したメッセージで返信は始まらない
+        ScriptedGenerator.instances[0].released.set()
+        self.assertEqual((await self.receive_reply(communicator))[-1]["type"], "done")
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    @override_settings(ROLEPLAY_REPLY_GENERATOR="core.tests.test_roleplay.HeldGenerator")
+    async def test_cancel(self):
+        communicator = await self.connect()
+        await communicator.receive_json_from(TIMEOUT)
+        await communicator.send_json_to({"type": "cancel"})
+        self.assertEqual(await communicator.receive_json_from(TIMEOUT), {"type": "cancelled"})
+        await asyncio.wait_for(ScriptedGenerator.instances[0].cancelled.wait(), TIMEOUT)
+        await communicator.disconnect()
+
+    @override_settings(ROLEPLAY_REPLY_GENERATOR="core.tests.test_roleplay.HeldGenerator")
+    async def test_disconnect_cancels_reply(self):
+        communicator = await self.connect()
+        await communicator.receive_json_from(TIMEOUT)
+        await communicator.disconnect()
+        await asyncio.wait_for(ScriptedGenerator.instances[0].cancelled.wait(), TIMEOUT)
+
+    @override_settings(
+        ROLEPLAY_REPLY_GENERATOR="core.tests.test_roleplay.LongGenerator", ROLEPLAY_SEND_BUFFER=2
+    )
+    async def test_backpressure(self):
+        # クライアントへの送信が止まっている間は、キュー分（+ put 待ちの1つ）しか生成しない
+        gate = asyncio.Event()
+        application = URLRouter(websocket_urlpatterns)
+
+        async def slow_client(scope, receive, send):
+            async def gated_send(message):
+                if message["type"] == "websocket.send":
+                    await gate.wait()
+                await send(message)
+
+            await application(scope, receive, gated_send)
+
+        communicator = await self.connect(slow_client)
+        generator = ScriptedGenerator.instances[0]
+        await asyncio.sleep(0.1)
+        self.assertEqual(generator.produced, 3)
+
+        gate.set()
+        events = await self.receive_reply(communicator)
+        tokens = [event["content"] for event in events if event["type"] == "token"]
+        self.assertEqual("".join(tokens), "".join(LongGenerator.tokens))
+        # 溜まったトークンはまとめて送る
+        self.assertLess(len(tokens), len(LongGenerator.tokens))
+        self.assertEqual(generator.produced, len(LongGenerator.tokens))
+        await communicator.disconnect()
+
+
+@override_settings(ROLEPLAY_TOKEN_INTERVAL_MS=0)
+class DialogueReplyGeneratorTests(TransactionTestCase):
+    # 既定の生成器はスレッドで DB を読むので、コミット済みのデータで確認する
+    async def connect(self, scene):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/roleplay/{scene.pk}/")
+        return communicator, await communicator.connect(timeout=TIMEOUT)
+
+    async def test_plays_dialogue_in_order(self):
+        scene = await Scene.objects.acreate(title="s")
+        for order, (speaker, line) in enumerate([("PM", "Any blockers?"), ("Dev", "None so far.")], 1):
+            await Dialogue.objects.acreate(scene=scene, speaker=speaker, line_en=line, line_ja="-", order=order)
+        communicator, (connected, _) = await self.connect(scene)
+        self.assertTrue(connected)
+        events = [await communicator.receive_json_from(TIMEOUT)]
+        while events[-1]["type"] != "done":
+            events.append(await communicator.receive_json_from(TIMEOUT))
+        self.assertEqual(events[-1]["content"], "Any blockers?")
+        self.assertEqual(events[-1]["hint"]["en"], "None so far.")
+        await communicator.disconnect()
+
+    async def test_scene_without_dialogue_is_rejected(self):
+        scene = await Scene.objects.acreate(title="s")
+        communicator, (connected, code) = await self.connect(scene)
+        self.assertFalse(connected)
+        self.assertEqual(code, 4404)
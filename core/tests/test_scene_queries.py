@@ -0,0 +1,81 @@
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.cache import get_catalog_cache
+from core.models import Dialogue, Lesson, Phrase, Scene
+from core.views import SceneViewSet
+
+
+def create_catalog(scenes):
+    # シーンごとにレッスン2件・フレーズ3件・対話3件（order は id と逆順）
+    created = Scene.objects.bulk_create([Scene(title=f"Scene {i}") for i in range(scenes)])
+    lessons = Lesson.objects.bulk_create(
+        [Lesson(scene=scene, title=f"Lesson {i}") for scene in created for i in range(2)]
+    )
+    Phrase.objects.bulk_create(
+        [
+            Phrase(scene=lesson.scene, lesson=lesson, text_en=f"phrase {i}", text_ja=f"フレーズ {i}")
+            for lesson in lessons[::2]
+            for i in range(3)
+        ]
+    )
+    Dialogue.objects.bulk_create(
+        [
+            Dialogue(scene=scene, speaker="A", line_en=f"line {i}", line_ja=f"行 {i}", order=3 - i)
+            for scene in created
+            for i in range(3)
+        ]
+    )
+
+
+class SceneQueryCountTests(TestCase):
+    # /api/scenes/ と /api/scenes/<id>/ のクエリ数がシーン数に依らないこと
+    sizes = (6, 60, 600)
+
+    def count_queries(self, path):
+        # キャッシュを空にして、毎回シリアライズからやり直す
+        get_catalog_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def count_sync_queries(self, actions, path, **kwargs):
+        get_catalog_cache().clear()
+        request = RequestFactory().get(path, HTTP_ACCEPT="application/json")
+        with CaptureQueriesContext(connection) as queries:
+            response = SceneViewSet.as_view(actions)(request, **kwargs)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        counts = {}
+        total = 0
+        for size in self.sizes:
+            create_catalog(size - total)
+            total = size
+            scene = Scene.objects.order_by("id").first()
+            list_count, data = self.count_queries("/api/scenes/")
+            self.assertEqual(len(data), size)
+            detail_count, _ = self.count_queries(f"/api/scenes/{scene.pk}/")
+            counts[size] = (
+                list_count,
+                detail_count,
+                self.count_sync_queries({"get": "list"}, "/api/scenes/"),
+                self.count_sync_queries(
+                    {"get": "retrieve"}, f"/api/scenes/{scene.pk}/", pk=str(scene.pk)
+                ),
+            )
+        self.assertEqual(len(set(counts.values())), 1, counts)
+        # シーン1 + phrases / dialogues / lessons の prefetch 3 + ETag 用の集計4（4モデル）
+        self.assertEqual(counts[self.sizes[0]], (8, 8, 8, 8), counts)
+
+    def test_dialogues_keep_meta_ordering(self):
+        create_catalog(6)
+        _, data = self.count_queries("/api/scenes/")
+        for scene in data:
+            orders = [dialogue["order"] for dialogue in scene["dialogues"]]
+            self.assertEqual(orders, sorted(orders))
+            self.assertEqual(len(orders), 3)
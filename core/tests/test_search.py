@@ -0,0 +1,70 @@
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from core.models import Phrase, Scene
+from core.search import SEARCH_TABLE, has_search_table, search_objects
+
+
+class SearchTests(TestCase):
+    def test_saved_phrase_is_searchable(self):
+        scene = Scene.objects.create(title="障害対応")
+        phrase = Phrase.objects.create(scene=scene, text_en="Roll back the deploy", text_ja="ロールバックします")
+        Phrase.objects.create(scene=scene, text_en="Estimate the task", text_ja="見積もります")
+        results = search_objects("rollback") + search_objects("ロールバック")
+        self.assertIn(phrase, [obj for _kind, obj, _rank in results])
+        self.assertEqual([obj for _kind, obj, _rank in search_objects("ロールバック")], [phrase])
+
+
+@skipUnless(connection.vendor == "sqlite", "FTS5 index is SQLite only")
+class SearchMigrationTests(TransactionTestCase):
+    # 0009 は履歴モデルから索引を作る（core.search の現在のコードに依存しない）
+    before = [("core", "0008_progress_summaries")]
+    after = [("core", "0009_search_index")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        # 最新まで戻す（他のテストのため）
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migration_indexes_existing_rows(self):
+        apps = self.migrate(self.before)
+        self.assertNotIn(SEARCH_TABLE, connection.introspection.table_names())
+        scene = apps.get_model("core", "Scene").objects.create(title="s")
+        phrase = apps.get_model("core", "Phrase").objects.create(
+            scene_id=scene.pk, text_en="rollback plan", text_ja="切り戻し"
+        )
+        dialogue = apps.get_model("core", "Dialogue").objects.create(
+            scene_id=scene.pk, speaker="PM", line_en="ship it", line_ja="リリース", order=1
+        )
+
+        self.migrate(self.after)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid, en, ja, scene_id FROM {SEARCH_TABLE}")
+            rows = cursor.fetchall()
+        # TransactionTestCase は連番をリセットしないので rowid の大小は他のテスト次第
+        self.assertCountEqual(
+            rows,
+            [
+                (phrase.pk * 2, "rollback plan", "切り戻し", scene.pk),
+                (dialogue.pk * 2 + 1, "ship it", "リリース", scene.pk),
+            ],
+        )
+
+        self.migrate(self.before)
+        self.assertNotIn(SEARCH_TABLE, connection.introspection.table_names())
+
+    def test_post_migrate_refreshes_table_cache(self):
+        self.migrate(self.before)
+        self.assertFalse(has_search_table(connection))
+        call_command("migrate", "core", verbosity=0)
+        self.assertTrue(has_search_table(connection))
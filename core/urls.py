@@ -1,10 +1,16 @@
+from django.urls import path
 from rest_framework import routers
+from .async_views import async_read_urls
 from .views import (
     SceneViewSet,
     PhraseViewSet,
     DialogueViewSet,
     LessonViewSet,
     UserProgressViewSet,
+    SearchViewSet,
+    ReviewViewSet,
+    progress_report,
+    prometheus_metrics,
 )
 
 router = routers.DefaultRouter()
@@ -13,5 +19,11 @@ router.register("phrases", PhraseViewSet)
 router.register("dialogues", DialogueViewSet)
 router.register("lessons", LessonViewSet)
 router.register("progress", UserProgressViewSet)
+router.register("search", SearchViewSet, basename="search")
+router.register("review", ReviewViewSet, basename="review")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("reports/progress/", progress_report, name="progress-report"),
+    path("_metrics/", prometheus_metrics, name="metrics"),
+    *async_read_urls(router.urls),
+]
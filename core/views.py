@@ -1,9 +1,40 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
-from .models import Scene, Phrase, Dialogue, Lesson, UserProgress
+from django.utils import timezone
+from .analytics import FORMATS, REPORTS, aiter_chunks, iter_report
+from .async_views import aauthenticate, aget_object_or_404
+from .cache import CatalogCacheMixin, acall_cache, content_version
+from .conditional import (
+    ConditionalGetMixin,
+    acatalog_states,
+    amodel_state,
+    catalog_states,
+    model_state,
+)
+from .fieldsets import SparseFieldsetMixin
+from .fragments import EncodedResponseMixin
+from .metrics import render_prometheus
+from .models import (
+    Scene,
+    Phrase,
+    Dialogue,
+    Lesson,
+    UserProgress,
+    SceneProgressSummary,
+    UserProgressSummary,
+)
+from .pagination import KeysetPagination
+from .progress import LessonNotFound, sync_progress, upsert_progress
+from .review import answer_cards, next_cards
+from .search import search_objects
 from .serializers import (
     SceneSerializer,
     PhraseSerializer,
@@ -11,20 +42,78 @@ from .serializers import (
     LessonSerializer,
     UserProgressSerializer,
     LessonDetailSerializer,  # 追加
+    LessonBundleSerializer,
+    BundleProgressSerializer,
+    LessonCompletionSerializer,
+    ProgressSyncRecordSerializer,
+    ReviewAnswerSerializer,
+    ReviewCardSerializer,
+    ReviewStateSerializer,
+    SearchQuerySerializer,
+    SceneProgressSummarySerializer,
+    UserProgressSummarySerializer,
 )
 
 
-class SceneViewSet(viewsets.ModelViewSet):
+class SceneViewSet(
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    SparseFieldsetMixin,
+    EncodedResponseMixin,
+    viewsets.ModelViewSet,
+):
+    etag_models = (Scene, Phrase, Dialogue, Lesson)
     queryset = Scene.objects.all()
     serializer_class = SceneSerializer
+    expand_prefetches = {
+        "dialogues": Prefetch("dialogues", queryset=Dialogue.objects.order_by("order")),
+    }
+
+    def get_queryset(self):
+        # 展開するネストだけをまとめて取得（シーン数に依らずクエリ数一定）
+        return self.sparse_queryset(Scene.objects.all())
+
+    # list / retrieve の async 版（core.async_views 経由。キャッシュと ETag は同期版と共有）
+    async def alist(self, request):
+        async def data():
+            scenes = [scene async for scene in self.filter_queryset(self.get_queryset())]
+            version = await acall_cache(content_version)
+            return self.encoded_data(self.get_serializer(scenes, many=True), version)
+
+        async def build():
+            return Response(await self.acached_data(request, data))
+
+        states = await acatalog_states(self.etag_models)
+        return await self.aconditional_response(request, build, states)
+
+    async def aretrieve(self, request, pk=None):
+        async def data():
+            scene = await aget_object_or_404(self.filter_queryset(self.get_queryset()), pk=pk)
+            version = await acall_cache(content_version)
+            return self.encoded_data(self.get_serializer(scene), version)
+
+        async def build():
+            return Response(await self.acached_data(request, data))
+
+        states = await acatalog_states(self.etag_models)
+        return await self.aconditional_response(request, build, states)
 
 
-class PhraseViewSet(viewsets.ModelViewSet):
+class PhraseViewSet(
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    SparseFieldsetMixin,
+    EncodedResponseMixin,
+    viewsets.ModelViewSet,
+):
+    etag_models = (Phrase,)
     queryset = Phrase.objects.all()
     serializer_class = PhraseSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("scene_id", "id")
 
     def get_queryset(self):
-        qs = Phrase.objects.all()
+        qs = self.sparse_queryset(Phrase.objects.all())
         lesson_id = self.request.query_params.get("lesson")
         scene_id = self.request.query_params.get("scene")
         if lesson_id:
@@ -34,12 +123,21 @@ class PhraseViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class DialogueViewSet(viewsets.ModelViewSet):
+class DialogueViewSet(
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    SparseFieldsetMixin,
+    EncodedResponseMixin,
+    viewsets.ModelViewSet,
+):
+    etag_models = (Dialogue,)
     queryset = Dialogue.objects.all()
     serializer_class = DialogueSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("scene_id", "order", "id")
 
     def get_queryset(self):
-        qs = Dialogue.objects.all()
+        qs = self.sparse_queryset(Dialogue.objects.all())
         lesson_id = self.request.query_params.get("lesson")
         scene_id = self.request.query_params.get("scene")
         if lesson_id:
@@ -49,19 +147,147 @@ class DialogueViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class LessonViewSet(viewsets.ModelViewSet):
+class LessonViewSet(
+    ConditionalGetMixin,
+    CatalogCacheMixin,
+    SparseFieldsetMixin,
+    EncodedResponseMixin,
+    viewsets.ModelViewSet,
+):
+    etag_models = (Lesson, Phrase, Dialogue)
     queryset = Lesson.objects.all()
 
+    def get_queryset(self):
+        if getattr(self, "action", None) == "bundle":
+            return Lesson.objects.select_related("scene").prefetch_related(
+                Prefetch(
+                    "lesson_phrases",
+                    queryset=Phrase.objects.only(
+                        "id", "lesson_id", "text_en", "text_ja", "note"
+                    ),
+                ),
+                Prefetch(
+                    "lesson_dialogues",
+                    queryset=Dialogue.objects.only(
+                        "id", "lesson_id", "speaker", "line_en", "line_ja", "order"
+                    ).order_by("order"),
+                ),
+                Prefetch(
+                    "scene__lessons",
+                    queryset=Lesson.objects.only("id", "scene_id", "title").order_by("id"),
+                    to_attr="sibling_lessons",
+                ),
+            )
+        return self.sparse_queryset(Lesson.objects.all())
+
     def get_serializer_class(self):
         # 詳細取得（/lessons/:id/）ではフレーズ・対話を含む詳細シリアライザを返す
         if getattr(self, "action", None) == "retrieve":
             return LessonDetailSerializer
+        if getattr(self, "action", None) == "bundle":
+            return LessonBundleSerializer
         return LessonSerializer
 
+    @action(detail=True, methods=["get"])
+    def bundle(self, request, pk=None):
+        # レッスン詳細ページ用: レッスン・フレーズ・対話・同シーンのレッスン一覧と自分の進捗を1回で返す
+        if request.user.is_authenticated:
+            user_progress = UserProgress.objects.filter(user=request.user)
+        else:
+            user_progress = UserProgress.objects.none()
+        states = [
+            *catalog_states((Scene, Lesson, Phrase, Dialogue)),
+            model_state(user_progress),
+        ]
+
+        def build():
+            data = self.cached_data(
+                request, lambda: self.get_serializer(self.get_object()).data
+            )
+            sibling_ids = [s["id"] for s in data["siblings"]]
+            progress = user_progress.filter(lesson_id__in=sibling_ids).only(
+                "lesson_id", "score", "time_spent", "completed_at"
+            )
+            return Response(
+                {**data, "progress": BundleProgressSerializer(progress, many=True).data}
+            )
+
+        return self.conditional_response(
+            request, build, states=states, scope=request.user.pk
+        )
 
-class UserProgressViewSet(viewsets.ModelViewSet):
+    async def abundle(self, request, pk=None):
+        # bundle の async 版（core.async_views 経由）
+        user = await aauthenticate(request)
+        if user.is_authenticated:
+            user_progress = UserProgress.objects.filter(user=user)
+        else:
+            user_progress = UserProgress.objects.none()
+        states = [
+            *await acatalog_states((Scene, Lesson, Phrase, Dialogue)),
+            await amodel_state(user_progress),
+        ]
+
+        async def lesson_data():
+            lesson = await aget_object_or_404(self.filter_queryset(self.get_queryset()), pk=pk)
+            return self.get_serializer(lesson).data
+
+        async def build():
+            data = await self.acached_data(request, lesson_data)
+            sibling_ids = [s["id"] for s in data["siblings"]]
+            progress = user_progress.filter(lesson_id__in=sibling_ids).only(
+                "lesson_id", "score", "time_spent", "completed_at"
+            )
+            progress = [p async for p in progress]
+            return Response(
+                {**data, "progress": BundleProgressSerializer(progress, many=True).data}
+            )
+
+        return await self.aconditional_response(request, build, states, scope=user.pk)
+
+
+class SearchViewSet(ConditionalGetMixin, CatalogCacheMixin, viewsets.ViewSet):
+    # フレーズ・対話の全文検索: /api/search/?q=...&limit=20（関連度の高い順）
+    etag_models = (Phrase, Dialogue)
+
+    def list(self, request):
+        query = SearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        def build():
+            results = []
+            for kind, obj, rank in search_objects(**query.validated_data):
+                en, ja = (
+                    (obj.line_en, obj.line_ja) if kind == "dialogue" else (obj.text_en, obj.text_ja)
+                )
+                results.append(
+                    {
+                        "type": kind,
+                        "id": obj.id,
+                        "scene": obj.scene_id,
+                        "lesson": obj.lesson_id,
+                        "en": en,
+                        "ja": ja,
+                        "rank": round(rank, 4),
+                    }
+                )
+            return Response({"query": query.validated_data["q"], "results": results})
+
+        return self.conditional_response(request, lambda: self.cached_response(request, build))
+
+
+class UserProgressViewSet(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = UserProgress.objects.all()
     serializer_class = UserProgressSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-completed_at", "-id")
+
+    def get_queryset(self):
+        return self.sparse_queryset(UserProgress.objects.all())
+
+    def get_content_states(self, request):
+        # lesson_title / scene_title を含むため Lesson・Scene の状態も ETag に含める
+        return [model_state(UserProgress.objects.all()), *catalog_states((Lesson, Scene))]
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -72,45 +298,187 @@ class UserProgressViewSet(viewsets.ModelViewSet):
             progress = UserProgress.objects.filter(user=request.user)
         else:
             progress = UserProgress.objects.none()
-        serializer = self.get_serializer(progress, many=True)
-        return Response(serializer.data)
+        # ユーザー単位の ETag（自分の進捗の件数・最終更新から算出）
+        states = [model_state(progress), *catalog_states((Lesson, Scene))]
+
+        def build():
+            page = self.paginate_queryset(self.sparse_queryset(progress))
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        return self.conditional_response(
+            request,
+            build,
+            states=states,
+            scope=request.user.pk,
+        )
+
+    async def amy_progress(self, request):
+        # my_progress の async 版（core.async_views 経由）
+        user = await aauthenticate(request)
+        if user.is_authenticated:
+            progress = UserProgress.objects.filter(user=user)
+        else:
+            progress = UserProgress.objects.none()
+        states = [await amodel_state(progress), *await acatalog_states((Lesson, Scene))]
+
+        async def build():
+            page = await self.paginator.apaginate_queryset(
+                self.sparse_queryset(progress), request, view=self
+            )
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        return await self.aconditional_response(request, build, states, scope=user.pk)
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        # 完了レッスン数・スコア・学習時間・連続学習日数の集計（全体とシーン別）
+        if request.user.is_authenticated:
+            summaries = UserProgressSummary.objects.filter(user=request.user)
+            scenes = SceneProgressSummary.objects.filter(user=request.user)
+        else:
+            summaries = UserProgressSummary.objects.none()
+            scenes = SceneProgressSummary.objects.none()
+        states = [model_state(summaries), model_state(scenes)]
+
+        def build():
+            summary = summaries.first() or UserProgressSummary()
+            data = UserProgressSummarySerializer(summary).data
+            data["scenes"] = SceneProgressSummarySerializer(
+                scenes.order_by("scene_id"), many=True
+            ).data
+            return Response(data)
+
+        # 連続日数は日付が変わると途切れるため、日付も ETag に含める
+        return self.conditional_response(
+            request,
+            build,
+            states=states,
+            scope=(request.user.pk, timezone.localdate().isoformat()),
+        )
 
     @action(detail=False, methods=["post"])
     def complete_lesson(self, request):
-        lesson_id = request.data.get("lesson_id")
-        score = request.data.get("score", 0)
-        time_spent = request.data.get("time_spent", 0)
+        completion = LessonCompletionSerializer(data=request.data)
+        completion.is_valid(raise_exception=True)
+        lesson_id = completion.validated_data["lesson_id"]
+        score = completion.validated_data["score"]
+        time_spent = completion.validated_data["time_spent"]
 
-        # スコアを100%を超えないように制限
-        score = min(max(0, score), 100)
+        not_found = Response(
+            {"error": "レッスンが見つかりません"}, status=status.HTTP_404_NOT_FOUND
+        )
 
+        if not request.user.is_authenticated:
+            if not Lesson.objects.filter(id=lesson_id).exists():
+                return not_found
+            return Response(
+                {
+                    "ok": True,
+                    "lesson": lesson_id,
+                    "score": score,
+                    "time_spent": time_spent,
+                }
+            )
+
+        # 1文の INSERT ... ON CONFLICT DO UPDATE で記録（レッスンの存在は外部キーで検証）
         try:
-            lesson = Lesson.objects.get(id=lesson_id)
-            if request.user.is_authenticated:
-                progress, created = UserProgress.objects.get_or_create(
-                    user=request.user,
-                    lesson=lesson,
-                    defaults={"score": score, "time_spent": time_spent},
-                )
-                if not created:
-                    progress.score = max(progress.score, score)
-                    progress.time_spent = time_spent
-                    progress.save()
-                serializer = self.get_serializer(progress)
-                return Response(serializer.data)
-            else:
-                return Response(
-                    {
-                        "ok": True,
-                        "lesson": lesson.id,
-                        "score": score,
-                        "time_spent": time_spent,
-                    }
-                )
-        except Lesson.DoesNotExist:
+            progress = upsert_progress(request.user.pk, lesson_id, score, time_spent)
+        except LessonNotFound:
+            return not_found
+        progress.user = request.user
+        # lesson_title / scene_title の表示用（書き込みの後に読むだけ）
+        progress.lesson = Lesson.objects.select_related("scene").only(
+            "title", "scene__title"
+        ).get(id=lesson_id)
+        serializer = self.get_serializer(progress)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def sync(self, request):
+        # オフライン中の学習完了をまとめて反映する
+        # {"records": [{idempotency_key, lesson_id, score, time_spent, client_ts}]} または配列そのもの
+        records = request.data.get("records") if isinstance(request.data, dict) else request.data
+        if not isinstance(records, list):
+            return Response(
+                {"error": "records は配列で指定してください"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(records) > settings.PROGRESS_SYNC_MAX_RECORDS:
+            return Response(
+                {"error": f"records は {settings.PROGRESS_SYNC_MAX_RECORDS} 件までです"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = ProgressSyncRecordSerializer(data=records, many=True)
+        serializer.is_valid(raise_exception=True)
+        result = sync_progress(request.user.pk, serializer.validated_data)
+        result["progress"] = BundleProgressSerializer(result["progress"], many=True).data
+        return Response(result)
+
+
+class ReviewViewSet(viewsets.ViewSet):
+    # フレーズの間隔反復: review/next で期限切れのカードを取り、review/answer で回答をまとめて送る
+    permission_classes = [IsAuthenticated]
+
+    @action(detail=False, methods=["get"])
+    def next(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= settings.REVIEW_MAX_CARDS:
             return Response(
-                {"error": "レッスンが見つかりません"}, status=status.HTTP_404_NOT_FOUND
+                {"error": f"limit は 1〜{settings.REVIEW_MAX_CARDS} で指定してください"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        result = next_cards(request.user.pk, limit)
+        result["cards"] = ReviewCardSerializer(result["cards"], many=True).data
+        return Response(result)
+
+    @action(detail=False, methods=["post"])
+    def answer(self, request):
+        # {"answers": [{phrase_id, grade, reviewed_at}]} または配列そのもの（1トランザクションで反映）
+        answers = request.data.get("answers") if isinstance(request.data, dict) else request.data
+        if not isinstance(answers, list):
+            return Response(
+                {"error": "answers は配列で指定してください"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(answers) > settings.REVIEW_MAX_ANSWERS:
+            return Response(
+                {"error": f"answers は {settings.REVIEW_MAX_ANSWERS} 件までです"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = ReviewAnswerSerializer(data=answers, many=True)
+        serializer.is_valid(raise_exception=True)
+        result = answer_cards(request.user.pk, serializer.validated_data)
+        result["cards"] = ReviewStateSerializer(result["cards"], many=True).data
+        return Response(result)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def progress_report(request):
+    # スタッフ向け: ?report=lessons|scenes|funnel&output=csv|json をストリーミングで返す
+    report = request.query_params.get("report", "lessons")
+    output = request.query_params.get("output", "csv")
+    if report not in REPORTS or output not in FORMATS:
+        return Response(
+            {"error": f"report は {', '.join(REPORTS)}、output は {', '.join(FORMATS)} から指定してください"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    stream, content_type = FORMATS[output]
+    chunks = stream(iter_report(report))
+    if isinstance(request._request, ASGIRequest):
+        # ASGI では非同期イテレータにしないと全件をメモリに溜めてから送られる
+        chunks = aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="progress_{report}.{output}"'
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def prometheus_metrics(request):
+    # スタッフ向け: このプロセスのリクエスト計測（Prometheus のテキスト形式）
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 def home(request):
@@ -7,10 +7,12 @@ from channels.auth import AuthMiddlewareStack
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "engineer_english.settings")
 django.setup()
 
+from core.routing import websocket_urlpatterns  # noqa: E402
+
 application = ProtocolTypeRouter(
     {
         "http": get_asgi_application(),
-        # WebSocket routes can be added later, e.g. for AI chat role‑play
-        "websocket": AuthMiddlewareStack(URLRouter([])),
+        # シーンのロールプレイ（ws/roleplay/<scene_id>/）
+        "websocket": AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
     }
 )
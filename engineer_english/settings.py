@@ -1,5 +1,8 @@
 from pathlib import Path
 import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -8,6 +11,11 @@ SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "django-insecure-change-me")
 DEBUG = os.getenv("DJANGO_DEBUG", "False") == "True"
 ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
 
+# Lambda のコールドスタート向け: HTTP だけを処理する軽量構成
+# （channels を読み込まず、admin も DJANGO_ADMIN_ENABLED=True のときだけ有効）
+LEAN_STARTUP = os.getenv("DJANGO_LEAN_STARTUP", "False") == "True"
+ADMIN_ENABLED = os.getenv("DJANGO_ADMIN_ENABLED", "False" if LEAN_STARTUP else "True") == "True"
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -20,8 +28,13 @@ INSTALLED_APPS = [
     "corsheaders",
     "core",
 ]
+if not ADMIN_ENABLED:
+    INSTALLED_APPS.remove("django.contrib.admin")
+if LEAN_STARTUP:
+    INSTALLED_APPS.remove("channels")
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -61,9 +74,98 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": SQLITE_PATH if SQLITE_PATH else DEFAULT_SQLITE,
+        # 接続を使い回してリクエストごとの接続・PRAGMA 実行を避ける（0 でリクエストごとに閉じる）
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        # テスト DB はファイルにする（メモリ DB の共有キャッシュは同時書き込みを待たずに
+        # "database table is locked" になり、WAL / busy_timeout の挙動も本番と変わるため）
+        "TEST": {
+            "NAME": os.getenv("SQLITE_TEST_PATH")
+            or os.path.join(tempfile.gettempdir(), "engineer_english_test.sqlite3"),
+        },
     }
 }
 
+# atomic() のトランザクションを BEGIN IMMEDIATE で始め、開始時に書き込みロックを取る
+# （DEFERRED だと読み取り→書き込みの昇格が busy_timeout を待たずに "database is locked" になる）。
+# atomic() は書き込みにしか使っていないので読み取りは妨げない。空文字で SQLite の既定（DEFERRED）
+SQLITE_TRANSACTION_MODE = os.getenv("SQLITE_TRANSACTION_MODE", "IMMEDIATE")
+if SQLITE_TRANSACTION_MODE:
+    DATABASES["default"]["OPTIONS"] = {"transaction_mode": SQLITE_TRANSACTION_MODE}
+
+# 接続ごとに実行する PRAGMA（エイリアス別）。core.db.apply_sqlite_pragmas が適用する
+# 各値は環境変数で変更でき、空文字にするとその PRAGMA は実行しない。SQLITE_TUNING=False で全て無効
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "True") == "True"
+SQLITE_PRAGMAS = {}
+if SQLITE_TUNING:
+    SQLITE_PRAGMAS["default"] = {
+        name: value
+        for name, value in (
+            # WAL: 読み取りが書き込みをブロックしない
+            ("journal_mode", os.getenv("SQLITE_JOURNAL_MODE", "WAL")),
+            # WAL では NORMAL でも破損しない（電源断時に直近のコミットが失われ得るのみ）
+            ("synchronous", os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")),
+            # ロック中は即 "database is locked" にせず最大この ms 待つ
+            ("busy_timeout", os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            ("temp_store", os.getenv("SQLITE_TEMP_STORE", "MEMORY")),
+            ("mmap_size", os.getenv("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024))),
+        )
+        if value
+    }
+
+# 読み取り専用カタログモード: SQLITE_CATALOG_PATH があれば、Scene/Lesson/Phrase/Dialogue を
+# そのファイル（例: /var/task/seed_db.sqlite3）から immutable で直接読み、コピーしない。
+# 書き込み（UserProgress, セッション, ユーザー）は default（/tmp）へルーティングする。
+SQLITE_CATALOG_PATH = os.getenv("SQLITE_CATALOG_PATH")
+if SQLITE_CATALOG_PATH:
+    DATABASES["catalog"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": f"file:{SQLITE_CATALOG_PATH}?mode=ro&immutable=1",
+    }
+    DATABASE_ROUTERS = ["core.db_routers.CatalogRouter"]
+    SQLITE_PRAGMAS["catalog"] = {
+        "query_only": "ON",
+        "mmap_size": int(os.getenv("SQLITE_CATALOG_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # 負数は KiB 単位（既定 32MiB）
+        "cache_size": int(os.getenv("SQLITE_CATALOG_CACHE_SIZE", "-32000")),
+    }
+    # カタログの行は別ファイルにあるため、default 側ではレッスンへの外部キーを検査できない
+    SQLITE_PRAGMAS.setdefault("default", {})["foreign_keys"] = "OFF"
+
+# カタログAPIのキャッシュ: 既定は Lambda コンテナごとの locmem（LRU, 件数上限あり）
+# 共有する場合は CATALOG_CACHE_BACKEND / CATALOG_CACHE_LOCATION で Redis 等に切替
+CATALOG_CACHE_BACKEND = os.getenv(
+    "CATALOG_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "512"))
+# locmem ではコンテンツバージョンの更新（編集・seed）がそのプロセスにしか届かない。
+# 他のワーカー・コンテナは古い本文と ETag を返し続けるため、バージョンごと
+# CATALOG_CACHE_TIMEOUT 秒（locmem の既定 60）で期限切れにする（= 最大この秒数だけ古い）。
+# 共有キャッシュでは全プロセスが同じバージョンを見るので既定は無期限。"none" で無期限
+_catalog_timeout = os.getenv(
+    "CATALOG_CACHE_TIMEOUT",
+    "60" if CATALOG_CACHE_BACKEND.endswith("LocMemCache") else "none",
+)
+CATALOG_CACHE_TIMEOUT = None if _catalog_timeout.lower() == "none" else int(_catalog_timeout)
+# エンコード済みの断片（core.fragments）をプロセス内に持つ上限（Phrase / Dialogue / Lesson それぞれ）
+CATALOG_FRAGMENT_MAX_ENTRIES = int(os.getenv("CATALOG_FRAGMENT_MAX_ENTRIES", "20000"))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": CATALOG_CACHE_BACKEND,
+        "LOCATION": os.getenv("CATALOG_CACHE_LOCATION", "catalog"),
+        "TIMEOUT": CATALOG_CACHE_TIMEOUT,
+    },
+}
+if CATALOG_CACHE_BACKEND.endswith("LocMemCache"):
+    # 上限超過時は最も古く参照されたエントリから1件ずつ追い出す
+    CACHES["catalog"]["OPTIONS"] = {
+        "MAX_ENTRIES": CATALOG_CACHE_MAX_ENTRIES,
+        "CULL_FREQUENCY": CATALOG_CACHE_MAX_ENTRIES,
+    }
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "Asia/Tokyo"
 USE_I18N = True
@@ -72,12 +174,52 @@ USE_TZ = True
 STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-# Channels – use in‑memory for local dev.  In prod, switch to Redis.
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+# Channels のチャネルレイヤー（CHANNEL_LAYER_BACKEND で選択、既定は memory）。
+# redis / redis-pubsub は channels-redis が必要なので、REDIS_URL だけでは切り替えない
+#   memory:       1プロセス内のみ（開発用。uvicorn の複数ワーカー間では届かない）
+#   redis:        channels-redis（リスト + BZPOPMIN、チャネルごとの容量・有効期限あり）
+#   redis-pubsub: channels-redis の Pub/Sub 版（容量制限なし・ワーカー停止中のメッセージは失われる）
+CHANNEL_LAYER_BACKEND = os.getenv("CHANNEL_LAYER_BACKEND", "memory")
+if CHANNEL_LAYER_BACKEND == "memory":
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+elif CHANNEL_LAYER_BACKEND == "redis":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")],
+                "prefix": os.getenv("CHANNEL_LAYER_PREFIX", "asgi"),
+                "capacity": int(os.getenv("CHANNEL_LAYER_CAPACITY", "100")),
+                "expiry": int(os.getenv("CHANNEL_LAYER_EXPIRY", "60")),
+                "group_expiry": int(os.getenv("CHANNEL_LAYER_GROUP_EXPIRY", "86400")),
+            },
+        }
     }
-}
+elif CHANNEL_LAYER_BACKEND == "redis-pubsub":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {
+                "hosts": [os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")],
+                "prefix": os.getenv("CHANNEL_LAYER_PREFIX", "asgi"),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown CHANNEL_LAYER_BACKEND: {CHANNEL_LAYER_BACKEND}")
+
+# ロールプレイ（WebSocket ws/roleplay/<scene_id>/）
+# 返信の生成器（差し替え可能）と、既定の生成器がトークンを返す間隔
+ROLEPLAY_REPLY_GENERATOR = os.getenv(
+    "ROLEPLAY_REPLY_GENERATOR", "core.roleplay.DialogueReplyGenerator"
+)
+ROLEPLAY_TOKEN_INTERVAL_MS = int(os.getenv("ROLEPLAY_TOKEN_INTERVAL_MS", "30"))
+# 1接続あたり ROLEPLAY_RATE_PERIOD 秒に ROLEPLAY_RATE_LIMIT 通まで
+ROLEPLAY_RATE_LIMIT = int(os.getenv("ROLEPLAY_RATE_LIMIT", "5"))
+ROLEPLAY_RATE_PERIOD = float(os.getenv("ROLEPLAY_RATE_PERIOD", "10"))
+ROLEPLAY_MAX_MESSAGE_CHARS = int(os.getenv("ROLEPLAY_MAX_MESSAGE_CHARS", "1000"))
+# 送信待ちのトークン数の上限（超えると生成を待たせる）
+ROLEPLAY_SEND_BUFFER = int(os.getenv("ROLEPLAY_SEND_BUFFER", "64"))
 
 # CORS/CSRF: デフォルトは締める。必要に応じて環境変数で許可
 if os.getenv("DJANGO_CORS_ALLOW_ALL", "False") == "True":
@@ -90,6 +232,24 @@ _csrf_trusted = os.getenv("DJANGO_CSRF_TRUSTED_ORIGINS", "").strip()
 if _csrf_trusted:
     CSRF_TRUSTED_ORIGINS = [o for o in _csrf_trusted.split(",") if o]
 
+# カーソルページング（phrases / dialogues / progress）の既定件数と上限（?page_size= で指定可）
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "100"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+
+# progress/sync で1回に受け付けるレコード数の上限
+PROGRESS_SYNC_MAX_RECORDS = int(os.getenv("PROGRESS_SYNC_MAX_RECORDS", "1000"))
+
+# review/answer で1回に受け付ける回答数と、review/next で返すカード数の上限
+REVIEW_MAX_ANSWERS = int(os.getenv("REVIEW_MAX_ANSWERS", "1000"))
+REVIEW_MAX_CARDS = int(os.getenv("REVIEW_MAX_CARDS", "100"))
+
+# リクエストの計測（core.metrics）。Server-Timing ヘッダーと /api/_metrics/（スタッフのみ）
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "True") == "True"
+
+# 読み取りの多いエンドポイント（scene 一覧/詳細・lesson bundle・my_progress）を async ビューで処理する（core.async_views）
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "True") == "True"
+
 # Django REST Framework設定
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
@@ -99,4 +259,9 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    # JSON は orjson で描画する（未インストールなら標準の json。core.renderers）
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
@@ -1,9 +1,13 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 from core.views import home
 
 urlpatterns = [
     path("", home),
-    path("admin/", admin.site.urls),
     path("api/", include("core.urls")),
 ]
+
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.insert(1, path("admin/", admin.site.urls))
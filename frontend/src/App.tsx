@@ -77,12 +77,19 @@ function App() {
     const raw = localStorage.getItem(key);
     if (!raw) return;
     try {
-      const list: { lesson: number; score: number; time_spent: number }[] = JSON.parse(raw);
-      for (const item of list) {
-        await axios.post("/api/progress/complete_lesson/", {
-          lesson_id: item.lesson, score: item.score, time_spent: item.time_spent
-        });
-      }
+      const list: {
+        lesson: number; score: number; time_spent: number; client_ts?: string; idempotency_key?: string;
+      }[] = JSON.parse(raw);
+      // 1リクエストでまとめて反映（冪等キーがあるので再送しても二重に適用されない）
+      await axios.post("/api/progress/sync/", {
+        records: list.map((item) => ({
+          idempotency_key: item.idempotency_key || `${item.lesson}-${item.client_ts || "local"}`,
+          lesson_id: item.lesson,
+          score: item.score,
+          time_spent: item.time_spent,
+          ...(item.client_ts ? { client_ts: item.client_ts } : {}),
+        })),
+      });
       localStorage.removeItem(key);
     } catch {}
   }
@@ -131,7 +138,7 @@ function App() {
 
           {/* フッター */}
           <SiteFooter />
-          {/* 右下AIチャット（ダミー。後でAPI差し替え） */}
+          {/* 右下AIチャット（シーン詳細ではロールプレイ、それ以外はダミー） */}
           <ChatWidget />
         </Box>
       </Router>
@@ -69,11 +69,15 @@ function pushLocalProgress(item: { lesson: number; score: number; time_spent: nu
     const list = raw ? JSON.parse(raw) : [];
     // 既存の同lessonを上書き（scoreは高い方）
     const idx = list.findIndex((x: any) => x.lesson === item.lesson);
+    // client_ts / idempotency_key は /api/progress/sync/ でまとめて送るときに使う
+    const clientTs = new Date().toISOString();
     if (idx >= 0) {
       list[idx].score = Math.max(list[idx].score, item.score);
       list[idx].time_spent = item.time_spent;
+      list[idx].client_ts = clientTs;
+      list[idx].idempotency_key = `${item.lesson}-${clientTs}`;
     } else {
-      list.push(item);
+      list.push({ ...item, client_ts: clientTs, idempotency_key: `${item.lesson}-${clientTs}` });
     }
     localStorage.setItem(LOCAL_PROGRESS_KEY, JSON.stringify(list));
   } catch {}
@@ -194,14 +198,12 @@ const LessonDetail: React.FC = () => {
   useEffect(() => {
     if (lessonId) {
       setStartTime(new Date());
+      // レッスン・シーン情報を bundle エンドポイントで1回にまとめて取得
       axios
-        .get(`${API_BASE_URL}/api/lessons/${lessonId}/`)
+        .get(`${API_BASE_URL}/api/lessons/${lessonId}/bundle/`, { withCredentials: true })
         .then((res) => {
-          setLesson(res.data);
-          return axios.get(`${API_BASE_URL}/api/scenes/${res.data.scene}/`);
-        })
-        .then((res) => {
-          setScene(res.data);
+          setLesson({ ...res.data, scene: res.data.scene.id });
+          setScene(res.data.scene);
           setLoading(false);
         })
         .catch((err) => {
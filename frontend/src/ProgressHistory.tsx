@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
+import { fetchAllPages } from "./fetchAllPages";
 import {
   Card,
   CardContent,
@@ -77,7 +78,9 @@ const ProgressHistory: React.FC = () => {
   const fetchProgress = async () => {
     try {
       const [progressRes, scenesRes] = await Promise.all([
-        axios.get(`${API_BASE_URL}/api/progress/my_progress/`).catch(() => ({ data: [] })),
+        fetchAllPages<any>(`${API_BASE_URL}/api/progress/my_progress/`)
+          .then((data) => ({ data }))
+          .catch(() => ({ data: [] })),
         axios.get(`${API_BASE_URL}/api/scenes/`).catch(() => ({ data: [] })),
       ]);
       const server: Progress[] = progressRes.data || [];
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import axios from "axios";
+import { fetchAllPages } from "./fetchAllPages";
 import {
   Card,
   CardContent,
@@ -109,7 +110,9 @@ const SceneDetail: React.FC = () => {
     if (id) {
       Promise.all([
         axios.get(`${API_BASE_URL}/api/scenes/${id}/`),
-        axios.get(`${API_BASE_URL}/api/progress/my_progress/`).catch(() => ({ data: [] })),
+        fetchAllPages<any>(`${API_BASE_URL}/api/progress/my_progress/`)
+          .then((data) => ({ data }))
+          .catch(() => ({ data: [] })),
       ])
         .then(([sceneRes, progRes]) => {
           setScene(sceneRes.data);
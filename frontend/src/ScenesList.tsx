@@ -62,6 +62,7 @@ const ScenesList: React.FC = () => {
   const navigate = useNavigate();
   const [scenes, setScenes] = useState<Scene[]>([]);
   const [progress, setProgress] = useState<ProgressEntry[]>([]);
+  const [sceneCompleted, setSceneCompleted] = useState<Map<number, number>>(new Map());
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -76,32 +77,20 @@ const ScenesList: React.FC = () => {
     }
   }
 
-  function mergeProgress(serverList: ProgressEntry[], localList: ProgressEntry[]): ProgressEntry[] {
-    const map = new Map<number, ProgressEntry>();
-    for (const p of serverList) map.set(p.lesson, { ...p });
-    for (const p of localList) {
-      const cur = map.get(p.lesson);
-      if (!cur) {
-        map.set(p.lesson, { ...p });
-      } else {
-        // スコアは高い方、時間は最新で上書き
-        map.set(p.lesson, { ...cur, score: Math.max(cur.score, p.score), time_spent: p.time_spent });
-      }
-    }
-    return Array.from(map.values());
-  }
-
   useEffect(() => {
     const fetchAll = async () => {
       try {
-        const [scenesRes, progressRes] = await Promise.all([
+        // 進捗はサーバ側で集計済みのシーン別サマリーだけを取得する（履歴全件は取らない）
+        const [scenesRes, summaryRes] = await Promise.all([
           axios.get(`${API_BASE_URL}/api/scenes/`),
-          axios.get(`${API_BASE_URL}/api/progress/my_progress/`).catch(() => ({ data: [] }))
+          axios.get(`${API_BASE_URL}/api/progress/summary/`, { withCredentials: true })
+            .catch(() => ({ data: { scenes: [] } }))
         ]);
         setScenes(scenesRes.data);
-        const serverProgress: ProgressEntry[] = progressRes.data || [];
-        const localProgress = readLocalProgress();
-        setProgress(mergeProgress(serverProgress, localProgress));
+        const completed = new Map<number, number>();
+        for (const s of summaryRes.data?.scenes || []) completed.set(s.scene, s.lessons_completed);
+        setSceneCompleted(completed);
+        setProgress(readLocalProgress());
         setLoading(false);
       } catch (err: any) {
         // サーバが落ちていても、ローカル進捗だけは表示
@@ -114,11 +103,13 @@ const ScenesList: React.FC = () => {
     fetchAll();
   }, []);
 
-  const completedLessonIds = new Set(progress.map(p => p.lesson));
+  const localLessonIds = new Set(progress.map(p => p.lesson));
 
   const getSceneProgress = (scene: Scene) => {
     const total = scene.lessons?.length || 0;
-    const done = (scene.lessons || []).filter(l => completedLessonIds.has(l.id)).length;
+    // サーバの完了数と、未送信のローカル進捗の件数の大きい方
+    const localDone = (scene.lessons || []).filter(l => localLessonIds.has(l.id)).length;
+    const done = Math.min(Math.max(sceneCompleted.get(scene.id) || 0, localDone), total);
     const percent = total ? Math.round((done / total) * 100) : 0;
     return { done, total, percent };
   };
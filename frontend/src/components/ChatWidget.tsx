@@ -14,16 +14,49 @@ import {
 import ChatIcon from "@mui/icons-material/Chat";
 import CloseIcon from "@mui/icons-material/Close";
 import SendIcon from "@mui/icons-material/Send";
-import { ChatMessage, createDummyClient } from "../hooks/useChatClient";
+import { useMatch } from "react-router-dom";
+import { ChatMessage, SendOptions, createDummyClient, createRoleplayClient } from "../hooks/useChatClient";
+
+const GREETING: ChatMessage = { id: "sys-hello", role: "assistant", content: "こんにちは！英語学習をお手伝いします。なんでも聞いてください。" };
 
 const ChatWidget: React.FC = () => {
-  const client = useMemo(() => createDummyClient(), []);
+  // シーン詳細ページではそのシーンのロールプレイ（WebSocket でストリーミング）、それ以外はダミー
+  const sceneId = useMatch("/scene/:id")?.params.id;
+  const client = useMemo(() => (sceneId ? createRoleplayClient(sceneId) : createDummyClient()), [sceneId]);
   const [open, setOpen] = useState(false);
   const [input, setInput] = useState("");
   const [busy, setBusy] = useState(false);
-  const [messages, setMessages] = useState<ChatMessage[]>([
-    { id: "sys-hello", role: "assistant", content: "こんにちは！英語学習をお手伝いします。なんでも聞いてください。" },
-  ]);
+  const [messages, setMessages] = useState<ChatMessage[]>([GREETING]);
+
+  // 返信をトークンごとに末尾のメッセージへ追記し、完了したら確定した内容で置き換える
+  const streamReply = async (request: (options: SendOptions) => Promise<ChatMessage>) => {
+    const id = Math.random().toString(36).slice(2);
+    setMessages((m) => [...m, { id, role: "assistant", content: "" }]);
+    setBusy(true);
+    try {
+      const reply = await request({
+        onToken: (chunk) => setMessages((m) => m.map((msg) => (msg.id === id ? { ...msg, content: msg.content + chunk } : msg))),
+      });
+      setMessages((m) => m.map((msg) => (msg.id === id ? { ...reply, id } : msg)));
+    } catch (e: any) {
+      setMessages((m) => m.map((msg) => (msg.id === id ? { ...msg, role: "system", content: e?.message || "エラーが発生しました" } : msg)));
+    } finally {
+      setBusy(false);
+    }
+  };
+
+  useEffect(() => {
+    if (!open || !client.start) return;
+    const start = client.start;
+    setMessages([]);
+    streamReply((options) => start(options));
+    return () => client.close?.();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [client, open]);
+
+  useEffect(() => {
+    if (!client.start) setMessages([GREETING]);
+  }, [client]);
 
   const listRef = useRef<HTMLDivElement | null>(null);
   useEffect(() => {
@@ -38,13 +71,7 @@ const ChatWidget: React.FC = () => {
     const userMsg: ChatMessage = { id: Math.random().toString(36).slice(2), role: "user", content: text };
     setMessages((m) => [...m, userMsg]);
     setInput("");
-    setBusy(true);
-    try {
-      const assistant = await client.send([...messages, userMsg]);
-      setMessages((m) => [...m, assistant]);
-    } finally {
-      setBusy(false);
-    }
+    await streamReply((options) => client.send([...messages, userMsg], options));
   };
 
   return (
@@ -57,7 +84,7 @@ const ChatWidget: React.FC = () => {
         <Box sx={{ position: "fixed", right: 24, bottom: 96, width: { xs: '90vw', sm: 420 }, height: { xs: '70vh', sm: '70vh' } }}>
           <Paper elevation={6} sx={{ p: 1.5, display: 'flex', flexDirection: 'column', height: '100%' }}>
             <Stack direction="row" alignItems="center" justifyContent="space-between" sx={{ mb: 1 }}>
-              <Typography variant="subtitle1" sx={{ fontWeight: 600 }}>AI Chat</Typography>
+              <Typography variant="subtitle1" sx={{ fontWeight: 600 }}>{sceneId ? "ロールプレイ" : "AI Chat"}</Typography>
               <IconButton size="small" onClick={() => setOpen(false)}><CloseIcon /></IconButton>
             </Stack>
             <Divider />
@@ -80,6 +107,11 @@ const ChatWidget: React.FC = () => {
                         }}
                       >
                         <Typography variant="body2" whiteSpace="pre-wrap">{m.content}</Typography>
+                        {m.hint && (
+                          <Typography variant="caption" color="text.secondary" display="block" sx={{ mt: 0.5 }}>
+                            例: {m.hint.en}（{m.hint.ja}）
+                          </Typography>
+                        )}
                       </Paper>
                     </Box>
                   );
@@ -0,0 +1,17 @@
+import axios from "axios";
+
+// カーソルページング（{ next, next_cursor, results }）のレスポンスを最後まで辿って配列で返す
+// ページングされていない配列レスポンスもそのまま受け付ける
+export async function fetchAllPages<T>(url: string): Promise<T[]> {
+  const items: T[] = [];
+  let next: string | null = url;
+  while (next) {
+    const res: { data: any } = await axios.get(next);
+    if (Array.isArray(res.data)) {
+      return items.concat(res.data);
+    }
+    items.push(...(res.data?.results || []));
+    next = res.data?.next || null;
+  }
+  return items;
+}
@@ -1,19 +1,33 @@
 export type ChatRole = 'user' | 'assistant' | 'system';
 
+export type ChatHint = {
+  speaker: string;
+  en: string;
+  ja: string;
+};
+
 export type ChatMessage = {
   id: string;
   role: ChatRole;
   content: string;
+  // ロールプレイ: 次にユーザーが言う例文
+  hint?: ChatHint;
 };
 
 export type SendOptions = {
-  // 将来: streaming?: boolean;
+  // ストリーミング中のトークン（受け取った分の差分）
+  onToken?: (chunk: string) => void;
 };
 
 export interface ChatClient {
   send(messages: ChatMessage[], options?: SendOptions): Promise<ChatMessage>;
+  // 最初のあいさつ（ロールプレイのみ）
+  start?(options?: SendOptions): Promise<ChatMessage>;
+  close?(): void;
 }
 
+const newId = () => Math.random().toString(36).slice(2);
+
 // ダミークライアント（UI確認用）
 export function createDummyClient(): ChatClient {
   return {
@@ -24,7 +38,7 @@ export function createDummyClient(): ChatClient {
       const content = `You said: "${reply}"\n\n(この返信はダミーです。後でAPIに置き換え予定)`;
       await new Promise((r) => setTimeout(r, 500));
       return {
-        id: Math.random().toString(36).slice(2),
+        id: newId(),
         role: 'assistant',
         content,
       };
@@ -32,5 +46,78 @@ export function createDummyClient(): ChatClient {
   };
 }
 
+const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:8000';
+
+type Pending = {
+  resolve: (message: ChatMessage) => void;
+  reject: (error: Error) => void;
+  options?: SendOptions;
+};
+
+// シーンのロールプレイ（WebSocket ws/roleplay/<sceneId>/）。返信はトークン単位で onToken に流れる。
+// 接続するとまずアシスタントのあいさつが届き、それを受け取った時点で接続完了とする（start() で受け取れる）。
+// 返信は1つずつ（返信中の send はエラー）
+export function createRoleplayClient(sceneId: number | string, baseUrl: string = API_BASE_URL): ChatClient {
+  const url = `${baseUrl.replace(/^http/, 'ws').replace(/\/$/, '')}/ws/roleplay/${sceneId}/`;
+  let socket: WebSocket | null = null;
+  let opened: Promise<ChatMessage> | null = null;
+  let pending: Pending | null = null;
+
+  const fail = (error: Error) => {
+    const current = pending;
+    pending = null;
+    current?.reject(error);
+  };
+
+  const waitReply = (options?: SendOptions) =>
+    new Promise<ChatMessage>((resolve, reject) => {
+      pending = { resolve, reject, options };
+    });
+
+  const connect = (options?: SendOptions) => {
+    if (opened) return opened;
+    const ws = new WebSocket(url);
+    opened = waitReply(options);
+    ws.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === 'token') {
+        pending?.options?.onToken?.(data.content);
+      } else if (data.type === 'done') {
+        const current = pending;
+        pending = null;
+        current?.resolve({ id: newId(), role: 'assistant', content: data.content, hint: data.hint });
+      } else if (data.type === 'error') {
+        fail(new Error(data.code === 'rate_limited' ? `送信が多すぎます（${data.retry_after}秒後に再送できます）` : data.detail || data.code));
+      } else if (data.type === 'cancelled') {
+        fail(new Error('キャンセルしました'));
+      }
+    };
+    ws.onclose = () => {
+      socket = null;
+      opened = null;
+      fail(new Error('接続が切れました'));
+    };
+    socket = ws;
+    return opened;
+  };
+
+  return {
+    start(options) {
+      return connect(options);
+    },
+    async send(messages, options) {
+      if (pending) throw new Error('返信の途中です');
+      await connect();
+      const last = messages[messages.length - 1];
+      const reply = waitReply(options);
+      socket?.send(JSON.stringify({ type: 'message', content: last?.content || '' }));
+      return reply;
+    },
+    close() {
+      socket?.close();
+    },
+  };
+}
+
 // 将来の実装例（OpenAI/Bedrock/Ollama）
-// export function createOpenAIClient({ baseUrl, apiKey, model }: { baseUrl?: string; apiKey: string; model: string }): ChatClient { /* ... */ return {} as any } 
\ No newline at end of file
+// export function createOpenAIClient({ baseUrl, apiKey, model }: { baseUrl?: string; apiKey: string; model: string }): ChatClient { /* ... */ return {} as any }
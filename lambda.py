@@ -1,15 +1,84 @@
+import json
 import os
 import shutil
+import time
 from pathlib import Path
 
-SEED = Path("/var/task/seed_db.sqlite3")
+# コールドスタートの各フェーズ(ms)。初回リクエスト後に1行の JSON ログとして出力する
+STARTUP_PHASES = {}
+
+
+def _record(phase, started):
+    STARTUP_PHASES[phase] = round((time.perf_counter() - started) * 1000, 2)
+
+
+# 読み取り専用カタログモード（SQLITE_CATALOG_PATH）ではカタログはイメージ内から直接読み、
+# /tmp へは書き込み用の小さな state DB（SQLITE_SEED_PATH）だけをコピーする
+SEED = Path(os.getenv("SQLITE_SEED_PATH", "/var/task/seed_db.sqlite3"))
 TMP = Path(os.getenv("SQLITE_PATH", "/tmp/db.sqlite3"))
 
+_started = time.perf_counter()
 if os.getenv("STARTUP_COPY_SEED_DB", "1") == "1" and SEED.exists() and not TMP.exists():
     TMP.parent.mkdir(parents=True, exist_ok=True)
     shutil.copy(SEED, TMP)
+_record("seed_copy", _started)
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "engineer_english.settings")
+LEAN_STARTUP = os.getenv("DJANGO_LEAN_STARTUP", "False") == "True"
 
+_started = time.perf_counter()
+import django
+
+django.setup(set_prefix=False)
+_record("setup", _started)
+
+_started = time.perf_counter()
+if LEAN_STARTUP:
+    # API Gateway 経由は HTTP のみなので channels の ProtocolTypeRouter は組み立てない
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+else:
+    from engineer_english.asgi import application
 from mangum import Mangum
-from engineer_english.asgi import application
 
-handler = Mangum(application)
+# Django は lifespan に対応していないため無効化（毎回の例外ログを避ける）
+handler_app = Mangum(application, lifespan="off")
+_record("app_build", _started)
+
+
+def warm_up():
+    # 初期化フェーズ中に URL リゾルバとシリアライザのフィールド定義を組み立てておく
+    from django.db import connection
+    from django.urls import get_resolver
+    from rest_framework.serializers import ModelSerializer
+
+    from core import serializers
+
+    # reverse_dict の参照で全 URL パターンの正規表現をコンパイルさせる
+    get_resolver().reverse_dict
+    for obj in vars(serializers).values():
+        if isinstance(obj, type) and issubclass(obj, ModelSerializer):
+            obj().fields
+    connection.ensure_connection()
+
+
+if LEAN_STARTUP:
+    _started = time.perf_counter()
+    warm_up()
+    _record("warm_up", _started)
+
+_first_request = True
+
+
+def handler(event, context):
+    global _first_request
+    if not _first_request:
+        return handler_app(event, context)
+    _first_request = False
+    started = time.perf_counter()
+    try:
+        return handler_app(event, context)
+    finally:
+        _record("first_request", started)
+        print(json.dumps({"event": "cold_start", "lean": LEAN_STARTUP, "phases_ms": STARTUP_PHASES}))